@@ -0,0 +1,243 @@
+"""
+Rolling chat-context compaction for long sessions.
+
+The agent's chat context grows every turn (user and assistant messages, tool
+calls and their outputs), and all of it is sent to the LLM on every
+generation. ContextCompactor bounds what's sent:
+
+1. System messages (Buddy's persona) are always kept.
+2. Stale injections go first: event search calls/outputs and RAG context
+   messages older than a few turns.
+3. Older turns are folded into a running summary by a background LLM call,
+   started before the budget is hit so it's ready off the critical path.
+4. If the history is still over budget (summary not ready yet), whole oldest
+   turns are dropped so the bound always holds.
+
+The agent's own history is left intact; only the copy handed to the LLM is
+compacted.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from livekit.agents import llm
+
+logger = logging.getLogger("context")
+
+# Budget for everything sent to the LLM (~4 characters per token)
+CONTEXT_MAX_TOKENS = int(os.getenv("BUDDY_CONTEXT_MAX_TOKENS", "3000"))
+# Start summarizing in the background once the history reaches this fraction of the budget
+CONTEXT_SUMMARIZE_RATIO = 0.75
+# Most recent user turns that are always sent verbatim
+CONTEXT_KEEP_TURNS = int(os.getenv("BUDDY_CONTEXT_KEEP_TURNS", "6"))
+# Event search results stay available for follow-ups ("tell me about the second one") this many turns
+CONTEXT_TOOL_TTL_TURNS = int(os.getenv("BUDDY_CONTEXT_TOOL_TTL_TURNS", "2"))
+# RAG context stays this many turns, so later turns can refer back to it instead of re-sending it
+CONTEXT_RAG_TTL_TURNS = int(os.getenv("BUDDY_CONTEXT_RAG_TTL_TURNS", "2"))
+CHARS_PER_TOKEN = 4
+
+# Prefix of the RAG context message added in Assistant.on_user_turn_completed
+RAG_CONTEXT_PREFIX = "Relevant information from your memory:"
+SUMMARY_MESSAGE_ID = "buddy.context.summary"
+SUMMARY_MAX_WORDS = 120
+# Per-item cap when writing the transcript the summarizer reads
+SUMMARY_ITEM_MAX_CHARS = 500
+
+SUMMARY_INSTRUCTIONS = (
+    "You condense conversations between a user and Buddy, a voice assistant dog who "
+    f"recommends San Francisco events. In at most {SUMMARY_MAX_WORDS} words, update the "
+    "running summary with the new conversation. Keep the user's name, preferences, "
+    "neighborhoods, plans and any events or places already suggested. Plain prose, no lists."
+)
+
+
+@dataclass
+class CompactionStats:
+    compactions: int = 0
+    dropped_tool_items: int = 0
+    dropped_rag_items: int = 0
+    # Items left out of the latest compaction because the summary wasn't ready
+    truncated_items: int = 0
+    summaries: int = 0
+    summary_failures: int = 0
+    summarized_items: int = 0
+    last_tokens: int = 0
+
+
+def estimate_tokens(item: llm.ChatItem) -> int:
+    """Rough token count for one chat item."""
+    if item.type == "message":
+        chars = sum(len(c) for c in item.content if isinstance(c, str))
+    elif item.type == "function_call":
+        chars = len(item.name) + len(item.arguments)
+    elif item.type == "function_call_output":
+        chars = len(item.output)
+    else:
+        chars = 0
+    # Per-message framing overhead
+    return chars // CHARS_PER_TOKEN + 4
+
+
+def _is_system(item: llm.ChatItem) -> bool:
+    return item.type == "message" and item.role in ("system", "developer")
+
+
+def _is_rag_injection(item: llm.ChatItem) -> bool:
+    return (
+        item.type == "message"
+        and item.role == "assistant"
+        and (item.text_content or "").startswith(RAG_CONTEXT_PREFIX)
+    )
+
+
+def _split_turns(items: list[llm.ChatItem]) -> list[list[llm.ChatItem]]:
+    """Group history into turns, each starting at a user message."""
+    turns: list[list[llm.ChatItem]] = []
+    for item in items:
+        if not turns or (item.type == "message" and item.role == "user"):
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+class ContextCompactor:
+    """Per-session policy that keeps the prompt under a token budget."""
+
+    def __init__(
+        self,
+        persona: str,
+        max_tokens: int = CONTEXT_MAX_TOKENS,
+        keep_turns: int = CONTEXT_KEEP_TURNS,
+        tool_ttl_turns: int = CONTEXT_TOOL_TTL_TURNS,
+        rag_ttl_turns: int = CONTEXT_RAG_TTL_TURNS,
+    ):
+        self.persona = persona
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.tool_ttl_turns = tool_ttl_turns
+        self.rag_ttl_turns = rag_ttl_turns
+        self.summary = ""
+        self.stats = CompactionStats()
+        self._summarized_ids: set[str] = set()
+        self._stale_ids: set[str] = set()
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def compact(self, chat_ctx: llm.ChatContext, summarizer: Optional[llm.LLM] = None) -> llm.ChatContext:
+        """
+        Return a copy of chat_ctx that fits the budget. With a summarizer,
+        also kicks off background summarization of older turns when needed.
+        """
+        system = [i for i in chat_ctx.items if _is_system(i) and i.id != SUMMARY_MESSAGE_ID]
+        history = [i for i in chat_ctx.items if not _is_system(i)]
+        history = [i for i in self._drop_stale(history) if i.id not in self._summarized_ids]
+
+        # The persona is never dropped, whatever else is
+        if not system:
+            system = [llm.ChatMessage(role="system", content=[self.persona])]
+        prefix = list(system)
+        if self.summary:
+            prefix.append(llm.ChatMessage(
+                id=SUMMARY_MESSAGE_ID,
+                role="system",
+                content=[f"Summary of the earlier conversation:\n{self.summary}"],
+            ))
+
+        prefix_tokens = sum(estimate_tokens(i) for i in prefix)
+        turns = _split_turns(history)
+        turn_tokens = [sum(estimate_tokens(i) for i in turn) for turn in turns]
+        total = prefix_tokens + sum(turn_tokens)
+
+        if summarizer is not None and total > self.max_tokens * CONTEXT_SUMMARIZE_RATIO:
+            self._schedule_summary(turns, summarizer)
+
+        # Hard bound: the summary isn't ready (or wasn't enough), drop the oldest turns
+        truncated = 0
+        while total > self.max_tokens and len(turns) > 1:
+            truncated += len(turns.pop(0))
+            total -= turn_tokens.pop(0)
+        self.stats.truncated_items = truncated
+
+        self.stats.compactions += 1
+        self.stats.last_tokens = total
+
+        compacted = chat_ctx.copy()
+        compacted.items = prefix + [item for turn in turns for item in turn]
+        return compacted
+
+    def close(self) -> None:
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+
+    def _drop_stale(self, history: list[llm.ChatItem]) -> list[llm.ChatItem]:
+        turns = _split_turns(history)
+        stale_calls: set[str] = set()
+        stale_rag: set[str] = set()
+        for age, turn in enumerate(reversed(turns)):
+            if age >= self.tool_ttl_turns:
+                stale_calls.update(i.call_id for i in turn if i.type == "function_call")
+            if age >= self.rag_ttl_turns:
+                stale_rag.update(i.id for i in turn if _is_rag_injection(i))
+
+        kept = []
+        for item in history:
+            if item.type in ("function_call", "function_call_output") and item.call_id in stale_calls:
+                if item.id not in self._stale_ids:
+                    self._stale_ids.add(item.id)
+                    self.stats.dropped_tool_items += 1
+                continue
+            if item.id in stale_rag:
+                if item.id not in self._stale_ids:
+                    self._stale_ids.add(item.id)
+                    self.stats.dropped_rag_items += 1
+                continue
+            kept.append(item)
+        return kept
+
+    def _schedule_summary(self, turns: list[list[llm.ChatItem]], summarizer: llm.LLM) -> None:
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        older = [item for turn in turns[: -self.keep_turns] for item in turn] if self.keep_turns else []
+        if not older:
+            return
+        self._summary_task = asyncio.create_task(self._summarize(older, summarizer))
+
+    async def _summarize(self, items: list[llm.ChatItem], summarizer: llm.LLM) -> None:
+        lines = []
+        for item in items:
+            if item.type == "message" and item.role in ("user", "assistant"):
+                speaker = "User" if item.role == "user" else "Buddy"
+                lines.append(f"{speaker}: {(item.text_content or '')[:SUMMARY_ITEM_MAX_CHARS]}")
+            elif item.type == "function_call_output":
+                lines.append(f"Event search results: {item.output[:SUMMARY_ITEM_MAX_CHARS]}")
+
+        request = llm.ChatContext.empty()
+        request.add_message(role="system", content=SUMMARY_INSTRUCTIONS)
+        request.add_message(
+            role="user",
+            content=(
+                f"Running summary so far:\n{self.summary or '(none)'}\n\n"
+                f"New conversation:\n" + "\n".join(lines)
+            ),
+        )
+
+        try:
+            parts = []
+            async with summarizer.chat(chat_ctx=request) as stream:
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        parts.append(chunk.delta.content)
+            summary = "".join(parts).strip()
+        except Exception as e:
+            self.stats.summary_failures += 1
+            logger.warning(f"Context summarization failed, older turns will be truncated instead: {e}")
+            return
+
+        if summary:
+            self.summary = summary
+            self._summarized_ids.update(item.id for item in items)
+            self.stats.summaries += 1
+            self.stats.summarized_items += len(items)
+            logger.info(f"🗜️ Folded {len(items)} older chat items into the running summary")
@@ -0,0 +1,269 @@
+"""
+Host-wide query embedding service.
+
+Every job process that opens a knowledge base would otherwise load its own copy
+of Chroma's default embedding model (all-MiniLM-L6-v2 on ONNX Runtime) and embed
+one query at a time. With dozens of rooms on a host that's dozens of model
+copies and no batching.
+
+scripts/embedding_server.py runs one EmbeddingServer per host on a Unix socket.
+It collects queries from every session for up to BUDDY_EMBEDDING_BATCH_WINDOW_MS
+and embeds them in one model call. Job processes use SharedEmbeddingFunction,
+which sends queries to the socket when the server is there and otherwise falls
+back to the in-process model. Retrieval keeps working if the server is down or
+was never started.
+
+Wire format (both directions little-endian):
+    request   u32 length, then a JSON list of query strings
+    response  u32 count, u32 dimension, then count x dimension float32
+    error     u32 0xFFFFFFFF, u32 length, then a UTF-8 message
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+from chromadb.api.types import DefaultEmbeddingFunction, Documents, Embeddings
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+logger = logging.getLogger("rag")
+
+EMBEDDING_SOCKET = Path(os.getenv(
+    "BUDDY_EMBEDDING_SOCKET", str(Path(tempfile.gettempdir()) / "buddy-embeddings.sock")
+))
+# How long the server waits for more queries before embedding a batch
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("BUDDY_EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH = int(os.getenv("BUDDY_EMBEDDING_MAX_BATCH", "32"))
+# Client-side deadline for one request before falling back to the local model
+EMBEDDING_TIMEOUT = float(os.getenv("BUDDY_EMBEDDING_TIMEOUT", "1.0"))
+# After a failed request, how long to use the local model before trying the server again
+EMBEDDING_RETRY_AFTER = 10.0
+
+_HEADER = struct.Struct("<I")
+_RESPONSE = struct.Struct("<II")
+_ERROR = 0xFFFFFFFF
+
+
+_local_model: Optional[ONNXMiniLM_L6_V2] = None
+
+
+def local_embedding_model() -> ONNXMiniLM_L6_V2:
+    """
+    The model behind Chroma's default embedding function, loaded once per
+    process (DefaultEmbeddingFunction builds a new instance on every call).
+    """
+    global _local_model
+    if _local_model is None:
+        _local_model = ONNXMiniLM_L6_V2()
+    return _local_model
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+@dataclass
+class EmbeddingClientStats:
+    remote: int = 0
+    local: int = 0
+    failures: int = 0
+
+
+class SharedEmbeddingFunction(DefaultEmbeddingFunction):
+    """
+    Chroma's default embedding function, computed by the host's embedding
+    server when it's running and in process otherwise. Same model, same name,
+    so Chroma treats collections built with the default function as compatible.
+    """
+
+    def __init__(self, socket_path: Path = EMBEDDING_SOCKET, timeout: float = EMBEDDING_TIMEOUT):
+        super().__init__()
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+        self.stats = EmbeddingClientStats()
+        # Retrieval runs on a thread pool; each thread keeps its own connection
+        self._local = threading.local()
+        self._server_down_until = 0.0
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if time.monotonic() >= self._server_down_until and self.socket_path.exists():
+            try:
+                embeddings = self._embed_remote(list(input))
+                self.stats.remote += 1
+                return embeddings
+            except (OSError, ValueError) as e:
+                self._close_connection()
+                self.stats.failures += 1
+                self._server_down_until = time.monotonic() + EMBEDDING_RETRY_AFTER
+                logger.warning(
+                    f"Embedding server unavailable ({e}), using the local model for {EMBEDDING_RETRY_AFTER:.0f}s"
+                )
+        self.stats.local += 1
+        return local_embedding_model()(input)
+
+    def _embed_remote(self, texts: list[str]) -> Embeddings:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(str(self.socket_path))
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+
+        payload = json.dumps(texts).encode("utf-8")
+        sock.sendall(_HEADER.pack(len(payload)) + payload)
+        count, size = _RESPONSE.unpack(_recv_exactly(sock, _RESPONSE.size))
+        if count == _ERROR:
+            message = _recv_exactly(sock, size).decode("utf-8", "replace")
+            raise ValueError(f"embedding server error: {message}")
+        if count != len(texts):
+            raise ValueError(f"expected {len(texts)} embeddings, got {count}")
+        matrix = np.frombuffer(_recv_exactly(sock, count * size * 4), dtype="<f4").reshape(count, size)
+        return [row.astype(np.float32) for row in matrix]
+
+    def _close_connection(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+
+@dataclass
+class EmbeddingServerStats:
+    requests: int = 0
+    queries: int = 0
+    batches: int = 0
+    largest_batch: int = 0
+    errors: int = 0
+
+    @property
+    def mean_batch(self) -> float:
+        return self.queries / self.batches if self.batches else 0.0
+
+
+class EmbeddingServer:
+    """Embeds queries from every connected process in micro-batches."""
+
+    def __init__(
+        self,
+        socket_path: Path = EMBEDDING_SOCKET,
+        embed: Optional[Callable[[list[str]], Any]] = None,
+        batch_window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch: int = EMBEDDING_MAX_BATCH,
+    ):
+        self.socket_path = Path(socket_path)
+        self.embed = embed or local_embedding_model()
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = EmbeddingServerStats()
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def serve_forever(self) -> None:
+        self._queue = asyncio.Queue()
+        # A socket left behind by a server that didn't shut down cleanly
+        self.socket_path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info(
+            f"🧮 Embedding server on {self.socket_path} (window {self.batch_window * 1000:.0f}ms, "
+            f"batches up to {self.max_batch})"
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.socket_path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                texts = json.loads(await reader.readexactly(length))
+                self.stats.requests += 1
+                future = loop.create_future()
+                await self._queue.put((texts, future))
+                try:
+                    matrix = await future
+                except Exception as e:
+                    message = str(e).encode("utf-8")
+                    writer.write(_RESPONSE.pack(_ERROR, len(message)) + message)
+                else:
+                    writer.write(_RESPONSE.pack(*matrix.shape) + matrix.astype("<f4").tobytes())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            logger.warning(f"Dropping embedding client after a bad request: {e}")
+        finally:
+            writer.close()
+
+    async def _batch_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.batch_window
+            # Queries that arrive within the window (or while the last batch
+            # was embedding) share one model call
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(self._queue.get(), remaining)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                matrix = await asyncio.to_thread(self._embed, texts)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats.batches += 1
+            self.stats.queries += len(texts)
+            self.stats.largest_batch = max(self.stats.largest_batch, len(texts))
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(matrix[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        return np.asarray(self.embed(texts), dtype=np.float32).reshape(len(texts), -1)
+
+
+_embedding_function: Optional[SharedEmbeddingFunction] = None
+
+
+def get_embedding_function() -> SharedEmbeddingFunction:
+    """The process-wide query embedder (server when available, local model otherwise)."""
+    global _embedding_function
+    if _embedding_function is None:
+        _embedding_function = SharedEmbeddingFunction()
+    return _embedding_function
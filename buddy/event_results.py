@@ -0,0 +1,280 @@
+"""
+Post-processing for event search results before they reach the LLM.
+
+Raw Linkup results are long, repetitive and full of URLs and page chrome, and
+every input token adds to time-to-first-token. This module dedupes near
+duplicates, strips boilerplate, pulls out when/where, ranks by relevance to the
+query and renders a compact summary that fits a token budget. URLs are kept on
+the EventSummary objects for the frontend instead of going into the prompt.
+"""
+
+import difflib
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+# Rough budget for the tool result handed to the LLM (~4 characters per token)
+EVENT_TOKEN_BUDGET = int(os.getenv("BUDDY_EVENT_TOKEN_BUDGET", "220"))
+EVENT_MAX_RESULTS = int(os.getenv("BUDDY_EVENT_MAX_RESULTS", "5"))
+# Titles at least this similar are the same event
+TITLE_DUPLICATE_SIMILARITY = 0.85
+# ...or this similar when they come from the same site
+SAME_DOMAIN_TITLE_SIMILARITY = 0.6
+SNIPPET_MAX_CHARS = 160
+CHARS_PER_TOKEN = 4
+
+_BOILERPLATE = re.compile(
+    r"(?:(?:buy|get) tickets?(?: now| here)?|click here(?: (?:for|to) [^.!]*)?|"
+    r"read more|learn more|see more|sign up(?: now)?|subscribe(?: now)?|"
+    r"share (?:this|on \w+)|add to calendar|we use cookies[^.]*|accept (?:all )?cookies|"
+    r"skip to (?:main )?content|all rights reserved|privacy policy|terms of (?:use|service)|"
+    r"\bmenu\b|\blog ?in\b)[.!]?",
+    re.IGNORECASE,
+)
+_MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_MARKUP = re.compile(r"[#*_|>`]+|\s[-–—•·]{2,}\s")
+_WHITESPACE = re.compile(r"\s+")
+_TITLE_SUFFIX = re.compile(r"\s*[|–—-]\s*[^|–—-]{2,40}$")
+
+_MONTHS = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+    r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_WEEKDAYS = r"(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day|nesday|rsday|urday)?\.?"
+_DATE = re.compile(
+    rf"\b(?:{_WEEKDAYS},?\s+)?{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?(?:\s*[-–]\s*\d{{1,2}})?(?:,?\s+\d{{4}})?"
+    rf"|\b{_WEEKDAYS},?\s+\d{{1,2}}/\d{{1,2}}"
+    rf"|\b\d{{1,2}}/\d{{1,2}}(?:/\d{{2,4}})?\b"
+    rf"|\b(?:tonight|tomorrow|this (?:weekend|week|friday|saturday|sunday)|every {_WEEKDAYS})",
+    re.IGNORECASE,
+)
+_VENUE = re.compile(
+    r"\b(?:at|@|venue:)\s+((?:the\s+)?(?:[A-Z][\w'&.-]*)(?:\s+(?:[A-Z][\w'&.-]*|of|the|and|&)){0,5})"
+)
+
+SF_NEIGHBORHOODS = (
+    "Mission", "SoMa", "Castro", "Haight", "Hayes Valley", "North Beach", "Marina",
+    "Richmond", "Sunset", "Dogpatch", "Tenderloin", "Nob Hill", "Russian Hill",
+    "Chinatown", "Embarcadero", "Fisherman's Wharf", "Presidio", "Golden Gate Park",
+    "Bernal Heights", "Noe Valley", "Potrero Hill", "Fillmore", "Japantown",
+    "Union Square", "Financial District", "Pacific Heights", "Cole Valley",
+    "Excelsior", "Bayview", "Ocean Beach", "Dolores Park", "Crissy Field",
+    "Treasure Island", "Outer Sunset", "Inner Sunset", "Lower Haight", "Civic Center",
+)
+_NEIGHBORHOOD = re.compile(
+    r"\b(" + "|".join(re.escape(n) for n in sorted(SF_NEIGHBORHOODS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_CANONICAL_NEIGHBORHOOD = {n.lower(): n for n in SF_NEIGHBORHOODS}
+
+_TERM = re.compile(r"[a-z0-9']+")
+_QUERY_STOPWORDS = frozenset({
+    "a", "an", "the", "in", "on", "at", "for", "of", "to", "and", "any", "some",
+    "events", "event", "things", "find", "me", "near", "nearby", "sf", "san",
+    "francisco", "what", "whats", "is", "are", "there", "happening", "do",
+})
+
+
+@dataclass
+class EventSummary:
+    """One cleaned-up search result."""
+
+    title: str
+    url: str
+    snippet: str
+    date: Optional[str] = None
+    venue: Optional[str] = None
+    neighborhood: Optional[str] = None
+    score: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def clean_snippet(text: str) -> str:
+    """Remove markdown, URLs and site chrome, and collapse whitespace."""
+    text = _MARKDOWN_IMAGE.sub(" ", text)
+    text = _MARKDOWN_LINK.sub(r"\1", text)
+    text = _URL.sub(" ", text)
+    text = _BOILERPLATE.sub(" ", text)
+    text = _MARKUP.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip(" .,-–—|")
+
+
+def clean_title(title: str, url: str = "") -> str:
+    """
+    Drop trailing site names ("Jazz Night | Eventbrite") and markup. A suffix
+    after a dash is only dropped when it names the result's site, since dashes
+    are common inside real titles ("Noe Valley - Street Fair").
+    """
+    title = _WHITESPACE.sub(" ", title).strip()
+    match = _TITLE_SUFFIX.search(title)
+    if match and match.start() >= 8:
+        suffix = match.group(0)
+        site = re.sub(r"[^a-z0-9]", "", suffix.lower())
+        if "|" in suffix or (site and site in re.sub(r"[^a-z0-9]", "", _domain(url))):
+            title = title[:match.start()]
+    return _WHITESPACE.sub(" ", _MARKUP.sub(" ", title)).strip()
+
+
+def extract_date(text: str) -> Optional[str]:
+    match = _DATE.search(text)
+    return _WHITESPACE.sub(" ", match.group(0)).strip() if match else None
+
+
+def extract_venue(text: str) -> Optional[str]:
+    match = _VENUE.search(text)
+    if not match:
+        return None
+    venue = match.group(1).strip(" .,")
+    # "at 7pm" / "at Noon" aren't places
+    if re.match(r"^\d|^(noon|midnight)$", venue, re.IGNORECASE):
+        return None
+    return venue
+
+
+def extract_neighborhood(text: str) -> Optional[str]:
+    match = _NEIGHBORHOOD.search(text)
+    return _CANONICAL_NEIGHBORHOOD[match.group(1).lower()] if match else None
+
+
+def _domain(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _title_key(title: str) -> str:
+    return " ".join(_TERM.findall(title.lower()))
+
+
+def _query_terms(query: str) -> set[str]:
+    return {t for t in _TERM.findall(query.lower()) if t not in _QUERY_STOPWORDS}
+
+
+def dedupe(events: list[EventSummary]) -> list[EventSummary]:
+    """
+    Drop near-duplicate events, keeping the first (Linkup's ranking) and
+    filling in any details only the duplicate had.
+    """
+    kept: list[EventSummary] = []
+    for event in events:
+        key, domain = _title_key(event.title), _domain(event.url)
+        duplicate = None
+        for other in kept:
+            if event.url and event.url == other.url:
+                duplicate = other
+                break
+            similarity = difflib.SequenceMatcher(None, key, _title_key(other.title)).ratio()
+            threshold = SAME_DOMAIN_TITLE_SIMILARITY if domain == _domain(other.url) else TITLE_DUPLICATE_SIMILARITY
+            if similarity >= threshold:
+                duplicate = other
+                break
+        if duplicate is None:
+            kept.append(event)
+            continue
+        for field in ("date", "venue", "neighborhood"):
+            if getattr(duplicate, field) is None:
+                setattr(duplicate, field, getattr(event, field))
+    return kept
+
+
+def rank(events: list[EventSummary], query: str) -> list[EventSummary]:
+    """
+    Order events by overlap with the query terms (title counts double),
+    preferring ones with a known date and, on ties, Linkup's original order.
+    """
+    terms = _query_terms(query)
+    for position, event in enumerate(events):
+        title_terms = set(_TERM.findall(event.title.lower()))
+        snippet_terms = set(_TERM.findall(event.snippet.lower()))
+        score = 2.0 * len(terms & title_terms) + len(terms & snippet_terms)
+        if event.date:
+            score += 0.5
+        if event.neighborhood and event.neighborhood.lower() in query.lower():
+            score += 1.0
+        event.score = score - 0.01 * position
+    return sorted(events, key=lambda e: e.score, reverse=True)
+
+
+def parse_results(results: list[dict]) -> list[EventSummary]:
+    """Turn raw Linkup searchResults entries into cleaned EventSummary objects."""
+    events = []
+    for result in results:
+        title = clean_title(result.get("name") or "Event", result.get("url", ""))
+        snippet = clean_snippet(result.get("content") or "")
+        text = f"{title}. {snippet}"
+        events.append(EventSummary(
+            title=title,
+            url=result.get("url", ""),
+            snippet=snippet,
+            date=extract_date(text),
+            venue=extract_venue(text),
+            neighborhood=extract_neighborhood(text),
+        ))
+    return events
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _format_event(index: int, event: EventSummary, snippet_chars: int) -> str:
+    details = [d for d in (event.date, event.venue, event.neighborhood) if d]
+    # Don't repeat the neighborhood when it's already part of the venue
+    if event.venue and event.neighborhood and event.neighborhood.lower() in event.venue.lower():
+        details.remove(event.neighborhood)
+    line = f"{index}. {event.title}"
+    if details:
+        line += f" ({', '.join(details)})"
+    snippet = event.snippet[:snippet_chars].rsplit(" ", 1)[0] if len(event.snippet) > snippet_chars else event.snippet
+    if snippet:
+        line += f": {snippet}"
+    return line
+
+
+def summarize_events(
+    events: list[EventSummary],
+    token_budget: int = EVENT_TOKEN_BUDGET,
+    max_results: int = EVENT_MAX_RESULTS,
+) -> str:
+    """
+    Render ranked events as short numbered lines within token_budget. Snippets
+    shrink first; events that still don't fit are left out (the first always
+    makes it in).
+    """
+    header = "Events found, best match first:"
+    lines = [header]
+    used = estimate_tokens(header)
+    for index, event in enumerate(events[:max_results], 1):
+        for snippet_chars in (SNIPPET_MAX_CHARS, SNIPPET_MAX_CHARS // 2, 0):
+            line = _format_event(index, event, snippet_chars)
+            cost = estimate_tokens(line)
+            if used + cost <= token_budget:
+                break
+        else:
+            if index > 1:
+                break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def process_results(
+    results: list[dict],
+    query: str,
+    token_budget: int = EVENT_TOKEN_BUDGET,
+    max_results: int = EVENT_MAX_RESULTS,
+) -> tuple[str, list[EventSummary]]:
+    """
+    Full pipeline: parse, dedupe, rank and summarize. Returns the prompt text
+    and the ranked events (with URLs) that made it into the summary.
+    """
+    events = rank(dedupe(parse_results(results)), query)
+    summary = summarize_events(events, token_budget=token_budget, max_results=max_results)
+    # Lines are numbered from 1 after the header
+    included = events[: summary.count("\n")]
+    return summary, included
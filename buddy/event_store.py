@@ -0,0 +1,502 @@
+"""
+Local, indexed store of San Francisco events.
+
+Most event questions ("things to do this weekend", "food festivals in
+November") are about a small set of events that changes slowly, yet a live
+Linkup search can hold a spoken turn for seconds. scripts/refresh_event_store.py
+runs in its own process, pulls a fixed set of broad searches on a schedule,
+normalizes the results (dates parsed to ISO ranges, neighborhood, categories)
+and writes them to a SQLite file. Job processes open that file read-only and
+answer find_nearby_events from it in milliseconds. Linkup is only called when
+the store is missing, stale, or has no confident match.
+
+Schema:
+    events            one row per event, indexed by start/end date and neighborhood
+    event_categories  (event_id, category), indexed by category
+    events_fts        FTS5 over title, snippet, venue and neighborhood
+    meta              refreshed_at, event count
+
+The refresher builds a new file and renames it over the old one, so readers
+never see a half-written store; they reopen when the file changes.
+"""
+
+import calendar
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+from buddy.event_results import EventSummary, extract_neighborhood
+
+logger = logging.getLogger("tools")
+
+PROJECT_ROOT = Path(__file__).parent.parent
+EVENT_STORE_PATH = Path(os.getenv("BUDDY_EVENT_STORE", str(PROJECT_ROOT / "event_store.db")))
+# A store older than this isn't trusted; searches go live until it's refreshed
+EVENT_STORE_MAX_AGE = float(os.getenv("BUDDY_EVENT_STORE_MAX_AGE", "21600"))
+# Matches needed to answer a broad query locally (a query naming something
+# specific, like "Outside Lands", only needs one)
+EVENT_STORE_MIN_RESULTS = int(os.getenv("BUDDY_EVENT_STORE_MIN_RESULTS", "3"))
+EVENT_STORE_MAX_RESULTS = 10
+
+CATEGORIES = {
+    "music": ("music", "concert", "concerts", "jazz", "band", "bands", "dj", "symphony", "orchestra", "gig", "gigs"),
+    "food": ("food", "foodie", "tasting", "wine", "beer", "brewery", "culinary", "chef", "dinner", "brunch", "eat"),
+    "art": ("art", "arts", "gallery", "galleries", "exhibit", "exhibits", "exhibition", "museum", "museums"),
+    "comedy": ("comedy", "comedian", "standup", "improv"),
+    "outdoors": ("outdoor", "outdoors", "hike", "hikes", "hiking", "park", "picnic", "bike", "run"),
+    "festival": ("festival", "festivals", "fest", "fair", "fairs", "parade", "celebration"),
+    "market": ("market", "markets", "farmers", "flea", "bazaar"),
+    "family": ("family", "kids", "children", "kid-friendly"),
+    "nightlife": ("nightlife", "club", "clubs", "party", "parties", "dance", "dancing", "bar", "bars"),
+    "theater": ("theater", "theatre", "play", "plays", "musical", "opera", "ballet"),
+    "sports": ("sports", "game", "giants", "warriors", "49ers", "valkyries"),
+}
+_CATEGORY_BY_WORD = {word: category for category, words in CATEGORIES.items() for word in words}
+# Category words that name the whole category; the rest ("jazz", "opera") are
+# also kept as search terms, so a jazz question isn't answered with any concert
+_GENERIC_CATEGORY_WORDS = frozenset({
+    "music", "concert", "concerts", "food", "art", "arts", "comedy", "outdoor", "outdoors",
+    "festival", "festivals", "fest", "market", "markets", "family", "kids", "nightlife",
+    "party", "parties", "theater", "theatre", "sports",
+})
+
+_MONTH_NUMBERS = {
+    name: number
+    for number in range(1, 13)
+    for name in (calendar.month_name[number].lower(), calendar.month_abbr[number].lower())
+}
+_MONTH_NUMBERS["sept"] = 9
+_MONTH = r"(" + "|".join(sorted(_MONTH_NUMBERS, key=len, reverse=True)) + r")\.?"
+_MONTH_DAY = re.compile(
+    rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:\s*[-–]\s*(?:{_MONTH}\s+)?(\d{{1,2}}))?(?:,?\s+(\d{{4}}))?\b",
+    re.IGNORECASE,
+)
+_NUMERIC = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")
+_MONTH_ONLY = re.compile(rf"\b(?:in\s+)?{_MONTH}(?:\s+(\d{{4}}))?\b", re.IGNORECASE)
+_RELATIVE = re.compile(
+    r"\b(tonight|today|tomorrow|this weekend|next weekend|this week|next week|this month|next month)\b",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+# Words that say nothing about which events match
+_FILLER = frozenset({
+    "a", "an", "the", "in", "on", "at", "for", "of", "to", "and", "or", "any", "some",
+    "events", "event", "things", "thing", "to-do", "do", "find", "me", "near", "nearby",
+    "sf", "san", "francisco", "what", "whats", "what's", "is", "are", "there", "happening",
+    "going", "fun", "good", "best", "cool", "stuff", "local", "around", "city", "live",
+    "show", "shows", "activities", "activity", "happenings",
+    "upcoming", "this", "next", "week", "weekend", "tonight", "today", "tomorrow", "month",
+    "2024", "2025", "2026", "2027",
+})
+# Past dates without a year this far back are taken to mean next year
+_YEAR_ROLLOVER_DAYS = 60
+
+
+def _resolve_year(month: int, day: int, today: date) -> Optional[date]:
+    candidate = _safe_date(today.year, month, day)
+    if candidate is not None and (today - candidate).days > _YEAR_ROLLOVER_DAYS:
+        candidate = _safe_date(today.year + 1, month, day)
+    return candidate
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _weekend(today: date, weeks_ahead: int = 0) -> tuple[date, date]:
+    # On a Saturday or Sunday, "this weekend" is the one in progress
+    saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+    if today.weekday() == 6:
+        saturday = today - timedelta(days=1)
+    saturday += timedelta(weeks=weeks_ahead)
+    return max(saturday, today), saturday + timedelta(days=1)
+
+
+def _month_range(year: int, month: int) -> tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_date_range(text: str, today: Optional[date] = None) -> Optional[tuple[date, date]]:
+    """
+    The date range a piece of text refers to: "tonight", "this weekend",
+    "Nov 15-16", "11/8", "in November". Returns (start, end) inclusive, or None.
+    """
+    today = today or date.today()
+
+    relative = _RELATIVE.search(text)
+    if relative:
+        phrase = relative.group(1).lower()
+        if phrase in ("tonight", "today"):
+            return today, today
+        if phrase == "tomorrow":
+            return today + timedelta(days=1), today + timedelta(days=1)
+        if phrase == "this weekend":
+            return _weekend(today)
+        if phrase == "next weekend":
+            return _weekend(today, weeks_ahead=1)
+        if phrase == "this week":
+            return today, today + timedelta(days=6 - today.weekday())
+        if phrase == "next week":
+            monday = today + timedelta(days=7 - today.weekday())
+            return monday, monday + timedelta(days=6)
+        if phrase == "this month":
+            return today, _month_range(today.year, today.month)[1]
+        next_month = _month_range(today.year, today.month)[1] + timedelta(days=1)
+        return _month_range(next_month.year, next_month.month)
+
+    match = _MONTH_DAY.search(text)
+    if match:
+        month = _MONTH_NUMBERS[match.group(1).lower()]
+        day = int(match.group(2))
+        if match.group(5):
+            start = _safe_date(int(match.group(5)), month, day)
+        else:
+            start = _resolve_year(month, day, today)
+        if start is None:
+            return None
+        end = start
+        if match.group(4):
+            end_month = _MONTH_NUMBERS[match.group(3).lower()] if match.group(3) else month
+            end_year = start.year + (1 if end_month < month else 0)
+            end = _safe_date(end_year, end_month, int(match.group(4))) or start
+        return start, max(start, end)
+
+    match = _NUMERIC.search(text)
+    if match:
+        month, day = int(match.group(1)), int(match.group(2))
+        year = match.group(3)
+        if year:
+            start = _safe_date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+        else:
+            start = _resolve_year(month, day, today) if 1 <= month <= 12 else None
+        return (start, start) if start is not None else None
+
+    match = _MONTH_ONLY.search(text)
+    if match:
+        # "may" and "march" are also ordinary words; only trust them as months with "in"
+        word = match.group(1).lower()
+        if word in ("may", "mar", "march") and not match.group(0).lower().startswith("in "):
+            return None
+        month = _MONTH_NUMBERS[word]
+        year = int(match.group(2)) if match.group(2) else today.year + (1 if month < today.month else 0)
+        start, end = _month_range(year, month)
+        return max(start, today) if end >= today else start, end
+
+    return None
+
+
+def categorize(text: str) -> list[str]:
+    """Categories an event (or a query) mentions, in CATEGORIES order."""
+    words = set(_WORD.findall(text.lower()))
+    if "live music" in text.lower():
+        words.add("music")
+    found = {_CATEGORY_BY_WORD[word] for word in words if word in _CATEGORY_BY_WORD}
+    return [category for category in CATEGORIES if category in found]
+
+
+@dataclass
+class EventQuery:
+    """What a search query asks for, in terms the store's indexes understand."""
+
+    dates: Optional[tuple[date, date]] = None
+    neighborhood: Optional[str] = None
+    categories: tuple[str, ...] = ()
+    # Words that aren't dates, places, categories or filler ("Outside Lands")
+    terms: tuple[str, ...] = ()
+
+
+def parse_event_query(search_query: str, today: Optional[date] = None) -> EventQuery:
+    neighborhood = extract_neighborhood(search_query)
+    text = search_query.lower()
+    if neighborhood:
+        text = text.replace(neighborhood.lower(), " ")
+    for pattern in (_RELATIVE, _MONTH_DAY, _NUMERIC):
+        text = pattern.sub(" ", text)
+    terms = []
+    for word in _WORD.findall(text):
+        word = word.strip("'-")
+        if word and word not in _FILLER and word not in _GENERIC_CATEGORY_WORDS and word not in _MONTH_NUMBERS:
+            terms.append(word)
+    return EventQuery(
+        dates=parse_date_range(search_query, today),
+        neighborhood=neighborhood,
+        categories=tuple(categorize(search_query)),
+        terms=tuple(dict.fromkeys(terms)),
+    )
+
+
+@dataclass
+class StoredEvent:
+    """An event as the refresher normalized it."""
+
+    id: str
+    title: str
+    url: str
+    snippet: str
+    start_date: Optional[date]
+    end_date: Optional[date]
+    date_text: Optional[str]
+    venue: Optional[str]
+    neighborhood: Optional[str]
+    categories: list[str]
+
+    @classmethod
+    def from_summary(cls, event: EventSummary, today: Optional[date] = None) -> "StoredEvent":
+        dates = parse_date_range(event.date, today) if event.date else None
+        return cls(
+            id=hashlib.sha1((event.url or event.title).encode("utf-8")).hexdigest()[:16],
+            title=event.title,
+            url=event.url,
+            snippet=event.snippet,
+            start_date=dates[0] if dates else None,
+            end_date=dates[1] if dates else None,
+            date_text=event.date,
+            venue=event.venue,
+            neighborhood=event.neighborhood,
+            categories=categorize(f"{event.title} {event.snippet}"),
+        )
+
+    def to_result(self) -> dict:
+        """The event in Linkup's searchResults shape, so the tool's pipeline is unchanged."""
+        content = self.snippet
+        if self.date_text and self.date_text.lower() not in content.lower():
+            content = f"{self.date_text}. {content}"
+        return {"type": "text", "name": self.title, "url": self.url, "content": content}
+
+
+_SCHEMA = """
+CREATE TABLE events (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    date_text TEXT,
+    venue TEXT,
+    neighborhood TEXT
+);
+CREATE INDEX events_dates ON events (start_date, end_date);
+CREATE INDEX events_neighborhood ON events (neighborhood);
+CREATE TABLE event_categories (
+    event_id TEXT NOT NULL REFERENCES events (id),
+    category TEXT NOT NULL,
+    PRIMARY KEY (category, event_id)
+);
+CREATE VIRTUAL TABLE events_fts USING fts5(
+    title, snippet, venue, neighborhood,
+    content='events', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def write_store(events: Iterable[StoredEvent], path: Path = EVENT_STORE_PATH) -> int:
+    """
+    Write a complete store to path, replacing the old one atomically.
+    Returns the number of events written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(_SCHEMA)
+        count = 0
+        for event in events:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO events "
+                "(id, title, url, snippet, start_date, end_date, date_text, venue, neighborhood) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    event.id, event.title, event.url, event.snippet,
+                    event.start_date.isoformat() if event.start_date else None,
+                    event.end_date.isoformat() if event.end_date else None,
+                    event.date_text, event.venue, event.neighborhood,
+                ),
+            )
+            if not cursor.rowcount:
+                continue
+            count += 1
+            conn.executemany(
+                "INSERT INTO event_categories (event_id, category) VALUES (?, ?)",
+                [(event.id, category) for category in event.categories],
+            )
+        conn.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [("refreshed_at", str(time.time())), ("events", str(count))],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return count
+
+
+@dataclass
+class EventStoreStats:
+    hits: int = 0
+    misses: int = 0
+    # Lookups skipped because the store was missing or too old
+    unavailable: int = 0
+    reopens: int = 0
+    # Answers given only because Linkup failed
+    fallback_hits: int = 0
+
+
+class EventStore:
+    """Read-only view of the event store file, reopened when the refresher replaces it."""
+
+    def __init__(
+        self,
+        path: Path = EVENT_STORE_PATH,
+        max_age: float = EVENT_STORE_MAX_AGE,
+        min_results: int = EVENT_STORE_MIN_RESULTS,
+    ):
+        self.path = Path(path)
+        self.max_age = max_age
+        self.min_results = min_results
+        self.stats = EventStoreStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._file_id: Optional[tuple[int, int]] = None
+        self._refreshed_at = 0.0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.close()
+            return None
+        file_id = (st.st_ino, st.st_mtime_ns)
+        if self._conn is not None and file_id == self._file_id:
+            return self._conn
+
+        self.close()
+        try:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"Couldn't open event store {self.path}: {e}")
+            return None
+        self._conn, self._file_id = conn, file_id
+        self._refreshed_at = float(meta.get("refreshed_at", 0))
+        self.stats.reopens += 1
+        logger.info(f"🗂️ Event store opened ({meta.get('events', '?')} events, "
+                    f"refreshed {time.time() - self._refreshed_at:.0f}s ago)")
+        return conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        self._conn, self._file_id = None, None
+
+    def search(self, search_query: str, today: Optional[date] = None, fallback: bool = False) -> Optional[dict]:
+        """
+        Linkup-shaped results ({"results": [...]}) for a query when the store
+        has a confident answer, otherwise None (the caller goes live).
+        With fallback (Linkup failed), any matching event will do, however old
+        the store is.
+        """
+        conn = self._connection()
+        if conn is None:
+            if not fallback:
+                self.stats.unavailable += 1
+            return None
+        if not fallback and time.time() - self._refreshed_at > self.max_age:
+            self.stats.unavailable += 1
+            return None
+
+        today = today or date.today()
+        query = parse_event_query(search_query, today)
+        rows = self._select(conn, query, today)
+        # Naming something specific that the store has is enough; a broad
+        # question needs a few options to be worth answering locally
+        needed = 1 if query.terms or fallback else self.min_results
+        if len(rows) < needed:
+            if not fallback:
+                self.stats.misses += 1
+            return None
+
+        if fallback:
+            self.stats.fallback_hits += 1
+        else:
+            self.stats.hits += 1
+        return {"results": [event.to_result() for event in rows], "source": "event_store"}
+
+    def _select(self, conn: sqlite3.Connection, query: EventQuery, today: date) -> list[StoredEvent]:
+        where, params = [], []
+        if query.dates is not None:
+            start, end = query.dates
+            where.append("e.start_date <= ? AND COALESCE(e.end_date, e.start_date) >= ?")
+            params += [end.isoformat(), start.isoformat()]
+        else:
+            # Undated events can't be placed in a range, but are fine for open questions
+            where.append("(e.start_date IS NULL OR COALESCE(e.end_date, e.start_date) >= ?)")
+            params.append(today.isoformat())
+        if query.neighborhood:
+            where.append("e.neighborhood = ?")
+            params.append(query.neighborhood)
+        if query.categories:
+            # "food festivals" means both
+            placeholders = ", ".join("?" * len(query.categories))
+            where.append(
+                f"e.id IN (SELECT event_id FROM event_categories WHERE category IN ({placeholders}) "
+                f"GROUP BY event_id HAVING COUNT(*) = ?)"
+            )
+            params += [*query.categories, len(query.categories)]
+
+        columns = "e.id, e.title, e.url, e.snippet, e.start_date, e.end_date, e.date_text, e.venue, e.neighborhood"
+        if query.terms:
+            # Every free term must match; quoted so FTS syntax in user text is inert
+            match = " ".join('"' + term.replace('"', "") + '"' for term in query.terms)
+            sql = (
+                f"SELECT {columns} FROM events_fts JOIN events e ON e.rowid = events_fts.rowid "
+                f"WHERE events_fts MATCH ? AND {' AND '.join(where)} "
+                f"ORDER BY bm25(events_fts) LIMIT ?"
+            )
+            params = [match, *params]
+        else:
+            sql = (
+                f"SELECT {columns} FROM events e WHERE {' AND '.join(where)} "
+                f"ORDER BY e.start_date IS NULL, e.start_date LIMIT ?"
+            )
+        params.append(EVENT_STORE_MAX_RESULTS)
+
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Event store query failed: {e}")
+            return []
+        return [
+            StoredEvent(
+                id=row[0], title=row[1], url=row[2], snippet=row[3],
+                start_date=date.fromisoformat(row[4]) if row[4] else None,
+                end_date=date.fromisoformat(row[5]) if row[5] else None,
+                date_text=row[6], venue=row[7], neighborhood=row[8], categories=[],
+            )
+            for row in rows
+        ]
+
+
+_event_store: Optional[EventStore] = None
+
+
+def get_event_store() -> EventStore:
+    """The process-wide read-only event store."""
+    global _event_store
+    if _event_store is None:
+        _event_store = EventStore()
+    return _event_store
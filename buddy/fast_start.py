@@ -0,0 +1,119 @@
+"""
+Fast worker start: keep heavy imports out of the worker process and load the
+job processes' shared state once per host instead of once per process.
+
+On Linux LiveKit starts job processes from a forkserver, which imports the
+registered plugins' packages once and forks every job process from itself.
+Fast start registers one more package, buddy.preload, so the forkserver also:
+
+1. imports buddy.main and everything it pulls in (plus the RAG stack when RAG
+   is on), so job processes start with the app already imported
+2. loads the state job processes can share safely across fork, via
+   main.prewarm_shared(): the Silero VAD (a single-threaded ONNX session) and
+   the cached phrase audio. Anything holding threads, sockets or SQLite
+   handles (the HTTP client, Chroma knowledge bases) still loads per process
+   in prewarm
+3. freezes the GC, so collections in job processes don't touch (and copy) the
+   pages of those objects
+
+prewarm then finds the shared state already in memory and skips loading it.
+Without the forkserver (spawn, e.g. on macOS) or with BUDDY_FAST_START=false,
+prewarm loads everything in each process as before.
+
+scripts/benchmark_startup.py measures import times and spawn-to-ready time.
+"""
+
+import gc
+import importlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from livekit.agents import Plugin
+from livekit.plugins import silero
+
+logger = logging.getLogger("agent")
+
+FAST_START = os.getenv("BUDDY_FAST_START", "true").lower() in ("1", "true", "yes")
+# Module the forkserver imports to preload buddy (it calls preload() on import)
+PRELOAD_PACKAGE = "buddy.preload"
+
+
+@dataclass
+class PreloadStats:
+    """What the forkserver loaded before forking, inherited by every job process."""
+
+    modules_ms: dict[str, float] = field(default_factory=dict)
+    shared_ms: float = 0.0
+    failed: bool = False
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.modules_ms.values()) + self.shared_ms
+
+
+class FastStartPlugin(Plugin):
+    """Adds buddy's preload to the packages LiveKit's forkserver imports."""
+
+    def __init__(self):
+        super().__init__(title="buddy-fast-start", version="0.1.0", package=PRELOAD_PACKAGE, logger=logger)
+
+
+_preload_stats: Optional[PreloadStats] = None
+_vad: Optional[silero.VAD] = None
+
+
+def register_fast_start() -> bool:
+    """Register the preload with LiveKit (call on the main thread, before run_app)."""
+    if not FAST_START:
+        return False
+    Plugin.register_plugin(FastStartPlugin())
+    return True
+
+
+def preload_modules(names: Iterable[str]) -> None:
+    """Import modules ahead of use, timing each one for the preload stats."""
+    for name in names:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        if _preload_stats is not None:
+            _preload_stats.modules_ms[name] = (time.perf_counter() - started) * 1000
+
+
+def preload() -> None:
+    """
+    Runs in the forkserver. A failure here must not take the forkserver down
+    (it only tolerates ImportError), so job processes then just load
+    everything themselves in prewarm.
+    """
+    global _preload_stats
+    if _preload_stats is not None:
+        return
+    _preload_stats = PreloadStats()
+    try:
+        preload_modules(["buddy.main"])
+        from buddy.main import prewarm_shared
+
+        started = time.perf_counter()
+        prewarm_shared()
+        _preload_stats.shared_ms = (time.perf_counter() - started) * 1000
+    except Exception as e:
+        _preload_stats.failed = True
+        logger.warning(f"Fast start preload failed, job processes will load everything themselves: {e}")
+    gc.collect()
+    gc.freeze()
+
+
+def preload_stats() -> Optional[PreloadStats]:
+    """Stats of the preload this process was forked with, or None if there wasn't one."""
+    return _preload_stats
+
+
+def get_vad() -> silero.VAD:
+    """Silero VAD, loaded once per process (or once per host in the forkserver)."""
+    global _vad
+    if _vad is None:
+        _vad = silero.VAD.load()
+    return _vad
@@ -0,0 +1,88 @@
+"""
+Process-wide pooled HTTP client for Buddy's tools.
+
+Tools call get_http_client() instead of opening their own httpx.AsyncClient,
+so DNS, TCP and TLS setup to upstream APIs is paid once per worker process
+and connections are kept alive across sessions.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger("http")
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("BUDDY_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("BUDDY_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("BUDDY_HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("BUDDY_HTTP_TIMEOUT", "10"))
+# HTTP/2 needs the optional `h2` package (httpx[http2]); falls back to HTTP/1.1.
+HTTP2_ENABLED = os.getenv("BUDDY_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# An AsyncClient's pool is bound to the loop that first uses it, so clients are
+# kept per loop. With the default process executor that's one per worker process.
+_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+# Created in prewarm before any loop is running; adopted by the first loop to ask.
+_unbound_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    http2 = HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+    if HTTP2_ENABLED and not http2:
+        logger.info("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def init_http_client() -> httpx.AsyncClient:
+    """
+    Create the shared client ahead of the first request (call from prewarm).
+    Connections are still opened lazily, on the first request.
+    """
+    global _unbound_client
+    if _unbound_client is None:
+        _unbound_client = _create_client()
+        logger.info(
+            f"🌐 HTTP client ready (max {HTTP_MAX_CONNECTIONS} connections, "
+            f"{HTTP_MAX_KEEPALIVE} keep-alive)"
+        )
+    return _unbound_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared client for the running event loop, creating it if needed."""
+    global _unbound_client
+    loop = asyncio.get_running_loop()
+
+    # Forget clients whose loop has gone away
+    for stale_loop in [lp for lp in _clients if lp.is_closed()]:
+        del _clients[stale_loop]
+
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        if _unbound_client is not None and not _unbound_client.is_closed:
+            client, _unbound_client = _unbound_client, None
+        else:
+            client = _create_client()
+        _clients[loop] = client
+    return client
+
+
+async def aclose_http_client() -> None:
+    """Close the running loop's shared client (call on shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("🌐 HTTP client closed")
@@ -0,0 +1,240 @@
+"""
+Registry of Buddy's knowledge bases, one per city or persona.
+
+Each session picks its knowledge base from the room metadata
+({"knowledge_base": "oakland"}). The registry opens a knowledge base on first
+use, shares it across every session in the process, and evicts the least
+recently used ones that no session holds once their combined size passes a
+memory cap, so worker RSS stays bounded however many knowledge bases exist.
+The query embedder is shared by all of them.
+
+Layout:
+    chroma_db/                          the "default" knowledge base
+    knowledge_bases/<id>/chroma_db/     every other one
+    knowledge_bases/<id>/data/          its source documents
+
+Build one with: python scripts/setup_vector_store.py --kb=<id>
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from buddy.embedding_service import get_embedding_function
+from buddy.rag import BuddyRAG
+
+logger = logging.getLogger("rag")
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_KB = "default"
+KB_ROOT = Path(os.getenv("BUDDY_KB_ROOT", str(PROJECT_ROOT / "knowledge_bases")))
+# Budget for open knowledge bases, estimated from their size on disk
+KB_MEMORY_CAP_MB = float(os.getenv("BUDDY_KB_MEMORY_CAP_MB", "512"))
+# Knowledge bases opened in prewarm, most used first
+KB_PRELOAD = [kb for kb in os.getenv("BUDDY_KB_PRELOAD", DEFAULT_KB).split(",") if kb.strip()]
+# Room metadata key naming the session's knowledge base
+KB_METADATA_KEY = "knowledge_base"
+RAG_TOP_K = 3
+
+_KB_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+def knowledge_base_path(kb_id: str) -> Path:
+    """Vector store directory for a knowledge base ID."""
+    if not _KB_ID.match(kb_id):
+        raise ValueError(f"Invalid knowledge base ID: {kb_id!r}")
+    if kb_id == DEFAULT_KB:
+        return PROJECT_ROOT / "chroma_db"
+    return KB_ROOT / kb_id / "chroma_db"
+
+
+def knowledge_base_for_room(metadata: str) -> str:
+    """The knowledge base ID named in room metadata, or the default one."""
+    if not metadata:
+        return DEFAULT_KB
+    try:
+        kb_id = json.loads(metadata).get(KB_METADATA_KEY)
+    except (ValueError, AttributeError):
+        logger.warning("Room metadata isn't a JSON object, using the default knowledge base")
+        return DEFAULT_KB
+    if not isinstance(kb_id, str) or not _KB_ID.match(kb_id):
+        if kb_id is not None:
+            logger.warning(f"Invalid knowledge base {kb_id!r} in room metadata, using the default")
+        return DEFAULT_KB
+    return kb_id
+
+
+def footprint_bytes(path: Path) -> int:
+    """
+    Size on disk of a knowledge base, as a proxy for its memory: Chroma loads
+    the HNSW index and the NumPy backend maps the embedding matrix.
+    """
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+@dataclass
+class RegistryStats:
+    opens: int = 0
+    hits: int = 0
+    evictions: int = 0
+    open_failures: int = 0
+    # Times the cap was exceeded because every open knowledge base was in use
+    over_cap: int = 0
+
+
+@dataclass
+class _Entry:
+    rag: BuddyRAG
+    size_bytes: int
+    sessions: int = 0
+
+
+class KnowledgeBaseRegistry:
+    """Process-wide, thread-safe cache of open knowledge bases."""
+
+    def __init__(
+        self,
+        memory_cap_mb: float = KB_MEMORY_CAP_MB,
+        top_k: int = RAG_TOP_K,
+    ):
+        self.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+        self.top_k = top_k
+        self.stats = RegistryStats()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per knowledge base, so concurrent first uses open it once
+        self._open_locks: dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def get(self, kb_id: str = DEFAULT_KB) -> BuddyRAG:
+        """Open (or reuse) a knowledge base without holding it open."""
+        return self._open(kb_id, hold=False).rag
+
+    def acquire(self, kb_id: str) -> BuddyRAG:
+        """Open (or reuse) a knowledge base and hold it until release()."""
+        return self._open(kb_id, hold=True).rag
+
+    async def aacquire(self, kb_id: str) -> BuddyRAG:
+        """acquire() off the event loop; opening a collection takes a while."""
+        return await asyncio.to_thread(self.acquire, kb_id)
+
+    def release(self, kb_id: str) -> None:
+        """A session is done with a knowledge base; it may now be evicted."""
+        with self._lock:
+            entry = self._entries.get(kb_id)
+            if entry is not None and entry.sessions > 0:
+                entry.sessions -= 1
+            self._evict_over_cap()
+
+    def preload(self, kb_ids: list[str]) -> None:
+        """Open the given knowledge bases (hottest first) until the cap is reached."""
+        for kb_id in kb_ids:
+            kb_id = kb_id.strip()
+            if self._entries and self.size_bytes >= self.memory_cap_bytes:
+                break
+            try:
+                self.get(kb_id)
+                logger.info(f"✅ Knowledge base '{kb_id}' preloaded")
+            except Exception as e:
+                logger.error(f"❌ Failed to preload knowledge base '{kb_id}': {e}")
+
+    def _open(self, kb_id: str, hold: bool) -> _Entry:
+        entry = self._lookup(kb_id, hold)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            open_lock = self._open_locks.setdefault(kb_id, threading.Lock())
+        with open_lock:
+            # Someone else may have opened it while we waited
+            entry = self._lookup(kb_id, hold)
+            if entry is not None:
+                return entry
+
+            path = knowledge_base_path(kb_id)
+            if not path.exists():
+                self.stats.open_failures += 1
+                raise FileNotFoundError(
+                    f"Knowledge base '{kb_id}' not found at {path} "
+                    f"(run 'python scripts/setup_vector_store.py --kb={kb_id}')"
+                )
+            try:
+                rag = BuddyRAG(
+                    chroma_path=str(path),
+                    top_k=self.top_k,
+                    # One query embedder for every knowledge base instead of one each
+                    embedding_function=get_embedding_function(),
+                )
+            except Exception:
+                self.stats.open_failures += 1
+                raise
+
+            entry = _Entry(rag=rag, size_bytes=footprint_bytes(path))
+            with self._lock:
+                self.stats.opens += 1
+                if hold:
+                    entry.sessions += 1
+                self._entries[kb_id] = entry
+                self._evict_over_cap()
+            logger.info(
+                f"📚 Opened knowledge base '{kb_id}' (~{entry.size_bytes / 1e6:.1f} MB, "
+                f"{len(self._entries)} open, ~{self.size_bytes / 1e6:.1f} MB total)"
+            )
+            return entry
+
+    def _lookup(self, kb_id: str, hold: bool) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(kb_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(kb_id)
+            if hold:
+                entry.sessions += 1
+            self.stats.hits += 1
+            return entry
+
+    def _evict_over_cap(self) -> None:
+        # Called with self._lock held. Oldest first; the newest entry always stays
+        while self.size_bytes > self.memory_cap_bytes and len(self._entries) > 1:
+            idle = [kb_id for kb_id, entry in list(self._entries.items())[:-1] if entry.sessions == 0]
+            if not idle:
+                self.stats.over_cap += 1
+                logger.warning(
+                    f"Knowledge bases use ~{self.size_bytes / 1e6:.1f} MB, over the "
+                    f"{self.memory_cap_bytes / 1e6:.0f} MB cap, but all are in use"
+                )
+                return
+            kb_id = idle[0]
+            entry = self._entries.pop(kb_id)
+            entry.rag.close()
+            self.stats.evictions += 1
+            logger.info(f"♻️ Evicted knowledge base '{kb_id}' (~{entry.size_bytes / 1e6:.1f} MB)")
+
+
+_registry: Optional[KnowledgeBaseRegistry] = None
+
+
+def get_registry() -> KnowledgeBaseRegistry:
+    """The process-wide knowledge base registry."""
+    global _registry
+    if _registry is None:
+        _registry = KnowledgeBaseRegistry()
+    return _registry
+
+
+def get_rag(kb_id: str = DEFAULT_KB) -> BuddyRAG:
+    """Shortcut for scripts: a knowledge base from the process-wide registry."""
+    return get_registry().get(kb_id)
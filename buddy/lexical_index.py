@@ -0,0 +1,182 @@
+"""
+BM25 inverted index over Buddy's knowledge-base chunks.
+
+Dense embeddings are weakest at exactly the queries voice users ask most:
+named places and things ("Dolores Park", "Outside Lands", "Buddy's favorite
+treat"). A lexical index catches those, costs microseconds per query and needs
+no embedding, so BuddyRAG uses it two ways:
+
+- fused with the vector results by reciprocal rank fusion (RRF), and
+- as a fast path that skips the embedding entirely when the best lexical hit
+  covers nearly all of the query's informative terms, and the query has
+  enough of them to single a chunk out.
+
+The index is built at ingestion time by scripts/setup_vector_store.py and
+stored next to the vector store as JSON.
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+logger = logging.getLogger("rag")
+
+BM25_INDEX_FILE = "bm25_index.json"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+# Function words plus the conversational filler voice queries are wrapped in
+# ("tell me about...", "what does Buddy think of..."), which says nothing about
+# which chunk answers them
+STOPWORDS = frozenset({
+    "a", "about", "all", "also", "am", "an", "and", "any", "are", "as", "at", "be",
+    "been", "but", "by", "can", "could", "did", "do", "does", "for", "from", "had",
+    "has", "have", "he", "her", "his", "how", "i", "if", "in", "into", "is", "it",
+    "its", "just", "know", "like", "me", "my", "of", "on", "or", "our", "so", "some",
+    "tell", "that", "the", "their", "them", "then", "there", "they", "think", "this",
+    "to", "up", "us", "was", "we", "were", "what", "when", "where", "which", "who",
+    "why", "will", "with", "would", "you", "your",
+})
+
+
+def _stem(token: str) -> str:
+    """Strip possessives and fold simple plurals ("trucks" -> "truck")."""
+    if "'" in token:
+        token = token.split("'", 1)[0]
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, stemmed terms with stopwords removed."""
+    terms = (_stem(token) for token in _TOKEN.findall(text.lower()))
+    return [term for term in terms if term and term not in STOPWORDS]
+
+
+@dataclass
+class LexicalHit:
+    """One chunk matched by a lexical search."""
+
+    position: int
+    score: float
+    # IDF-weighted share of the query's terms this chunk contains, in [0, 1]
+    coverage: float
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of chunks, with the chunk IDs, texts and
+    metadata kept alongside so hits can be returned without the vector store.
+    """
+
+    def __init__(
+        self,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict[str, Any]],
+        postings: dict[str, list[list[int]]],
+        doc_lengths: list[int],
+    ):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        # Term -> [[position, term frequency], ...]
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self._total_length = sum(doc_lengths)
+        self.avg_doc_length = self._total_length / len(doc_lengths) if doc_lengths else 0.0
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[dict[str, Any]],
+    ) -> "BM25Index":
+        index = cls([], [], [], {}, [])
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            index.add(chunk_id, document, metadata)
+        return index
+
+    def add(self, chunk_id: str, document: str, metadata: Optional[dict[str, Any]]) -> None:
+        """Index one more chunk, so the index can be built from a stream of pages."""
+        position = len(self.ids)
+        terms = tokenize(document)
+        for term, frequency in Counter(terms).items():
+            self.postings.setdefault(term, []).append([position, frequency])
+        self.ids.append(chunk_id)
+        self.documents.append(document)
+        self.metadatas.append(metadata or {})
+        self.doc_lengths.append(len(terms))
+        self._total_length += len(terms)
+        self.avg_doc_length = self._total_length / len(self.doc_lengths)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["documents"], data["metadatas"], data["postings"], data["doc_lengths"])
+
+    def save(self, path: Path) -> None:
+        """Write the index, renaming into place so readers never see half a file."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": self.ids,
+                    "documents": self.documents,
+                    "metadatas": self.metadatas,
+                    "postings": self.postings,
+                    "doc_lengths": self.doc_lengths,
+                },
+                f,
+            )
+        tmp.replace(path)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def idf(self, term: str) -> float:
+        # Terms the corpus doesn't contain weigh the most, so a query about
+        # something we know nothing about never looks like a confident match
+        df = len(self.postings.get(term, ()))
+        n = len(self.ids)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def query_weight(self, query: str) -> float:
+        """Total IDF of the query's distinct terms: how much it says about which chunk answers it."""
+        return sum(self.idf(term) for term in set(tokenize(query)))
+
+    def search(self, query: str, k: int) -> list[LexicalHit]:
+        """Top k chunks by BM25 score, best first."""
+        terms = set(tokenize(query))
+        if not terms or not self.ids:
+            return []
+
+        weights = {term: self.idf(term) for term in terms}
+        total_weight = sum(weights.values())
+        scores: dict[int, float] = {}
+        matched: dict[int, float] = {}
+        for term, weight in weights.items():
+            for position, frequency in self.postings.get(term, ()):
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[position] / self.avg_doc_length
+                scores[position] = scores.get(position, 0.0) + weight * (
+                    frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                )
+                matched[position] = matched.get(position, 0.0) + weight
+
+        best = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+        return [
+            LexicalHit(position=p, score=scores[p], coverage=matched[p] / total_weight)
+            for p in best
+        ]
@@ -0,0 +1,293 @@
+"""
+Deadline-aware Linkup search: hedged requests, retries and a circuit breaker.
+
+A single request with a flat 10s timeout turns a slow Linkup response into
+long dead air, and while Linkup is down every session waits out the full
+timeout. LinkupClient instead gives each search BUDDY_LINKUP_DEADLINE seconds
+from the moment it starts and, within that:
+
+- hedges: if the first request hasn't answered by the p95 of recent Linkup
+  latencies, it sends a second one and takes whichever answers first. Hedges
+  draw on a budget (BUDDY_LINKUP_HEDGE_BUDGET extra requests per search), so a
+  slow spell doesn't double API spend
+- retries timeouts, connection errors, 429s and 5xxs with jittered
+  exponential backoff, as long as an attempt still fits before the deadline
+- trips a per-process circuit breaker after BUDDY_LINKUP_BREAKER_FAILURES
+  consecutive failed requests. While it's open, searches fail immediately
+  (the search cache and event store then serve whatever they have, however
+  old) and after BUDDY_LINKUP_BREAKER_COOLDOWN one probe search is let
+  through to see if Linkup is back
+
+Request latency, hedges, hedge wins, retries and the breaker state go to the
+telemetry registry (buddy/telemetry.py) for export.
+
+fetch_linkup() is the single request underneath. It doesn't need LiveKit, so
+scripts (refresh_event_store.py) can build their own LinkupClient on it.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from buddy.http_client import get_http_client
+from buddy.telemetry import LINKUP, latency
+
+logger = logging.getLogger("tools")
+
+# Overridable so load tests can point searches at a local mock
+LINKUP_URL = os.getenv("LINKUP_API_URL", "https://api.linkup.so/v1/search")
+# Time a search gets from start to answer, hedges and retries included
+LINKUP_DEADLINE = float(os.getenv("BUDDY_LINKUP_DEADLINE", "4.0"))
+LINKUP_HEDGE = os.getenv("BUDDY_LINKUP_HEDGE", "true").lower() in ("1", "true", "yes")
+# Hedge once a request is slower than this quantile of recent requests...
+LINKUP_HEDGE_QUANTILE = 0.95
+# ...once there are enough of them; until then after this long
+LINKUP_HEDGE_DELAY_MS = float(os.getenv("BUDDY_LINKUP_HEDGE_DELAY_MS", "1500"))
+LINKUP_HEDGE_MIN_SAMPLES = 20
+# Extra requests hedging may add per search on average (0.2 = at most ~20% more calls)
+LINKUP_HEDGE_BUDGET = float(os.getenv("BUDDY_LINKUP_HEDGE_BUDGET", "0.2"))
+# Unused hedge budget that can be saved up for a burst of slow requests
+LINKUP_HEDGE_BURST = 3.0
+LINKUP_RETRIES = int(os.getenv("BUDDY_LINKUP_RETRIES", "2"))
+LINKUP_BACKOFF_BASE = 0.2
+# Don't start an attempt with less time than this left before the deadline
+LINKUP_MIN_ATTEMPT = 0.5
+LINKUP_BREAKER_FAILURES = int(os.getenv("BUDDY_LINKUP_BREAKER_FAILURES", "5"))
+LINKUP_BREAKER_COOLDOWN = float(os.getenv("BUDDY_LINKUP_BREAKER_COOLDOWN", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LinkupUnavailable(Exception):
+    """Linkup can't answer in time: the breaker is open or the deadline ran out."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Failures worth retrying, and that count against Linkup's health."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+@dataclass
+class LinkupStats:
+    searches: int = 0
+    requests: int = 0
+    failures: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    hedges_skipped: int = 0
+    retries: int = 0
+    rejected: int = 0
+    deadline_exceeded: int = 0
+    breaker_trips: int = 0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedges if self.hedges else 0.0
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after a cooldown, one probe decides whether it closes."""
+
+    def __init__(self, failures: int = LINKUP_BREAKER_FAILURES, cooldown: float = LINKUP_BREAKER_COOLDOWN,
+                 probe_timeout: float = LINKUP_DEADLINE, on_trip: Optional[Callable[[], None]] = None):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self.on_trip = on_trip
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._set_state(CLOSED)
+
+    def allow(self) -> bool:
+        """Whether a new search may go to Linkup."""
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= self.cooldown:
+            self._set_state(HALF_OPEN)
+            self._probe_started_at = None
+        if self.state == HALF_OPEN:
+            # One probe at a time; a probe that never reported back (cancelled) expires
+            if self._probe_started_at is not None and now - self._probe_started_at < self.probe_timeout:
+                return False
+            self._probe_started_at = now
+            return True
+        return self.state == CLOSED
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info("✅ Linkup recovered, closing the circuit breaker")
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self._consecutive_failures >= self.failures):
+            logger.warning(
+                f"🔌 Linkup unhealthy ({self._consecutive_failures} failed requests in a row), "
+                f"failing fast for {self.cooldown:.0f}s"
+            )
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+            if self.on_trip is not None:
+                self.on_trip()
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        latency.set_gauge("linkup_breaker_open", 1.0 if state == OPEN else 0.0)
+
+
+async def fetch_linkup(search_query: str, timeout: float = 10.0) -> dict:
+    """Run a single Linkup search and return the parsed JSON response."""
+    api_key = os.getenv("LINKUP_API_KEY")
+    if not api_key:
+        raise LinkupUnavailable("missing LINKUP_API_KEY")
+
+    client = get_http_client()
+    response = await client.post(
+        LINKUP_URL,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "q": search_query,
+            "depth": "standard",
+            "outputType": "searchResults"
+        },
+        timeout=timeout,
+    )
+
+    response.raise_for_status()
+    return response.json()
+
+
+class LinkupClient:
+    """
+    Runs searches through fetch(query, timeout), one Linkup request per call,
+    with hedging, retries and a circuit breaker, all within one deadline.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, float], Awaitable[dict]],
+        deadline: float = LINKUP_DEADLINE,
+        hedge: bool = LINKUP_HEDGE,
+        hedge_budget: float = LINKUP_HEDGE_BUDGET,
+        retries: int = LINKUP_RETRIES,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.fetch = fetch
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_budget = hedge_budget
+        self.retries = retries
+        self.stats = LinkupStats()
+        self.breaker = breaker or CircuitBreaker(probe_timeout=deadline)
+        self.breaker.on_trip = lambda: self._count("breaker_trips")
+        # Start with one hedge available so the first slow search can use it
+        self._hedge_tokens = 1.0
+
+    async def search(self, query: str) -> dict:
+        """
+        Linkup's response for a query. Raises LinkupUnavailable when the
+        breaker is open or the deadline runs out, otherwise the last error.
+        """
+        self._count("searches")
+        deadline = time.monotonic() + self.deadline
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise LinkupUnavailable("Linkup circuit breaker is open")
+        self._hedge_tokens = min(LINKUP_HEDGE_BURST, self._hedge_tokens + self.hedge_budget)
+
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(query, deadline)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                error = e
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count("deadline_exceeded")
+                raise LinkupUnavailable(f"no answer from Linkup within {self.deadline:.1f}s") from error
+            # Full jitter, so sessions that failed together don't retry together
+            backoff = random.uniform(0, LINKUP_BACKOFF_BASE * 2 ** attempt)
+            if attempt >= self.retries or self.breaker.state == OPEN or remaining - backoff < LINKUP_MIN_ATTEMPT:
+                raise error
+            attempt += 1
+            self._count("retries")
+            logger.info(f"🔁 Retrying Linkup search in {backoff * 1000:.0f}ms after: {error!r}")
+            await asyncio.sleep(backoff)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on a request before hedging it."""
+        p95_ms, samples = latency.quantile(LINKUP, LINKUP_HEDGE_QUANTILE)
+        if samples < LINKUP_HEDGE_MIN_SAMPLES:
+            return LINKUP_HEDGE_DELAY_MS / 1000
+        return p95_ms / 1000
+
+    async def _hedged(self, query: str, deadline: float) -> dict:
+        primary = asyncio.create_task(self._request(query, deadline))
+        pending = {primary}
+        hedge = None
+        try:
+            if self.hedge and self.breaker.state == CLOSED:
+                delay = min(self.hedge_delay(), deadline - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=max(0.0, delay))
+                if not done and deadline - time.monotonic() >= LINKUP_MIN_ATTEMPT:
+                    if self._hedge_tokens >= 1.0:
+                        self._hedge_tokens -= 1.0
+                        self._count("hedges")
+                        logger.info(f"🪁 Linkup slower than {delay * 1000:.0f}ms, hedging with a second request")
+                        hedge = asyncio.create_task(self._request(query, deadline))
+                        pending.add(hedge)
+                    else:
+                        self._count("hedges_skipped")
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The losing request isn't needed any more
+            for task in pending:
+                task.cancel()
+
+    async def _request(self, query: str, deadline: float) -> dict:
+        started = time.monotonic()
+        self._count("requests")
+        try:
+            data = await self.fetch(query, max(0.0, deadline - started))
+        except asyncio.CancelledError:
+            # Lost the hedge race; says nothing about Linkup's health
+            raise
+        except Exception as e:
+            if is_transient(e):
+                self._count("failures")
+                self.breaker.record_failure()
+            raise
+        latency.observe(LINKUP, (time.monotonic() - started) * 1000)
+        self.breaker.record_success()
+        return data
+
+    def _count(self, name: str) -> None:
+        setattr(self.stats, name, getattr(self.stats, name) + 1)
+        latency.increment(f"linkup_{name}")
@@ -0,0 +1,243 @@
+"""
+Load reporting for LiveKit dispatch.
+
+The default load function only looks at CPU, so a worker whose event loops are
+lagging or whose tool calls are piling up keeps getting new rooms. Here the
+worker's load is the most saturated of four signals, each scaled so 1.0 means
+"at capacity":
+
+- active sessions / BUDDY_LOAD_MAX_SESSIONS
+- CPU of the host or container (VAD and turn detection run in job processes)
+- worst event-loop lag across job processes / BUDDY_LOAD_MAX_LAG_MS
+- in-flight tool calls across job processes / BUDDY_LOAD_MAX_TOOL_CALLS
+
+and is averaged over BUDDY_LOAD_WINDOW seconds so one slow tick doesn't flap
+the worker between available and full. Above BUDDY_LOAD_THRESHOLD the worker
+stops taking new jobs.
+
+Sessions run in separate job processes, so each one publishes its loop lag and
+tool calls to a small JSON file in a state directory the worker process reads.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from livekit.agents import Worker
+
+logger = logging.getLogger("load")
+
+LOAD_THRESHOLD = float(os.getenv("BUDDY_LOAD_THRESHOLD", "0.75"))
+LOAD_WINDOW = float(os.getenv("BUDDY_LOAD_WINDOW", "5"))
+LOAD_MAX_SESSIONS = int(os.getenv("BUDDY_LOAD_MAX_SESSIONS", "10"))
+LOAD_MAX_LAG_MS = float(os.getenv("BUDDY_LOAD_MAX_LAG_MS", "50"))
+LOAD_MAX_TOOL_CALLS = int(os.getenv("BUDDY_LOAD_MAX_TOOL_CALLS", "20"))
+# How often job processes publish, and how the worker samples (its load_fnc runs every 0.5s)
+LOAD_SAMPLE_INTERVAL = 0.5
+# Job reports older than this belong to a process that hung or died
+LOAD_REPORT_STALE_AFTER = 3.0
+
+# Set by the worker process at startup; job processes inherit it
+LOAD_STATE_DIR_ENV = "BUDDY_LOAD_STATE_DIR"
+
+
+@dataclass
+class LoadSnapshot:
+    """One sample of the load signals, each scaled to 0-1 at capacity."""
+
+    sessions: float = 0.0
+    cpu: float = 0.0
+    loop_lag: float = 0.0
+    tool_calls: float = 0.0
+
+    @property
+    def load(self) -> float:
+        # Any one saturated resource is enough to hurt every session on the worker
+        return min(1.0, max(self.sessions, self.cpu, self.loop_lag, self.tool_calls))
+
+
+def init_state_dir() -> Path:
+    """Create the directory job processes report into (worker process, before run_app)."""
+    path = os.getenv(LOAD_STATE_DIR_ENV)
+    if not path:
+        path = tempfile.mkdtemp(prefix="buddy-load-")
+        os.environ[LOAD_STATE_DIR_ENV] = path
+    Path(path).mkdir(parents=True, exist_ok=True)
+    return Path(path)
+
+
+def _state_dir() -> Optional[Path]:
+    path = os.getenv(LOAD_STATE_DIR_ENV)
+    return Path(path) if path else None
+
+
+_tool_calls_in_flight = 0
+
+
+@contextmanager
+def track_tool_call() -> Iterator[None]:
+    """Count a tool call as in flight for as long as the block runs."""
+    global _tool_calls_in_flight
+    _tool_calls_in_flight += 1
+    try:
+        yield
+    finally:
+        _tool_calls_in_flight -= 1
+
+
+class JobLoadReporter:
+    """
+    Runs in a job process: publishes event-loop lag with the in-flight tool
+    call count for the worker's load function.
+
+    Lag comes from the event-loop watchdog's heartbeat (buddy/watchdog.py)
+    through record_lag(), so a process runs one sampler. With the watchdog
+    off, the reporter's own publish tick is the sample.
+    """
+
+    def __init__(self, interval: float = LOAD_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.path: Optional[Path] = None
+        state_dir = _state_dir()
+        if state_dir is not None:
+            self.path = state_dir / f"{os.getpid()}.json"
+        # Lag samples over the smoothing window; the worker sees the worst one
+        self._lag_ms: deque[float] = deque(maxlen=max(1, int(LOAD_WINDOW / interval)))
+        # Worst lag fed in since the last publish, None if nothing was fed
+        self._fed_lag_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.path is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    def record_lag(self, lag_ms: float) -> None:
+        """Take a loop lag sample from another sampler (the watchdog's heartbeat)."""
+        self._fed_lag_ms = max(self._fed_lag_ms or 0.0, lag_ms)
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms, self._fed_lag_ms = self._fed_lag_ms, None
+            if lag_ms is None:
+                lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self._lag_ms.append(lag_ms)
+            self._publish()
+
+    def _publish(self) -> None:
+        report = {
+            "updated_at": time.time(),
+            "loop_lag_ms": max(self._lag_ms, default=0.0),
+            "tool_calls": _tool_calls_in_flight,
+        }
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(report))
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.debug(f"Couldn't publish load report: {e}")
+
+
+class WorkerLoad:
+    """The worker's load function: samples every signal and smooths the result."""
+
+    def __init__(
+        self,
+        max_sessions: int = LOAD_MAX_SESSIONS,
+        max_lag_ms: float = LOAD_MAX_LAG_MS,
+        max_tool_calls: int = LOAD_MAX_TOOL_CALLS,
+        window: float = LOAD_WINDOW,
+    ):
+        # Imported here so buddy.linkup (and the scripts using it) don't load livekit.agents
+        from livekit.agents import utils
+
+        self.max_sessions = max_sessions
+        self.max_lag_ms = max_lag_ms
+        self.max_tool_calls = max_tool_calls
+        self.last = LoadSnapshot()
+        self._avg = utils.MovingAverage(max(1, int(window / LOAD_SAMPLE_INTERVAL)))
+        self._full = False
+        self._cpu = 0.0
+        self._cpu_monitor = utils.hw.get_cpu_monitor()
+        # cpu_percent() blocks for its interval, so it gets its own thread
+        self._cpu_thread = threading.Thread(target=self._sample_cpu, daemon=True, name="buddy_cpu_load")
+        self._cpu_thread.start()
+
+    def __call__(self, worker: "Worker") -> float:
+        lag_ms, tool_calls = self._read_job_reports()
+        self.last = LoadSnapshot(
+            sessions=len(worker.active_jobs) / self.max_sessions,
+            cpu=self._cpu,
+            loop_lag=min(1.0, lag_ms / self.max_lag_ms),
+            tool_calls=min(1.0, tool_calls / self.max_tool_calls),
+        )
+        self._avg.add_sample(self.last.load)
+        load = self._avg.get_avg()
+
+        full = load >= LOAD_THRESHOLD
+        if full != self._full:
+            self._full = full
+            state = "full, not taking new jobs" if full else "available again"
+            logger.info(f"⚖️ Worker {state} (load {load:.2f}: {asdict(self.last)})")
+        return load
+
+    def _sample_cpu(self) -> None:
+        while True:
+            self._cpu = self._cpu_monitor.cpu_percent(interval=LOAD_SAMPLE_INTERVAL)
+
+    def _read_job_reports(self) -> tuple[float, int]:
+        state_dir = _state_dir()
+        if state_dir is None or not state_dir.exists():
+            return 0.0, 0
+        lag_ms, tool_calls = 0.0, 0
+        now = time.time()
+        for path in state_dir.glob("*.json"):
+            try:
+                report = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if now - report.get("updated_at", 0) > LOAD_REPORT_STALE_AFTER:
+                if path.stem.isdigit() and not pid_alive(int(path.stem)):
+                    # The job process exited; its report no longer counts
+                    path.unlink(missing_ok=True)
+                    continue
+                # Alive but not reporting: its event loop is blocked
+                lag_ms = max(lag_ms, self.max_lag_ms)
+                continue
+            lag_ms = max(lag_ms, report.get("loop_lag_ms", 0.0))
+            tool_calls += report.get("tool_calls", 0)
+        return lag_ms, tool_calls
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process exists (job processes name their state files by pid)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_job_reporter: Optional[JobLoadReporter] = None
+
+
+def start_job_reporter() -> JobLoadReporter:
+    """Start publishing this job process's load (idempotent; call from the entrypoint)."""
+    global _job_reporter
+    if _job_reporter is None:
+        _job_reporter = JobLoadReporter()
+    _job_reporter.start()
+    return _job_reporter
@@ -1,4 +1,8 @@
+import asyncio
 import logging
+import os
+import time
+from typing import TYPE_CHECKING, Optional
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -7,33 +11,75 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    ModelSettings,
     RoomInputOptions,
     WorkerOptions,
     cli,
     inference,
+    llm,
     metrics,
     ChatContext,
     ChatMessage,
+    UserInputTranscribedEvent,
 )
-from livekit.plugins import silero
 from livekit.plugins import openai
 from livekit.plugins import elevenlabs
 from livekit.plugins import assemblyai
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
-from buddy.tools import find_nearby_events
+from buddy.context_compaction import RAG_CONTEXT_PREFIX, ContextCompactor
+from buddy.fast_start import get_vad, preload_modules, preload_stats, register_fast_start
+from buddy.http_client import aclose_http_client, init_http_client
+from buddy.phrase_cache import init_phrase_cache
+from buddy.tools import find_nearby_events, linkup, prefetch_event_search
 from buddy.prompts import buddy_instructions_prompt
 
-from buddy.rag import get_rag
+from buddy.load import LOAD_THRESHOLD, WorkerLoad, init_state_dir, start_job_reporter
+from buddy.rag_ledger import RetrievalLedger
+from buddy.router import EVENTS, KNOWLEDGE, TurnRouter
+from buddy.telemetry import TurnTracker, record_span, start_exporter
+from buddy.watchdog import start_watchdog
+
+if TYPE_CHECKING:
+    from buddy.rag import BuddyRAG
 
 logger = logging.getLogger("agent")
 
 load_dotenv()
 
+# RAG needs a built chroma_db (scripts/setup_vector_store.py), so it's opt-in.
+RAG_ENABLED = os.getenv("BUDDY_RAG_ENABLED", "false").lower() in ("1", "true", "yes")
+# Max time a turn will wait on retrieval before replying without context.
+RAG_TURN_BUDGET = float(os.getenv("BUDDY_RAG_TURN_BUDGET", "0.3"))
+# Start retrievals from interim transcripts while the user is still talking.
+RAG_SPECULATIVE = os.getenv("BUDDY_RAG_SPECULATIVE", "true").lower() in ("1", "true", "yes")
+# Route turns locally: skip RAG on small talk, start event searches early.
+# Off by default: it gets half of the held-out turns right (scripts/benchmark_router.py)
+TURN_ROUTER_ENABLED = os.getenv("BUDDY_TURN_ROUTER", "false").lower() in ("1", "true", "yes")
+# Buddy's voice; cached phrase audio is keyed by these
+TTS_VOICE_ID = os.getenv("BUDDY_TTS_VOICE_ID", "ODq5zmih8GrVes37Dizd")
+TTS_MODEL = os.getenv("BUDDY_TTS_MODEL", "eleven_multilingual_v2")
+# Imported on first use (chromadb and the embedding model come with them), so
+# the worker process and RAG-less deployments never load them
+RAG_MODULES = ("buddy.kb_registry", "buddy.speculative")
+
 
 class Assistant(Agent):
-    def __init__(self) -> None:
-        # Initialize RAG
-        # self.rag = get_rag(top_k=3)
+    def __init__(self, rag: Optional["BuddyRAG"] = None) -> None:
+        # RAG is optional - without it Buddy runs on personality alone
+        self.rag = rag
+        self.speculator = None
+        if rag is not None and RAG_SPECULATIVE:
+            from buddy.speculative import SpeculativeRetriever
+
+            self.speculator = SpeculativeRetriever(rag)
+        # Chunks already injected this session, so repeats aren't re-sent
+        self.ledger = RetrievalLedger()
+        # Final transcript segments of the turn in progress
+        self._turn_segments: list[str] = []
+        # Keeps the prompt bounded as conversations get long
+        self.compactor = ContextCompactor(persona=buddy_instructions_prompt)
+        # Decides per turn whether RAG or the event search is worth starting
+        self.router = TurnRouter() if TURN_ROUTER_ENABLED else None
         
         # Buddy's personality and instructions
         super().__init__(
@@ -41,43 +87,143 @@ class Assistant(Agent):
             # tools=[find_nearby_events]
         )
     
-#     async def on_user_turn_completed(
-#         self, turn_ctx: ChatContext, new_message: ChatMessage
-#     ) -> None:
-#         """
-#         Called after user finishes speaking, before agent generates reply.
-#         This is where we inject RAG context for the LLM.
-#         """
-#         # Get the user's message text
-#         user_text = new_message.text_content
+    async def on_enter(self) -> None:
+        if self.speculator is not None:
+            self.session.on("user_input_transcribed", self._on_user_input_transcribed)
+    
+    async def on_exit(self) -> None:
+        if self.speculator is not None:
+            self.session.off("user_input_transcribed", self._on_user_input_transcribed)
+            self.speculator.close()
+        self.compactor.close()
+    
+    async def llm_node(
+        self,
+        chat_ctx: ChatContext,
+        tools: list[llm.FunctionTool | llm.RawFunctionTool],
+        model_settings: ModelSettings,
+    ):
+        # Every generation (including tool follow-ups) sees the compacted context;
+        # older turns are summarized in the background by the same LLM
+        summarizer = self.session.llm if isinstance(self.session.llm, llm.LLM) else None
+        chat_ctx = self.compactor.compact(chat_ctx, summarizer=summarizer)
+        async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
+            yield chunk
+    
+    def _on_user_input_transcribed(self, ev: UserInputTranscribedEvent) -> None:
+        # A turn can span several final segments; speculate on the whole thing
+        if ev.is_final:
+            self._turn_segments.append(ev.transcript)
+            partial = " ".join(self._turn_segments)
+        else:
+            partial = " ".join([*self._turn_segments, ev.transcript])
+        self.speculator.on_interim(partial)
+    
+    async def on_user_turn_completed(
+        self, turn_ctx: ChatContext, new_message: ChatMessage
+    ) -> None:
+        """
+        Called after user finishes speaking, before agent generates reply.
+        This is where we inject RAG context for the LLM.
+        """
+        # Get the user's message text
+        user_text = new_message.text_content
+        self._turn_segments.clear()
+        
+        if not user_text:
+            if self.speculator is not None:
+                self.speculator.reset()
+            self.ledger.skip_turn()
+            return
         
-#         if not user_text:
-#             return
+        # Small talk needs no retrieval; event questions start their search now,
+        # alongside the LLM, rather than after it asks for one
+        route = KNOWLEDGE
+        if self.router is not None:
+            decision = self.router.classify(user_text)
+            route = decision.route
+            logger.info(f"🧭 Turn routed as {route} ({decision.elapsed_us:.0f}µs): {user_text[:50]}")
+        # Only with the tool registered; nothing would claim the search otherwise
+        if route == EVENTS and find_nearby_events in self.tools:
+            prefetch_event_search(self.session, user_text)
+        if self.rag is None or route != KNOWLEDGE:
+            # Nothing will retrieve for this turn; drop its prefetch so a later
+            # turn can't reuse it
+            if self.speculator is not None:
+                self.speculator.reset()
+            self.ledger.skip_turn()
+            return
         
-#         # Retrieve relevant context from RAG
-#         rag_context = self.rag.retrieve(user_text)
+        # Retrieve relevant context off the event loop, within the turn budget,
+        # reusing the speculative prefetch when it matches the final transcript
+        started = time.perf_counter()
+        if self.speculator is not None:
+            chunks = await self.speculator.retrieve(user_text, timeout=RAG_TURN_BUDGET)
+        else:
+            chunks = await self.rag.aretrieve_chunks(user_text, timeout=RAG_TURN_BUDGET)
+        record_span("rag", time.perf_counter() - started)
         
-#         if rag_context:
-#             # Add context as a system message that won't be persisted
-#             turn_ctx.add_message(
-#                 role="assistant",
-#                 content=f"""Relevant information from your memory:
+        # Chunks already in the saved chat context go out as short references
+        plan = self.ledger.plan(chunks)
+        rag_context = plan.render()
+        if rag_context:
+            # Add context as an assistant message rather than touching the system prompt
+            message = turn_ctx.add_message(
+                role="assistant",
+                content=f"""{RAG_CONTEXT_PREFIX}
+
+{rag_context}
+
+Use this information naturally in your response when relevant, but don't explicitly mention that you're referencing your memory."""
+            )
+            # turn_ctx is a copy made for this reply only; save the message to the
+            # agent's chat context too so later turns can refer back to it
+            # (compaction keeps it for BUDDY_CONTEXT_RAG_TTL_TURNS turns)
+            chat_ctx = self.chat_ctx.copy()
+            chat_ctx.insert(message)
+            await self.update_chat_ctx(chat_ctx)
+            self.ledger.mark_in_context(plan)
+            logger.info(
+                f"Added RAG context ({len(plan.new)} new, {len(plan.repeated)} repeated chunks) "
+                f"for user message: {user_text[:50]}..."
+            )
 
-# {rag_context}
 
-# Use this information naturally in your response when relevant, but don't explicitly mention that you're referencing your memory."""
-#             )
-#             logger.info(f"Added RAG context for user message: {user_text[:50]}...")
+def prewarm_shared():
+    """
+    Load what job processes can share across fork. With fast start the
+    forkserver runs this once and forks every job process with it in memory;
+    otherwise prewarm runs it in each process.
+    """
+    if RAG_ENABLED:
+        preload_modules(RAG_MODULES)
+    get_vad()
+    # Canned phrases synthesized earlier (scripts/build_phrase_cache.py)
+    init_phrase_cache(TTS_VOICE_ID, TTS_MODEL)
+
 
 def prewarm(proc: JobProcess):
     """Prewarm models and initialize RAG during worker startup."""
-    proc.userdata["vad"] = silero.VAD.load()
-    # Prewarm RAG as well
-    # try:
-    #     get_rag(top_k=3)
-    #     logger.info("✅ RAG prewarmed")
-    # except Exception as e:
-    #     logger.error(f"❌ Failed to prewarm RAG: {e}")
+    started = time.perf_counter()
+    preloaded = preload_stats()
+    # No-ops for whatever the forkserver already loaded
+    prewarm_shared()
+    proc.userdata["vad"] = get_vad()
+    # Shared connection pool for tool calls (connections open on first use)
+    init_http_client()
+    # Prewarm the most used knowledge bases as well (Chroma clients aren't fork-safe)
+    if RAG_ENABLED:
+        from buddy.kb_registry import KB_PRELOAD, get_registry
+
+        get_registry().preload(KB_PRELOAD)
+    if preloaded is not None and not preloaded.failed:
+        logger.info(
+            f"⚡ Prewarmed in {(time.perf_counter() - started) * 1000:.0f}ms, forked with "
+            f"{len(preloaded.modules_ms)} modules and the shared models already loaded "
+            f"({preloaded.total_ms:.0f}ms of loading done once in the forkserver)"
+        )
+    else:
+        logger.info(f"Prewarmed in {(time.perf_counter() - started) * 1000:.0f}ms")
 
 
 async def entrypoint(ctx: JobContext):
@@ -86,36 +232,101 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    # Event-loop lag and tool calls from this process feed the worker's load
+    reporter = start_job_reporter()
+    # Lag histograms, plus the stack of anything that blocks the loop, tagged with
+    # the room; its heartbeat is also the lag sample the load report publishes
+    watchdog = start_watchdog(ctx.log_context_fields, on_lag=reporter.record_lag)
+
     # Set up voice AI pipeline
     session = AgentSession(
         stt=assemblyai.STT(),
         llm=openai.LLM(model="gpt-4.1-nano-2025-04-14"),
         tts=elevenlabs.TTS(
-            voice_id="ODq5zmih8GrVes37Dizd",
-            model="eleven_multilingual_v2"
+            voice_id=TTS_VOICE_ID,
+            model=TTS_MODEL
         ),
         turn_detection=MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         preemptive_generation=False,
     )
 
+    # Phrases the build step didn't cache are synthesized once, in the background,
+    # unless another process has written them since this one loaded the cache
+    phrases = init_phrase_cache(TTS_VOICE_ID, TTS_MODEL)
+    if phrases.missing():
+        await asyncio.to_thread(phrases.reload_if_missing)
+    phrases.fill_in_background(session.tts)
+
+    # Knowledge bases are shared across sessions in this process; the room
+    # metadata picks this session's. Skip RAG if it failed to load
+    rag = None
+    if RAG_ENABLED:
+        from buddy.kb_registry import get_registry, knowledge_base_for_room
+
+        registry = get_registry()
+        kb_id = knowledge_base_for_room(ctx.job.room.metadata)
+        try:
+            rag = await registry.aacquire(kb_id)
+        except Exception as e:
+            logger.error(f"❌ RAG unavailable for knowledge base '{kb_id}', continuing without it: {e}")
+        else:
+            async def release_knowledge_base():
+                registry.release(kb_id)
+
+            ctx.add_shutdown_callback(release_knowledge_base)
+
     # Metrics collection
     usage_collector = metrics.UsageCollector()
+    turn_tracker = TurnTracker(room=ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        turn_tracker.on_metrics(ev.metrics)
+
+    assistant = Assistant(rag=rag)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        turn_tracker.close()
+        if rag is not None:
+            from buddy.embedding_service import get_embedding_function
+            from buddy.kb_registry import get_registry
+
+            logger.info(f"RAG stats: {rag.stats}")
+            if rag.cache is not None:
+                logger.info(f"RAG cache: {rag.cache.stats} (hit rate {rag.cache.stats.hit_rate:.0%})")
+            logger.info(f"RAG ledger: {assistant.ledger.stats}")
+            logger.info(f"Knowledge bases: {get_registry().stats} ({len(get_registry())} open)")
+            logger.info(f"Query embeddings: {get_embedding_function().stats}")
+        logger.info(f"Context compaction: {assistant.compactor.stats}")
+        if assistant.router is not None:
+            router = assistant.router.stats
+            logger.info(f"Turn router: {router.routes} (~{router.mean_us:.0f}µs per turn)")
+        logger.info(f"Phrase audio cache: {phrases.stats}")
+        if linkup.stats.searches:
+            logger.info(
+                f"Linkup: {linkup.stats} (hedge win rate {linkup.stats.hedge_win_rate:.0%}, "
+                f"breaker {linkup.breaker.state})"
+            )
+        if watchdog is not None:
+            logger.info(f"Event loop watchdog: {watchdog.stats}")
+        if assistant.speculator is not None:
+            spec = assistant.speculator.stats
+            logger.info(
+                f"Speculative RAG: {spec} (hit rate {spec.hit_rate:.0%}, "
+                f"~{spec.mean_saved_ms:.0f}ms saved per hit)"
+            )
 
     ctx.add_shutdown_callback(log_usage)
+    ctx.add_shutdown_callback(aclose_http_client)
 
     # Start the session
     await session.start(
-        agent=Assistant(),
+        agent=assistant,
         room=ctx.room,
         room_input_options=RoomInputOptions(),
     )
@@ -125,4 +336,15 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, initialize_process_timeout=60))
\ No newline at end of file
+    start_exporter()
+    init_state_dir()
+    # Job processes fork from a forkserver with buddy and its shared models preloaded
+    register_fast_start()
+    cli.run_app(WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        initialize_process_timeout=60,
+        # Stop taking rooms when sessions, CPU, loop lag or tool calls saturate
+        load_fnc=WorkerLoad(),
+        load_threshold=LOAD_THRESHOLD,
+    ))
\ No newline at end of file
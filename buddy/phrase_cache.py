@@ -0,0 +1,231 @@
+"""
+Pre-synthesized audio for Buddy's fixed phrases.
+
+Canned lines like the "let me sniff around" filler in find_nearby_events are
+the same every time, yet each one used to cost a full TTS round trip before
+the first sound. PhraseAudioCache synthesizes every variant once (with
+scripts/build_phrase_cache.py, or in the background on a worker's first
+session), keeps the PCM on disk as WAV files and in memory, and plays it
+straight into the session's audio output with no TTS call.
+
+Files are named by a hash of voice_id, model and text, so changing the voice
+config simply misses; files that no longer match any current phrase are
+evicted on load.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from livekit import rtc
+from livekit.agents import AgentSession, tts
+from livekit.agents.voice import SpeechHandle
+
+logger = logging.getLogger("phrases")
+
+PHRASE_CACHE_DIR = os.getenv(
+    "BUDDY_PHRASE_CACHE_DIR", str(Path(__file__).parent.parent / "phrase_audio")
+)
+# Length of the frames cached audio is played back in
+PHRASE_FRAME_MS = 50
+
+# Fixed lines Buddy speaks without the LLM; one variant is picked at random
+PHRASES: dict[str, tuple[str, ...]] = {
+    "search_filler": (
+        "Hang on, let me sniff around for the best options!",
+        "Ooh, give me a sec, my nose is on the case!",
+        "Hold that thought, I'm sniffing out some good stuff!",
+    ),
+}
+
+
+@dataclass
+class PhraseCacheStats:
+    """How often a phrase played from cache instead of going through TTS."""
+
+    hits: int = 0
+    misses: int = 0
+    synthesized: int = 0
+    evicted: int = 0
+
+
+@dataclass
+class _Clip:
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        samples_per_frame = self.sample_rate * PHRASE_FRAME_MS // 1000
+        frame_bytes = samples_per_frame * self.num_channels * 2
+        for offset in range(0, len(self.pcm), frame_bytes):
+            data = self.pcm[offset:offset + frame_bytes]
+            yield rtc.AudioFrame(
+                data=data,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(data) // (2 * self.num_channels),
+            )
+
+
+class PhraseAudioCache:
+    """Per-process cache of synthesized phrase audio for one voice config."""
+
+    def __init__(
+        self,
+        voice_id: str,
+        model: str,
+        cache_dir: str = PHRASE_CACHE_DIR,
+        phrases: dict[str, tuple[str, ...]] = PHRASES,
+    ):
+        self.voice_id = voice_id
+        self.model = model
+        self.cache_dir = Path(cache_dir)
+        self.phrases = phrases
+        self.stats = PhraseCacheStats()
+        self._clips: dict[str, _Clip] = {}
+        self._fill_task: Optional[asyncio.Task] = None
+
+    def clip_path(self, text: str) -> Path:
+        key = hashlib.sha1(f"{self.voice_id}|{self.model}|{text}".encode()).hexdigest()[:20]
+        return self.cache_dir / f"{key}.wav"
+
+    def texts(self) -> list[str]:
+        return [text for variants in self.phrases.values() for text in variants]
+
+    def missing(self) -> list[str]:
+        """Phrase variants that don't have audio yet."""
+        return [text for text in self.texts() if text not in self._clips]
+
+    def load(self) -> int:
+        """
+        Load every cached variant from disk, evicting files left over from an
+        old voice config or phrase list. Returns the number of clips loaded.
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        current = {self.clip_path(text): text for text in self.texts()}
+        for path in self.cache_dir.glob("*.wav"):
+            text = current.get(path)
+            if text is None:
+                path.unlink(missing_ok=True)
+                self.stats.evicted += 1
+                continue
+            self._read_clip(text, path)
+
+        if self.stats.evicted:
+            logger.info(f"🔄 Evicted {self.stats.evicted} cached phrases from an old voice config")
+        return len(self._clips)
+
+    def reload_if_missing(self) -> int:
+        """
+        Pick up variants another process synthesized since load(). With fast
+        start the cache is loaded once in the forkserver, so a job process
+        would otherwise re-synthesize phrases already on disk. Returns how
+        many were added.
+        """
+        added = 0
+        for text in self.missing():
+            path = self.clip_path(text)
+            if path.exists() and self._read_clip(text, path):
+                added += 1
+        if added:
+            logger.info(f"🔊 Loaded {added} phrases cached by other processes")
+        return added
+
+    async def synthesize_missing(self, tts_engine: tts.TTS) -> int:
+        """Synthesize and store every variant not cached yet. Returns how many were added."""
+        added = 0
+        for text in self.missing():
+            try:
+                frames = []
+                async with tts_engine.synthesize(text) as stream:
+                    async for audio in stream:
+                        frames.append(audio.frame)
+            except Exception as e:
+                logger.warning(f"Couldn't synthesize phrase '{text}': {e}")
+                continue
+            if not frames:
+                continue
+            combined = rtc.combine_audio_frames(frames)
+            clip = _Clip(
+                pcm=bytes(combined.data),
+                sample_rate=combined.sample_rate,
+                num_channels=combined.num_channels,
+            )
+            await asyncio.to_thread(self._write_clip, self.clip_path(text), clip)
+            self._clips[text] = clip
+            self.stats.synthesized += 1
+            added += 1
+        if added:
+            logger.info(f"🔊 Cached audio for {added} phrases in {self.cache_dir}")
+        return added
+
+    def fill_in_background(self, tts_engine: tts.TTS) -> None:
+        """Synthesize missing variants off the critical path, once per process."""
+        if not self.missing() or (self._fill_task is not None and not self._fill_task.done()):
+            return
+        self._fill_task = asyncio.create_task(self.synthesize_missing(tts_engine))
+
+    def say(self, session: AgentSession, phrase: str, **kwargs) -> SpeechHandle:
+        """
+        Speak a random variant of a fixed phrase, from cached audio when there
+        is some and through the session's TTS otherwise.
+        """
+        variants = self.phrases[phrase]
+        cached = [text for text in variants if text in self._clips]
+        if cached:
+            self.stats.hits += 1
+            text = random.choice(cached)
+            return session.say(text, audio=self._clips[text].frames(), **kwargs)
+        self.stats.misses += 1
+        return session.say(random.choice(variants), **kwargs)
+
+    def _read_clip(self, text: str, path: Path) -> bool:
+        try:
+            with wave.open(str(path), "rb") as f:
+                self._clips[text] = _Clip(
+                    pcm=f.readframes(f.getnframes()),
+                    sample_rate=f.getframerate(),
+                    num_channels=f.getnchannels(),
+                )
+        except (OSError, EOFError, wave.Error) as e:
+            logger.warning(f"Ignoring unreadable phrase audio {path.name}: {e}")
+            return False
+        return True
+
+    def _write_clip(self, path: Path, clip: _Clip) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so other worker processes never read half a file
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with wave.open(str(tmp), "wb") as f:
+            f.setnchannels(clip.num_channels)
+            f.setsampwidth(2)
+            f.setframerate(clip.sample_rate)
+            f.writeframes(clip.pcm)
+        os.replace(tmp, path)
+
+
+_phrase_cache: Optional[PhraseAudioCache] = None
+
+
+def init_phrase_cache(voice_id: str, model: str) -> PhraseAudioCache:
+    """Create the process-wide cache and load whatever is on disk (call from prewarm)."""
+    global _phrase_cache
+    if _phrase_cache is None or (_phrase_cache.voice_id, _phrase_cache.model) != (voice_id, model):
+        _phrase_cache = PhraseAudioCache(voice_id=voice_id, model=model)
+        loaded = _phrase_cache.load()
+        logger.info(f"🔊 Loaded {loaded}/{len(_phrase_cache.texts())} cached phrases")
+    return _phrase_cache
+
+
+def get_phrase_cache() -> Optional[PhraseAudioCache]:
+    """The process-wide cache, or None if init_phrase_cache() wasn't called."""
+    return _phrase_cache
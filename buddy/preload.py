@@ -0,0 +1,8 @@
+"""
+Imported by LiveKit's forkserver before it forks job processes (registered by
+buddy.fast_start). Don't import it anywhere else.
+"""
+
+from buddy.fast_start import preload
+
+preload()
@@ -1,30 +1,190 @@
 """
 RAG retrieval system for Buddy's knowledge base.
-Retrieves relevant context from ChromaDB to augment LLM responses.
+Retrieves relevant context from ChromaDB (or an exported NumPy index)
+to augment LLM responses.
 """
 
+import asyncio
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import chromadb
 
+from buddy.embedding_service import get_embedding_function
+from buddy.lexical_index import BM25_INDEX_FILE, BM25Index, LexicalHit
+from buddy.rag_cache import SemanticQueryCache
+from buddy.vector_index import EMBEDDINGS_FILE, NumpyVectorIndex
+
 logger = logging.getLogger("rag")
 
+# Retrievals run on a small dedicated pool so Chroma's embedding + query never
+# executes on the agent's event loop (audio, VAD and turn detection live there).
+RETRIEVAL_WORKERS = int(os.getenv("BUDDY_RAG_WORKERS", "2"))
+# Default per-call deadline for aretrieve(), in seconds.
+RETRIEVAL_TIMEOUT = float(os.getenv("BUDDY_RAG_TIMEOUT", "0.5"))
+
+# "chroma" queries the persistent collection; "numpy" uses the exported
+# memory-mapped index (python scripts/setup_vector_store.py --export-numpy).
+RAG_BACKEND = os.getenv("BUDDY_RAG_BACKEND", "chroma")
+NUMPY_INDEX_DIR = "numpy_index"
+COLLECTION_NAME = "buddy_knowledge"
+
+# Semantic query cache sizing; set BUDDY_RAG_CACHE_SIZE=0 to disable.
+CACHE_SIZE = int(os.getenv("BUDDY_RAG_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("BUDDY_RAG_CACHE_TTL", "600"))
+CACHE_SIMILARITY = float(os.getenv("BUDDY_RAG_CACHE_SIMILARITY", "0.92"))
+# Fuse BM25 (built by setup_vector_store.py) with vector results when available.
+RAG_HYBRID = os.getenv("BUDDY_RAG_HYBRID", "true").lower() in ("1", "true", "yes")
+# Skip the embedding when the top BM25 hit covers this share of the query's
+# IDF-weighted terms; set above 1 to always run the vector search.
+LEXICAL_CONFIDENCE = float(os.getenv("BUDDY_RAG_LEXICAL_CONFIDENCE", "0.8"))
+# ...as long as those terms are rare enough to single chunks out: one name
+# ("Crissy Field") clears this, "who is Buddy?" matches every chunk and doesn't...
+LEXICAL_MIN_WEIGHT = float(os.getenv("BUDDY_RAG_LEXICAL_MIN_WEIGHT", "3.0"))
+# ...and the top hit outscores the best chunk left out of the top k this many times over
+LEXICAL_MARGIN = float(os.getenv("BUDDY_RAG_LEXICAL_MARGIN", "1.5"))
+# Each ranking contributes 1 / (RRF_K + rank); 60 is the usual constant
+RRF_K = 60
+# Candidates taken from each ranking per requested chunk before fusing
+HYBRID_CANDIDATES_PER_CHUNK = 3
+# How often (seconds) to check whether the knowledge base was rebuilt on disk.
+CACHE_VERSION_CHECK_INTERVAL = 5.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Retrievals submitted to the executor and not yet finished, across every
+# knowledge base in the process (they all share the executor)
+_in_flight = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Lazily create the process-wide retrieval executor."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=RETRIEVAL_WORKERS,
+            thread_name_prefix="buddy-rag",
+        )
+    return _executor
+
+
+def _release_slot(_future: asyncio.Future) -> None:
+    # The worker thread keeps running after a timeout, so the slot is only
+    # released once the underlying retrieve() has actually returned.
+    global _in_flight
+    _in_flight -= 1
+
+
+@dataclass(frozen=True)
+class RetrievedChunk:
+    """One knowledge-base chunk returned for a query."""
+
+    id: str
+    text: str
+    # Cosine similarity to the query, higher is more relevant
+    score: float
+    page: Optional[int] = None
+
+
+def format_chunks(chunks: list[RetrievedChunk]) -> str:
+    """Join chunk texts into the plain context string handed to the LLM."""
+    return "\n\n".join(chunk.text for chunk in chunks)
+
+
+def _lexical_chunk(index: BM25Index, hit: LexicalHit) -> RetrievedChunk:
+    # Lexical hits have no cosine score; query coverage is on the same 0-1 scale
+    return RetrievedChunk(
+        id=index.ids[hit.position],
+        text=index.documents[hit.position].strip(),
+        score=hit.coverage,
+        page=index.metadatas[hit.position].get('page'),
+    )
+
+
+def lexical_confident(
+    index: BM25Index,
+    query: str,
+    hits: list[LexicalHit],
+    k: int,
+    confidence: float = LEXICAL_CONFIDENCE,
+    min_weight: float = LEXICAL_MIN_WEIGHT,
+    margin: float = LEXICAL_MARGIN,
+) -> bool:
+    """Whether the BM25 hits alone can answer the query, without the embedding."""
+    if not hits or hits[0].coverage < confidence:
+        return False
+    if index.query_weight(query) < min_weight:
+        return False
+    # A close runner-up outside the top k means the cut is arbitrary
+    return len(hits) <= k or hits[0].score >= margin * hits[k].score
+
+
+def fuse_rankings(rankings: list[list[RetrievedChunk]], k: int, rrf_k: int = RRF_K) -> list[RetrievedChunk]:
+    """
+    Reciprocal rank fusion: each ranking adds 1 / (rrf_k + rank) per chunk.
+    A chunk keeps the score from the first ranking it appears in.
+    """
+    fused: dict[str, float] = {}
+    chunks: dict[str, RetrievedChunk] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, 1):
+            fused[chunk.id] = fused.get(chunk.id, 0.0) + 1.0 / (rrf_k + rank)
+            chunks.setdefault(chunk.id, chunk)
+    best = sorted(fused, key=fused.__getitem__, reverse=True)[:k]
+    return [chunks[chunk_id] for chunk_id in best]
+
+
+@dataclass
+class RetrievalStats:
+    """Counters for retrievals, logged at session shutdown."""
+
+    calls: int = 0
+    completed: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    shed: int = 0
+    # Answered from BM25 alone, without embedding the query
+    lexical_fast_path: int = 0
+    hybrid: int = 0
+
 
 class BuddyRAG:
     """
     Retrieves relevant context from Buddy's knowledge base stored in ChromaDB.
     """
     
-    def __init__(self, chroma_path: Optional[str] = None, top_k: int = 3):
+    def __init__(
+        self,
+        chroma_path: Optional[str] = None,
+        top_k: int = 3,
+        timeout: float = RETRIEVAL_TIMEOUT,
+        cache: Optional[SemanticQueryCache] = None,
+        backend: str = RAG_BACKEND,
+        hybrid: bool = RAG_HYBRID,
+        lexical_confidence: float = LEXICAL_CONFIDENCE,
+        embedding_function: Optional[Any] = None,
+    ):
         """
         Initialize the RAG retriever.
         
         Args:
             chroma_path: Path to ChromaDB storage. Defaults to ./chroma_db
             top_k: Number of chunks to retrieve per query
+            timeout: Default deadline in seconds for aretrieve()
+            cache: Query cache to use. Defaults to one sized from BUDDY_RAG_CACHE_*
+            backend: "chroma" or "numpy" (exact search over the exported index)
+            hybrid: Fuse in the BM25 index, if setup_vector_store.py built one
+            lexical_confidence: BM25 query coverage above which the embedding is skipped
+            embedding_function: Query embedder. Defaults to the process-wide one,
+                which uses the host's embedding server when it's running
         """
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown RAG backend: {backend}")
+
         if chroma_path is None:
             # Default to project root's chroma_db folder
             project_root = Path(__file__).parent.parent
@@ -32,12 +192,33 @@ class BuddyRAG:
         
         self.top_k = top_k
         self.chroma_path = chroma_path
+        self.timeout = timeout
+        self.backend = backend
+        self.hybrid = hybrid
+        self.lexical_confidence = lexical_confidence
+        self.stats = RetrievalStats()
+        
+        if cache is None and CACHE_SIZE > 0:
+            cache = SemanticQueryCache(
+                max_entries=CACHE_SIZE,
+                ttl=CACHE_TTL,
+                similarity_threshold=CACHE_SIMILARITY,
+            )
+        self.cache = cache
+        self._collection_version: Optional[tuple] = None
+        self._version_checked_at = 0.0
         
         try:
-            self.client = chromadb.PersistentClient(path=chroma_path)
-            self.collection = self.client.get_collection("buddy_knowledge")
+            # Embed queries ourselves so the vector can also key the cache
+            self.embedding_function = embedding_function or get_embedding_function()
+            if backend == "chroma":
+                self.client = chromadb.PersistentClient(path=chroma_path)
+            self._collection_version = self._read_collection_version()
+            self.collection = self._open_collection()
+            self.lexical = self._open_lexical_index()
             chunk_count = self.collection.count()
-            logger.info(f"🐕 RAG initialized with {chunk_count} chunks from {chroma_path}")
+            mode = f"{backend} + bm25" if self.lexical is not None else backend
+            logger.info(f"🐕 RAG initialized with {chunk_count} chunks from {chroma_path} ({mode})")
         except Exception as e:
             logger.error(f"Failed to initialize RAG: {e}")
             logger.error("Make sure to run 'python scripts/setup_vector_store.py' first!")
@@ -54,49 +235,215 @@ class BuddyRAG:
         Returns:
             Formatted string with retrieved context, or empty string if no results
         """
+        return format_chunks(self.retrieve_chunks(query, top_k))
+
+    def retrieve_chunks(self, query: str, top_k: Optional[int] = None) -> list[RetrievedChunk]:
+        """
+        Retrieve the most relevant chunks for a query, best first.
+        
+        Args:
+            query: The user's message or question
+            top_k: Override default top_k for this query
+            
+        Returns:
+            Chunks with their IDs and similarity scores, or an empty list if no results
+        """
         k = top_k if top_k is not None else self.top_k
         
         try:
+            self._check_collection_version()
+            
+            if self.cache is not None:
+                cached = self.cache.get_exact(query, k)
+                if cached is not None:
+                    logger.debug(f"RAG cache hit (exact) for query: {query[:50]}...")
+                    return cached
+            
+            # Proper nouns are where lexical search shines; when it clearly
+            # has the answer, skip the embedding
+            lexical = self.lexical
+            lexical_hits: list[LexicalHit] = []
+            if lexical is not None:
+                lexical_hits = lexical.search(query, k * HYBRID_CANDIDATES_PER_CHUNK)
+                if lexical_confident(lexical, query, lexical_hits, k, self.lexical_confidence):
+                    self.stats.lexical_fast_path += 1
+                    chunks = [_lexical_chunk(lexical, hit) for hit in lexical_hits[:k]]
+                    self._log_chunks(query, chunks, "bm25")
+                    return chunks
+            
+            embedding = self.embedding_function([query])[0]
+            
+            if self.cache is not None:
+                cached = self.cache.get_similar(embedding, k)
+                if cached is not None:
+                    logger.debug(f"RAG cache hit (semantic) for query: {query[:50]}...")
+                    return cached
+            
             results = self.collection.query(
-                query_texts=[query],
-                n_results=k
+                query_embeddings=[embedding],
+                n_results=k * HYBRID_CANDIDATES_PER_CHUNK if lexical_hits else k
             )
             
-            # Check if we got results
-            if not results['documents'] or not results['documents'][0]:
-                logger.debug(f"No RAG results found for query: {query[:50]}...")
-                return ""
-            
-            # Format retrieved documents
-            docs = results['documents'][0]
-            metadatas = results['metadatas'][0] if 'metadatas' in results else [{}] * len(docs)
+            vector_chunks = []
+            if results['documents'] and results['documents'][0]:
+                docs = results['documents'][0]
+                ids = results['ids'][0]
+                metadatas = results['metadatas'][0] if results.get('metadatas') else [{}] * len(docs)
+                distances = results['distances'][0] if results.get('distances') else [2.0] * len(docs)
+                vector_chunks = [
+                    RetrievedChunk(
+                        id=chunk_id,
+                        text=doc.strip(),
+                        # Squared L2 between unit vectors is 2 - 2·cos
+                        score=1.0 - distance / 2,
+                        page=(meta or {}).get('page'),
+                    )
+                    for chunk_id, doc, meta, distance in zip(ids, docs, metadatas, distances)
+                ]
             
-            logger.info(f"RAG Query: '{query}'")
-            for i, (doc, meta) in enumerate(zip(docs, metadatas), 1):
-                logger.info(f"  Chunk {i} (page {meta.get('page', '?')}): {doc[:100]}...")
+            if lexical_hits:
+                self.stats.hybrid += 1
+                lexical_chunks = [_lexical_chunk(lexical, hit) for hit in lexical_hits]
+                chunks = fuse_rankings([vector_chunks, lexical_chunks], k)
+            else:
+                chunks = vector_chunks[:k]
             
-            # Build context string - simple and clean for the LLM
-            context_parts = [doc.strip() for doc in docs]
-            context = "\n\n".join(context_parts)
+            # Check if we got results
+            if not chunks:
+                logger.debug(f"No RAG results found for query: {query[:50]}...")
+                if self.cache is not None:
+                    self.cache.put(query, embedding, k, [])
+                return []
             
-            logger.debug(f"Retrieved {len(docs)} chunks for query: {query[:50]}...")
-            return context
+            self._log_chunks(query, chunks, "hybrid" if lexical_hits else "vector")
+            if self.cache is not None:
+                self.cache.put(query, embedding, k, chunks)
+            return chunks
             
         except Exception as e:
             logger.error(f"RAG retrieval error: {e}")
-            return ""
+            return []
 
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Formatted-context version of aretrieve_chunks().
+        
+        Returns:
+            Formatted context string, or empty string on timeout/no results
+        """
+        return format_chunks(await self.aretrieve_chunks(query, top_k=top_k, timeout=timeout))
 
-# Singleton instance for easy import
-_rag_instance: Optional[BuddyRAG] = None
+    async def aretrieve_chunks(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> list[RetrievedChunk]:
+        """
+        Retrieve chunks off the event loop, within a latency budget.
+        
+        The blocking retrieve_chunks() runs on the shared retrieval executor.
+        If it doesn't finish before the deadline, an empty list is returned so
+        the turn can go ahead without context. Calls that arrive while every
+        executor slot is busy are shed immediately rather than queued.
+        
+        Args:
+            query: The user's message or question
+            top_k: Override default top_k for this query
+            timeout: Override default deadline (seconds) for this query
+            
+        Returns:
+            Retrieved chunks, or an empty list on timeout/no results
+        """
+        global _in_flight
+        budget = self.timeout if timeout is None else timeout
+        self.stats.calls += 1
+        
+        if _in_flight >= RETRIEVAL_WORKERS:
+            self.stats.shed += 1
+            logger.warning(f"RAG executor saturated, skipping context for: {query[:50]}...")
+            return []
+        
+        loop = asyncio.get_running_loop()
+        _in_flight += 1
+        future = loop.run_in_executor(_get_executor(), self.retrieve_chunks, query, top_k)
+        future.add_done_callback(_release_slot)
+        
+        try:
+            chunks = await asyncio.wait_for(asyncio.shield(future), timeout=budget)
+        except asyncio.TimeoutError:
+            self.stats.timed_out += 1
+            logger.warning(f"RAG retrieval exceeded {budget * 1000:.0f}ms budget, continuing without context")
+            return []
+        except asyncio.CancelledError:
+            self.stats.cancelled += 1
+            raise
+        
+        self.stats.completed += 1
+        return chunks
 
+    def close(self) -> None:
+        """Release the collection and indexes (the knowledge base was evicted)."""
+        if self.cache is not None:
+            self.cache.invalidate()
+        self.lexical = None
+        self.collection = None
+        # Stops Chroma's per-path system once no other client uses it
+        close_client = getattr(getattr(self, "client", None), "close", None)
+        if close_client is not None:
+            close_client()
 
-def get_rag(top_k: int = 3) -> BuddyRAG:
-    """
-    Get or create the singleton RAG instance.
-    Useful for avoiding multiple ChromaDB connections.
-    """
-    global _rag_instance
-    if _rag_instance is None:
-        _rag_instance = BuddyRAG(top_k=top_k)
-    return _rag_instance
\ No newline at end of file
+    def _log_chunks(self, query: str, chunks: list[RetrievedChunk], source: str) -> None:
+        logger.info(f"RAG Query ({source}): '{query}'")
+        for i, chunk in enumerate(chunks, 1):
+            logger.info(
+                f"  Chunk {i} (page {chunk.page or '?'}, score {chunk.score:.2f}): {chunk.text[:100]}..."
+            )
+        logger.debug(f"Retrieved {len(chunks)} chunks for query: {query[:50]}...")
+
+    def _open_lexical_index(self) -> Optional[BM25Index]:
+        """Load the BM25 index written at ingestion time, if hybrid search is on."""
+        path = Path(self.chroma_path) / BM25_INDEX_FILE
+        if not self.hybrid or not path.exists():
+            return None
+        return BM25Index.load(path)
+
+    def _open_collection(self) -> Any:
+        """Open the Chroma collection or the NumPy index, per the backend."""
+        if self.backend == "numpy":
+            return NumpyVectorIndex(Path(self.chroma_path) / NUMPY_INDEX_DIR)
+        return self.client.get_collection(
+            COLLECTION_NAME,
+            embedding_function=self.embedding_function,
+        )
+
+    def _read_collection_version(self) -> tuple:
+        """Fingerprint the backing files so the cache can tell when they change."""
+        if self.backend == "numpy":
+            paths = [Path(self.chroma_path) / NUMPY_INDEX_DIR / EMBEDDINGS_FILE]
+        else:
+            sqlite_path = Path(self.chroma_path) / "chroma.sqlite3"
+            paths = [sqlite_path, sqlite_path.with_name("chroma.sqlite3-wal")]
+        paths.append(Path(self.chroma_path) / BM25_INDEX_FILE)
+        return tuple(p.stat().st_mtime if p.exists() else 0.0 for p in paths)
+
+    def _check_collection_version(self) -> None:
+        now = time.monotonic()
+        if now - self._version_checked_at < CACHE_VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+        
+        version = self._read_collection_version()
+        if version != self._collection_version:
+            logger.info("🔄 Knowledge base changed, reloading and invalidating RAG cache")
+            # Re-open: a rebuild may have replaced the collection or index entirely
+            self.collection = self._open_collection()
+            self.lexical = self._open_lexical_index()
+            self._collection_version = version
+            if self.cache is not None:
+                self.cache.invalidate()
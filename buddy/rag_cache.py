@@ -0,0 +1,158 @@
+"""
+Per-process semantic query cache for Buddy's RAG retrieval.
+
+Voice users repeat the same handful of questions, so retrievals are cached
+two ways: an exact lookup on the normalized query text (no embedding needed),
+then a nearest-neighbour match on the query embedding within a cosine
+similarity threshold. Entries are bounded by count (LRU) and by age (TTL).
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("rag")
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCTUATION.sub(" ", query.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters used to tune the similarity threshold."""
+
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+
+
+@dataclass
+class _CacheEntry:
+    embedding: np.ndarray
+    top_k: int
+    value: Any
+    created_at: float
+
+
+class SemanticQueryCache:
+    """
+    LRU + TTL cache keyed by normalized query, with embedding-similarity fallback.
+
+    Thread-safe: lookups happen on the retrieval executor threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 600.0,
+        similarity_threshold: float = 0.92,
+    ):
+        """
+        Args:
+            max_entries: Maximum cached queries before LRU eviction
+            ttl: Seconds an entry stays valid
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[tuple[str, int], _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_exact(self, query: str, top_k: int) -> Optional[Any]:
+        """Return the cached result for an identical normalized query."""
+        key = (normalize_query(query), top_k)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now - entry.created_at > self.ttl:
+                del self._entries[key]
+                self.stats.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.exact_hits += 1
+            return entry.value
+
+    def get_similar(self, embedding: Sequence[float], top_k: int) -> Optional[Any]:
+        """
+        Return the cached result whose query embedding is closest to this one,
+        if it's within the similarity threshold. Counts a miss otherwise.
+        """
+        vector = _unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            keys = [key for key, entry in self._entries.items() if entry.top_k == top_k]
+            if keys:
+                matrix = np.stack([self._entries[key].embedding for key in keys])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                score = float(similarities[best])
+                if score >= self.similarity_threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.stats.semantic_hits += 1
+                    logger.debug(f"Semantic cache hit '{keys[best][0]}' (similarity {score:.3f})")
+                    return self._entries[keys[best]].value
+                logger.debug(f"Semantic cache miss (best similarity {score:.3f})")
+            self.stats.misses += 1
+            return None
+
+    def put(self, query: str, embedding: Sequence[float], top_k: int, value: Any) -> None:
+        """Cache a retrieval result, evicting the least recently used entry if full."""
+        key = (normalize_query(query), top_k)
+        entry = _CacheEntry(
+            embedding=_unit(embedding),
+            top_k=top_k,
+            value=value,
+            created_at=time.monotonic(),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry, e.g. after the underlying collection changed."""
+        with self._lock:
+            self._entries.clear()
+            self.stats.invalidations += 1
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        self.stats.expirations += len(expired)
+
+
+def _unit(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
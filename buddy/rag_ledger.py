@@ -0,0 +1,125 @@
+"""
+Per-session ledger of knowledge chunks already in front of the LLM.
+
+In a conversation about Buddy's backstory the same chunks come back turn after
+turn. Re-sending their full text every time costs prompt tokens (and so
+time-to-first-token) without telling the LLM anything new. The ledger:
+
+1. Drops chunks scoring below a relevance threshold, skipping injection
+   entirely when none clear it, so small talk doesn't drag in loosely
+   related memories.
+2. Replaces chunks that are still in the saved chat context with a one-line
+   reference to what was already shared. Only chunks reported through
+   mark_in_context() count: context added to a turn's throwaway copy of the
+   chat context (on_user_turn_completed's turn_ctx) is gone by the next turn,
+   so those chunks are sent in full again.
+3. Forgets chunks after as many turns as compaction keeps RAG context
+   (BUDDY_CONTEXT_RAG_TTL_TURNS), so a reference never points at text the
+   LLM can no longer see.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from buddy.context_compaction import CHARS_PER_TOKEN, CONTEXT_RAG_TTL_TURNS
+
+if TYPE_CHECKING:
+    # Every session has a ledger, but only RAG sessions need chromadb loaded
+    from buddy.rag import RetrievedChunk
+
+logger = logging.getLogger("rag")
+
+# Chunks scoring below this cosine similarity aren't worth injecting
+RAG_MIN_SCORE = float(os.getenv("BUDDY_RAG_MIN_SCORE", "0.25"))
+# Words of a repeated chunk quoted in its reference line
+REFERENCE_WORDS = 8
+
+
+@dataclass
+class LedgerStats:
+    """What the ledger kept out of the prompt, logged at session shutdown."""
+
+    turns: int = 0
+    injected_chunks: int = 0
+    repeated_chunks: int = 0
+    skipped_low_score: int = 0
+    saved_tokens: int = 0
+
+
+@dataclass
+class LedgerPlan:
+    """What to inject for one turn."""
+
+    new: list["RetrievedChunk"] = field(default_factory=list)
+    repeated: list["RetrievedChunk"] = field(default_factory=list)
+
+    def render(self) -> str:
+        """Context text for the LLM: full new chunks, short references for repeats."""
+        parts = [chunk.text for chunk in self.new]
+        if self.repeated:
+            references = "; ".join(f'"{_reference(chunk.text)}"' for chunk in self.repeated)
+            parts.append(f"Already shared earlier in this conversation: {references}")
+        return "\n\n".join(parts)
+
+
+def _reference(text: str) -> str:
+    words = text.split()
+    head = " ".join(words[:REFERENCE_WORDS])
+    return f"{head}..." if len(words) > REFERENCE_WORDS else head
+
+
+class RetrievalLedger:
+    """Tracks which chunk IDs each session's saved chat context holds, by turn."""
+
+    def __init__(self, min_score: float = RAG_MIN_SCORE, ttl_turns: int = CONTEXT_RAG_TTL_TURNS):
+        self.min_score = min_score
+        self.ttl_turns = ttl_turns
+        self.stats = LedgerStats()
+        # Chunk ID -> turn it was last saved to the chat context in full
+        self._saved_at: dict[str, int] = {}
+
+    def plan(self, chunks: list["RetrievedChunk"]) -> LedgerPlan:
+        """
+        Decide what to inject for this turn's retrieval. Call once per user
+        turn, even when retrieval came back empty.
+        """
+        self.stats.turns += 1
+        turn = self.stats.turns
+
+        relevant = [chunk for chunk in chunks if chunk.score >= self.min_score]
+        if not relevant:
+            if chunks:
+                self.stats.skipped_low_score += 1
+                logger.debug(f"Skipping RAG context, best score {max(c.score for c in chunks):.2f}")
+            return LedgerPlan()
+
+        plan = LedgerPlan()
+        for chunk in relevant:
+            saved_at = self._saved_at.get(chunk.id)
+            # Compaction drops the saved context once its turn is ttl_turns old
+            if saved_at is not None and turn - saved_at < self.ttl_turns:
+                plan.repeated.append(chunk)
+            else:
+                plan.new.append(chunk)
+
+        self.stats.injected_chunks += len(plan.new)
+        self.stats.repeated_chunks += len(plan.repeated)
+        self.stats.saved_tokens += sum(
+            (len(chunk.text) - len(_reference(chunk.text))) // CHARS_PER_TOKEN for chunk in plan.repeated
+        )
+        return plan
+
+    def skip_turn(self) -> None:
+        """Count a user turn that didn't retrieve, so saved chunks still age."""
+        self.stats.turns += 1
+
+    def mark_in_context(self, plan: LedgerPlan) -> None:
+        """
+        Record that the plan's new chunks were saved to the session's chat
+        context (e.g. with Agent.update_chat_ctx), so later turns can refer
+        back to them instead of re-sending them.
+        """
+        for chunk in plan.new:
+            self._saved_at[chunk.id] = self.stats.turns
@@ -0,0 +1,127 @@
+"""
+Local turn router: decides what each final user transcript needs before the
+LLM sees it.
+
+- small talk ("yeah", "haha", "thanks!") needs nothing, so RAG is skipped
+- Buddy knowledge ("what's your backstory?") runs RAG as before
+- event intent ("anything fun this weekend?") skips RAG and starts the event
+  search right away, in parallel with the LLM, instead of waiting for the LLM
+  to emit a tool call
+
+It's keyword-based on purpose: a handful of word lists and one date parse, a
+few microseconds per turn, no model calls. When it can't tell, it routes to
+knowledge, which is what every turn did before. scripts/benchmark_router.py
+measures it on data/eval/turn_routes.json (written with these rules) and on
+data/eval/turn_routes_heldout.json (written separately; don't tune on it).
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+
+from buddy.event_store import CATEGORIES, parse_date_range
+
+SMALL_TALK = "small_talk"
+KNOWLEDGE = "knowledge"
+EVENTS = "events"
+ROUTES = (SMALL_TALK, KNOWLEDGE, EVENTS)
+
+# Event score needed (and needed to beat the knowledge score) to route to events
+EVENT_MIN_SCORE = 2
+# Longer utterances carry a request even if every word is conversational
+SMALL_TALK_MAX_WORDS = 6
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+SMALL_TALK_WORDS = frozenset({
+    "yeah", "yea", "yes", "yep", "yup", "no", "nope", "nah", "ok", "okay", "k", "sure",
+    "haha", "hahaha", "lol", "hmm", "hm", "um", "uh", "mhm", "oh", "ah", "aw", "wow",
+    "cool", "nice", "great", "awesome", "amazing", "perfect", "sweet", "neat", "fun",
+    "thanks", "thank", "you", "ty", "cheers", "hi", "hello", "hey", "bye", "goodbye",
+    "good", "morning", "night", "evening", "see", "ya", "later", "right", "alright",
+    "gotcha", "got", "it", "totally", "really", "so", "i", "love", "that", "this", "too",
+    "me", "sounds", "fine", "how", "are", "doing", "what's", "up", "not", "bad", "much",
+    "cute", "funny", "true", "exactly", "agreed", "same", "well", "anyway", "buddy",
+    "is", "was", "a", "the", "and", "very", "like", "ha", "omg", "wait", "interesting",
+    "lovely", "please", "makes", "sense", "definitely", "absolutely", "maybe", "there",
+    "that's", "it's", "how's", "going",
+})
+# Phrases that ask for something to do
+_EVENT_PHRASES = re.compile(
+    r"\b(?:things? to do|anything to do|something to do|what to do|what should (?:i|we) do|"
+    r"where (?:can|should) (?:i|we) go|what's (?:going on|happening|on)|going on|"
+    r"happening|plans? for|check out|go out|get out)\b"
+)
+EVENT_WORDS = frozenset({
+    "event", "events", "concert", "concerts", "show", "shows", "festival", "festivals",
+    "fest", "gig", "gigs", "ticket", "tickets", "party", "parties", "fair", "fairs",
+    "market", "markets", "exhibit", "exhibits", "exhibition", "meetup", "meetups",
+    "performance", "performances", "screening", "lineup", "nightlife", "happenings",
+})
+_ACTIVITY_WORDS = frozenset(word for words in CATEGORIES.values() for word in words) - EVENT_WORDS
+# Buddy's knowledge base is about Buddy, so questions about "you" go to RAG
+KNOWLEDGE_WORDS = frozenset({"buddy", "buddy's", "you", "your", "you're", "yourself", "you've"})
+KNOWLEDGE_TOPICS = frozenset({
+    "story", "stories", "backstory", "favorite", "favourite", "hoodie", "personality",
+    "philosophy", "think", "opinion", "history", "remember", "learned", "life", "why",
+})
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    event_score: int
+    knowledge_score: int
+    elapsed_us: float
+
+
+@dataclass
+class RouterStats:
+    routes: dict[str, int] = field(default_factory=lambda: dict.fromkeys(ROUTES, 0))
+    total_us: float = 0.0
+
+    @property
+    def turns(self) -> int:
+        return sum(self.routes.values())
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_us / self.turns if self.turns else 0.0
+
+
+class TurnRouter:
+    """Classifies final transcripts into SMALL_TALK, KNOWLEDGE or EVENTS."""
+
+    def __init__(self):
+        self.stats = RouterStats()
+
+    def classify(self, text: str) -> RouteDecision:
+        started = time.perf_counter()
+        route, event_score, knowledge_score = self._classify(text)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        self.stats.routes[route] += 1
+        self.stats.total_us += elapsed_us
+        return RouteDecision(route, event_score, knowledge_score, elapsed_us)
+
+    def _classify(self, text: str) -> tuple[str, int, int]:
+        lowered = text.lower().replace("’", "'")
+        words = _WORD.findall(lowered)
+        if not words:
+            return SMALL_TALK, 0, 0
+
+        knowledge_score = 2 * sum(1 for w in words if w in KNOWLEDGE_WORDS)
+        knowledge_score += sum(1 for w in words if w in KNOWLEDGE_TOPICS)
+        # "What's going on?" is made of small-talk words but asks for plans
+        event_phrases = len(_EVENT_PHRASES.findall(lowered))
+        if not event_phrases and len(words) <= SMALL_TALK_MAX_WORDS and all(w in SMALL_TALK_WORDS for w in words):
+            return SMALL_TALK, 0, knowledge_score
+
+        event_score = 2 * sum(1 for w in words if w in EVENT_WORDS)
+        event_score += 2 * event_phrases
+        event_score += sum(1 for w in words if w in _ACTIVITY_WORDS)
+        if parse_date_range(lowered) is not None:
+            event_score += 1
+
+        if event_score >= EVENT_MIN_SCORE and event_score > knowledge_score:
+            return EVENTS, event_score, knowledge_score
+        return KNOWLEDGE, event_score, knowledge_score
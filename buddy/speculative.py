@@ -0,0 +1,222 @@
+"""
+Speculative RAG prefetch driven by interim STT transcripts.
+
+While the user is still talking, interim transcripts start retrievals in the
+background (debounced, one at a time per session). When the turn is final and
+its text is close enough to the last prefetched query, that result is reused
+instead of paying for embedding + search on the critical path.
+
+A prefetch isn't cancelled when the user keeps talking: cancelling doesn't stop
+the retrieval's worker thread, which keeps holding one of the few executor
+slots (BUDDY_RAG_WORKERS), so a pile of abandoned prefetches could get the
+final turn's retrieval shed. Instead the newest transcript waits and is
+prefetched once the running one finishes.
+
+The same is true of a prefetch dropped at the end of a turn (a miss, or a turn
+the router sent elsewhere): its retrieval keeps its slot until it returns.
+Those are counted as abandoned, and a fallback retrieval shed right after one
+as shed_after_abandon, so shedding caused by speculation shows in the stats.
+"""
+
+import asyncio
+import difflib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from buddy.rag import BuddyRAG, RetrievedChunk
+from buddy.rag_cache import normalize_query
+
+logger = logging.getLogger("rag")
+
+# Quiet time after the latest interim transcript before prefetching
+SPECULATIVE_DEBOUNCE = float(os.getenv("BUDDY_RAG_SPECULATIVE_DEBOUNCE", "0.15"))
+# How similar the final transcript must be to the prefetched one to reuse it
+SPECULATIVE_REUSE_SIMILARITY = float(os.getenv("BUDDY_RAG_SPECULATIVE_SIMILARITY", "0.85"))
+# Interim transcripts shorter than this aren't worth a retrieval
+SPECULATIVE_MIN_CHARS = 12
+# Prefetches aren't on the critical path, so they get a looser deadline; the
+# final turn still only waits its own budget for an in-flight prefetch
+SPECULATIVE_PREFETCH_TIMEOUT = 2.0
+
+
+@dataclass
+class SpeculationStats:
+    """How often speculation paid off and roughly how much latency it saved."""
+
+    prefetches: int = 0
+    # Prefetches that finished out of date, with a newer transcript waiting
+    superseded: int = 0
+    hits: int = 0
+    misses: int = 0
+    saved_ms: float = 0.0
+    # Prefetches dropped while their retrieval still held an executor slot
+    abandoned: int = 0
+    # Fallback retrievals shed while an abandoned prefetch held its slot
+    shed_after_abandon: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        turns = self.hits + self.misses
+        return self.hits / turns if turns else 0.0
+
+    @property
+    def mean_saved_ms(self) -> float:
+        return self.saved_ms / self.hits if self.hits else 0.0
+
+
+@dataclass
+class _Prefetch:
+    query: str
+    normalized: str
+    task: asyncio.Task
+    started_at: float
+    finished_at: Optional[float] = None
+
+
+def transcript_similarity(a: str, b: str) -> float:
+    """Similarity in [0, 1] between two normalized transcripts."""
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class SpeculativeRetriever:
+    """
+    Per-session wrapper around BuddyRAG.aretrieve_chunks() that prefetches on
+    interim transcripts and reuses the result for the final one.
+    """
+
+    def __init__(
+        self,
+        rag: BuddyRAG,
+        debounce: float = SPECULATIVE_DEBOUNCE,
+        reuse_similarity: float = SPECULATIVE_REUSE_SIMILARITY,
+    ):
+        self.rag = rag
+        self.debounce = debounce
+        self.reuse_similarity = reuse_similarity
+        self.stats = SpeculationStats()
+        self._debounce_task: Optional[asyncio.Task] = None
+        self._prefetch: Optional[_Prefetch] = None
+        # Latest transcript that arrived while a prefetch was running
+        self._pending: Optional[str] = None
+
+    def on_interim(self, transcript: str) -> None:
+        """Schedule a prefetch for the latest partial transcript (debounced)."""
+        transcript = transcript.strip()
+        if len(transcript) < SPECULATIVE_MIN_CHARS:
+            return
+        if self._debounce_task is not None:
+            self._debounce_task.cancel()
+        self._debounce_task = asyncio.create_task(self._prefetch_after_debounce(transcript))
+
+    async def retrieve(self, transcript: str, timeout: Optional[float] = None) -> list[RetrievedChunk]:
+        """
+        Get chunks for the final transcript, reusing the prefetch when it
+        matches closely enough. Resets speculation state for the next turn.
+        """
+        prefetch = self._end_turn()
+        abandoned = False
+
+        if prefetch is not None:
+            similarity = transcript_similarity(normalize_query(transcript), prefetch.normalized)
+            task = prefetch.task
+            failed = task.done() and (task.cancelled() or task.exception() is not None)
+            # An empty finished prefetch may have been shed or timed out; retry
+            # fresh (a genuine no-result is answered by the query cache anyway)
+            empty = task.done() and not failed and not task.result()
+            if similarity >= self.reuse_similarity and not failed and not empty:
+                now = time.monotonic()
+                # Time the prefetch already spent is time the turn doesn't wait
+                finished = prefetch.finished_at or now
+                self.stats.hits += 1
+                self.stats.saved_ms += (finished - prefetch.started_at) * 1000
+                logger.info(
+                    f"🔮 Speculative RAG hit ({similarity:.2f}, "
+                    f"{'ready' if prefetch.task.done() else 'in flight'}): {transcript[:50]}..."
+                )
+                try:
+                    return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return []
+            abandoned = self._abandon(prefetch)
+            logger.debug(f"Speculative RAG miss ({similarity:.2f}) for: {transcript[:50]}...")
+
+        self.stats.misses += 1
+        # Shedding happens before aretrieve_chunks() first awaits, so a change is this call's
+        shed = self.rag.stats.shed
+        chunks = await self.rag.aretrieve_chunks(transcript, timeout=timeout)
+        if abandoned and self.rag.stats.shed > shed:
+            self.stats.shed_after_abandon += 1
+        return chunks
+
+    def reset(self) -> None:
+        """
+        End the turn without retrieving (the router sent it elsewhere), so a
+        prefetch of this utterance is never reused for a later one.
+        """
+        prefetch = self._end_turn()
+        if prefetch is not None:
+            self._abandon(prefetch)
+
+    def close(self) -> None:
+        """Cancel any outstanding speculation (session ending)."""
+        self.reset()
+
+    def _end_turn(self) -> Optional[_Prefetch]:
+        """Stop the debounce and forget pending work; returns the turn's prefetch."""
+        if self._debounce_task is not None:
+            self._debounce_task.cancel()
+            self._debounce_task = None
+        prefetch, self._prefetch = self._prefetch, None
+        self._pending = None
+        return prefetch
+
+    def _abandon(self, prefetch: _Prefetch) -> bool:
+        """Cancel a prefetch; True if its retrieval was still holding a slot."""
+        running = not prefetch.task.done()
+        if running:
+            self.stats.abandoned += 1
+        prefetch.task.cancel()
+        return running
+
+    async def _prefetch_after_debounce(self, transcript: str) -> None:
+        await asyncio.sleep(self.debounce)
+
+        current = self._prefetch
+        if current is not None:
+            if current.normalized == normalize_query(transcript):
+                self._pending = None
+                return
+            # The user kept talking; prefetch the newer transcript once this one is done
+            if not current.task.done():
+                self._pending = transcript
+                return
+            self.stats.superseded += 1
+        self._start_prefetch(transcript)
+
+    def _start_prefetch(self, transcript: str) -> None:
+        task = asyncio.create_task(
+            self.rag.aretrieve_chunks(transcript, timeout=SPECULATIVE_PREFETCH_TIMEOUT)
+        )
+        prefetch = _Prefetch(
+            query=transcript,
+            normalized=normalize_query(transcript),
+            task=task,
+            started_at=time.monotonic(),
+        )
+        task.add_done_callback(lambda _: self._on_prefetch_done(prefetch))
+        self._prefetch = prefetch
+        self.stats.prefetches += 1
+
+    def _on_prefetch_done(self, prefetch: _Prefetch) -> None:
+        prefetch.finished_at = time.monotonic()
+        # Only while the turn is still going: retrieve() and close() clear both
+        if self._prefetch is not prefetch or self._pending is None:
+            return
+        transcript, self._pending = self._pending, None
+        if prefetch.task.cancelled():
+            return
+        self.stats.superseded += 1
+        self._start_prefetch(transcript)
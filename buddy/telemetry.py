@@ -0,0 +1,448 @@
+"""
+Per-turn latency breakdown and exportable latency histograms.
+
+Each session's TurnTracker stitches LiveKit's pipeline metrics (end of
+utterance, STT final, the on_user_turn_completed hook, LLM time-to-first-token,
+TTS time-to-first-byte) and Buddy's own spans (RAG retrieval, tool calls) into
+one record per turn, and
+feeds every stage into the process-wide latency registry. The event-loop
+watchdog (buddy/watchdog.py) records loop lag into the same registry, and the
+Linkup client (buddy/linkup.py) its request latency plus counters (hedges,
+hedge wins, retries) and its circuit breaker state.
+
+LiveKit runs each job in its own process, so job processes write their
+histograms to BUDDY_METRICS_DIR (from a worker thread, at most every
+BUDDY_METRICS_SNAPSHOT_INTERVAL seconds) and the worker process merges them,
+all samples included, for export. The exporter is chosen with BUDDY_METRICS_EXPORTER:
+
+    prometheus  text endpoint on BUDDY_METRICS_PORT (default 9464)
+    jsonl       per-turn records plus periodic p50/p95/p99 rollups appended
+                to BUDDY_METRICS_JSONL
+    none        (default) log-only
+"""
+
+import asyncio
+import contextvars
+import http.server
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from buddy.load import pid_alive
+
+logger = logging.getLogger("telemetry")
+
+METRICS_EXPORTER = os.getenv("BUDDY_METRICS_EXPORTER", "none").lower()
+METRICS_DIR = Path(os.getenv("BUDDY_METRICS_DIR", Path(tempfile.gettempdir()) / "buddy-metrics"))
+METRICS_PORT = int(os.getenv("BUDDY_METRICS_PORT", "9464"))
+METRICS_JSONL = Path(os.getenv("BUDDY_METRICS_JSONL", "buddy_metrics.jsonl"))
+METRICS_ROLLUP_INTERVAL = float(os.getenv("BUDDY_METRICS_ROLLUP_INTERVAL", "60"))
+# Job processes rewrite their snapshot at most this often (seconds)
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("BUDDY_METRICS_SNAPSHOT_INTERVAL", "5"))
+
+# Stages of a turn, in pipeline order. "turn" is end of speech -> first audio.
+# "turn_hook" is Assistant.on_user_turn_completed (routing and RAG, so it
+# includes the "rag" span).
+STAGES = ("eou_delay", "stt_final", "turn_hook", "rag", "tool", "llm_ttft", "tts_ttfb", "turn")
+# Not turn stages, but exported the same way
+LOOP_LAG = "loop_lag"
+LINKUP = "linkup"
+BUCKETS_MS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent samples kept per stage for quantile estimates
+SAMPLE_WINDOW = 2048
+
+
+class LatencyHistogram:
+    """
+    Cumulative bucket counts plus a window of recent samples. Merged views
+    (window=None) keep every sample, so one process's samples don't push out
+    another's.
+    """
+
+    def __init__(self, window: Optional[int] = SAMPLE_WINDOW):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.samples: deque = deque(maxlen=window)
+
+    def observe(self, ms: float) -> None:
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.samples.append(ms)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.samples.extend(other.samples)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def rollup(self) -> dict[str, float]:
+        summary = {f"p{int(q * 100)}": round(self.quantile(q), 1) for q in QUANTILES}
+        summary["count"] = self.count
+        summary["mean"] = round(self.sum_ms / self.count, 1) if self.count else 0.0
+        return summary
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "buckets": self.buckets,
+            "count": self.count,
+            "sum_ms": self.sum_ms,
+            "samples": list(self.samples),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], window: Optional[int] = SAMPLE_WINDOW) -> "LatencyHistogram":
+        hist = cls(window)
+        hist.buckets = list(data["buckets"])
+        hist.count = data["count"]
+        hist.sum_ms = data["sum_ms"]
+        hist.samples.extend(data["samples"])
+        return hist
+
+
+class LatencyRegistry:
+    """Process-wide latency histograms, one per stage, plus counters and gauges."""
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in (*STAGES, LOOP_LAG, LINKUP)}
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self.histograms.setdefault(stage, LatencyHistogram()).observe(ms)
+
+    def quantile(self, stage: str, q: float) -> tuple[float, int]:
+        """Recent quantile of a stage and how many samples it's based on."""
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                return 0.0, 0
+            return hist.quantile(q), len(hist.samples)
+
+    def increment(self, name: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0.0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def rollup(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {stage: h.rollup() for stage, h in self.histograms.items() if h.count}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms = {stage: LatencyHistogram() for stage in (*STAGES, LOOP_LAG, LINKUP)}
+            self.counters.clear()
+            self.gauges.clear()
+
+    def write_snapshot(self, directory: Path = METRICS_DIR) -> None:
+        """Write this process's histograms where the worker's exporter can merge them."""
+        with self._lock:
+            data = {
+                "histograms": {stage: h.to_dict() for stage, h in self.histograms.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data))
+        tmp_path.replace(path)
+
+
+latency = LatencyRegistry()
+
+_current_tracker: contextvars.ContextVar[Optional["TurnTracker"]] = contextvars.ContextVar(
+    "buddy_turn_tracker", default=None
+)
+
+
+def record_span(stage: str, seconds: float) -> None:
+    """
+    Record a Buddy-side span (e.g. "rag", "tool") against the current turn.
+    Works from any task spawned by the session, via the tracker's context var.
+    """
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.add_span(stage, seconds)
+    else:
+        latency.observe(stage, seconds * 1000)
+
+
+@dataclass
+class TurnRecord:
+    room: str
+    started_at: float
+    speech_id: Optional[str] = None
+    stages_ms: dict[str, float] = field(default_factory=dict)
+
+
+class TurnTracker:
+    """
+    Per-session collector that turns pipeline metrics into per-turn records.
+
+    A turn opens on its end-of-utterance metrics (spans recorded by the
+    on_user_turn_completed hook just before are attached to it) and closes
+    when TTS reports time-to-first-byte for the same speech.
+    """
+
+    def __init__(self, room: str):
+        self.room = room
+        self._pending_spans: dict[str, float] = {}
+        self._turns: dict[str, TurnRecord] = {}
+        # Tasks the session spawns from here on inherit this tracker
+        _current_tracker.set(self)
+
+    def add_span(self, stage: str, seconds: float) -> None:
+        ms = seconds * 1000
+        latency.observe(stage, ms)
+        # Tool spans land mid-turn; RAG spans land before the turn's metrics
+        if stage == "tool" and self._turns:
+            turn = list(self._turns.values())[-1]
+            turn.stages_ms[stage] = turn.stages_ms.get(stage, 0.0) + ms
+        else:
+            self._pending_spans[stage] = self._pending_spans.get(stage, 0.0) + ms
+
+    def on_metrics(self, metrics: Any) -> None:
+        """Feed every MetricsCollectedEvent.metrics through here."""
+        # Imported here so buddy.linkup (and the scripts using it) don't load livekit.agents
+        from livekit.agents.metrics import EOUMetrics, LLMMetrics, TTSMetrics
+
+        if isinstance(metrics, EOUMetrics):
+            turn = TurnRecord(room=self.room, started_at=time.time(), speech_id=metrics.speech_id)
+            self._observe(turn, "eou_delay", metrics.end_of_utterance_delay)
+            self._observe(turn, "stt_final", metrics.transcription_delay)
+            self._observe(turn, "turn_hook", metrics.on_user_turn_completed_delay)
+            for stage, ms in self._pending_spans.items():
+                turn.stages_ms[stage] = ms
+            self._pending_spans.clear()
+            if metrics.speech_id:
+                self._turns[metrics.speech_id] = turn
+        elif isinstance(metrics, LLMMetrics):
+            turn = self._turns.get(metrics.speech_id)
+            # A tool call triggers a second generation under the same speech; its
+            # first token is the one spoken, so the latest generation wins
+            if turn is not None and metrics.ttft >= 0:
+                turn.stages_ms["llm_ttft"] = metrics.ttft * 1000
+        elif isinstance(metrics, TTSMetrics):
+            turn = self._turns.pop(metrics.speech_id, None)
+            if turn is not None:
+                if metrics.ttfb >= 0:
+                    self._observe(turn, "tts_ttfb", metrics.ttfb)
+                self._finish(turn)
+
+    def close(self) -> None:
+        """Flush unfinished turns and publish this process's histograms."""
+        for turn in self._turns.values():
+            self._finish(turn, record_total=False)
+        self._turns.clear()
+        if METRICS_EXPORTER != "none":
+            latency.write_snapshot()
+
+    def _observe(self, turn: TurnRecord, stage: str, seconds: float) -> None:
+        ms = seconds * 1000
+        turn.stages_ms[stage] = ms
+        latency.observe(stage, ms)
+
+    def _finish(self, turn: TurnRecord, record_total: bool = True) -> None:
+        stages = turn.stages_ms
+        if "llm_ttft" in stages:
+            latency.observe("llm_ttft", stages["llm_ttft"])
+        if record_total and all(s in stages for s in ("eou_delay", "llm_ttft", "tts_ttfb")):
+            total = (
+                stages["eou_delay"] + stages.get("turn_hook", 0.0) + stages.get("tool", 0.0)
+                + stages["llm_ttft"] + stages["tts_ttfb"]
+            )
+            stages["turn"] = total
+            latency.observe("turn", total)
+
+        logger.info(
+            "Turn latency: " + ", ".join(f"{s}={ms:.0f}ms" for s, ms in stages.items()),
+            extra={"speech_id": turn.speech_id},
+        )
+        if METRICS_EXPORTER == "jsonl":
+            _append_jsonl({"type": "turn", **asdict(turn)})
+        if METRICS_EXPORTER != "none":
+            schedule_snapshot()
+
+
+_snapshot_task: Optional[asyncio.Task] = None
+_last_snapshot = 0.0
+
+
+def schedule_snapshot() -> None:
+    """
+    Publish this process's histograms without blocking the event loop: the
+    write runs in a thread, at most once every METRICS_SNAPSHOT_INTERVAL.
+    A write already waiting picks up everything recorded before it runs.
+    """
+    global _snapshot_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        latency.write_snapshot()
+        return
+    if _snapshot_task is None or _snapshot_task.done():
+        _snapshot_task = loop.create_task(_write_snapshot_later())
+
+
+async def _write_snapshot_later() -> None:
+    global _last_snapshot
+    delay = _last_snapshot + METRICS_SNAPSHOT_INTERVAL - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    _last_snapshot = time.monotonic()
+    try:
+        await asyncio.to_thread(latency.write_snapshot)
+    except OSError as e:
+        logger.warning(f"Couldn't write metrics snapshot: {e}")
+
+
+def _append_jsonl(record: dict[str, Any]) -> None:
+    # One short write per line with O_APPEND, so concurrent job processes don't interleave
+    line = json.dumps(record, separators=(",", ":")) + "\n"
+    fd = os.open(METRICS_JSONL, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class MergedMetrics:
+    histograms: dict[str, LatencyHistogram]
+    counters: dict[str, float]
+    # Summed over live job processes only (e.g. how many have their breaker open)
+    gauges: dict[str, float]
+
+
+def merged_metrics(directory: Path = METRICS_DIR) -> MergedMetrics:
+    """Merge every job process's snapshot into worker-wide metrics."""
+    # Unbounded, so quantiles weigh every process's samples equally
+    merged = MergedMetrics(histograms={stage: LatencyHistogram(window=None) for stage in STAGES}, counters={}, gauges={})
+    for path in directory.glob("*.json"):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # being replaced; picked up next scrape
+        for stage, hist in data["histograms"].items():
+            merged.histograms.setdefault(stage, LatencyHistogram(window=None)).merge(
+                LatencyHistogram.from_dict(hist, window=None)
+            )
+        for name, value in data["counters"].items():
+            merged.counters[name] = merged.counters.get(name, 0.0) + value
+        # Histograms and counters of finished jobs still count; their gauges don't
+        if path.stem.isdigit() and pid_alive(int(path.stem)):
+            for name, value in data["gauges"].items():
+                merged.gauges[name] = merged.gauges.get(name, 0.0) + value
+    return merged
+
+
+def render_prometheus(metrics: MergedMetrics) -> str:
+    """
+    Prometheus text exposition: a histogram plus p50/p95/p99 gauges per stage,
+    then buddy_<name>_total per counter and buddy_<name> per gauge.
+    """
+    histograms = metrics.histograms
+    lines = [
+        "# HELP buddy_turn_stage_latency_ms Latency of each turn stage in milliseconds.",
+        "# TYPE buddy_turn_stage_latency_ms histogram",
+    ]
+    for stage, hist in histograms.items():
+        cumulative = 0
+        for bound, count in zip((*BUCKETS_MS, "+Inf"), hist.buckets):
+            cumulative += count
+            lines.append(f'buddy_turn_stage_latency_ms_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'buddy_turn_stage_latency_ms_sum{{stage="{stage}"}} {hist.sum_ms:.3f}')
+        lines.append(f'buddy_turn_stage_latency_ms_count{{stage="{stage}"}} {hist.count}')
+
+    lines.append("# HELP buddy_turn_stage_latency_quantile_ms Recent latency quantiles per turn stage.")
+    lines.append("# TYPE buddy_turn_stage_latency_quantile_ms gauge")
+    for stage, hist in histograms.items():
+        for q in QUANTILES:
+            lines.append(
+                f'buddy_turn_stage_latency_quantile_ms{{stage="{stage}",quantile="{q}"}} {hist.quantile(q):.3f}'
+            )
+
+    for name, value in sorted(metrics.counters.items()):
+        lines.append(f"# TYPE buddy_{name}_total counter")
+        lines.append(f"buddy_{name}_total {value:g}")
+    for name, value in sorted(metrics.gauges.items()):
+        lines.append(f"# TYPE buddy_{name} gauge")
+        lines.append(f"buddy_{name} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class _PrometheusHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render_prometheus(merged_metrics()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_exporter() -> None:
+    """
+    Start the configured exporter in the worker process (call once, before
+    cli.run_app). Clears snapshots left over from a previous worker.
+    """
+    if METRICS_EXPORTER == "none":
+        return
+
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in METRICS_DIR.glob("*.json"):
+        stale.unlink(missing_ok=True)
+
+    if METRICS_EXPORTER == "prometheus":
+        server = http.server.ThreadingHTTPServer(("0.0.0.0", METRICS_PORT), _PrometheusHandler)
+        threading.Thread(target=server.serve_forever, name="buddy-metrics", daemon=True).start()
+        logger.info(f"📈 Prometheus metrics on :{METRICS_PORT}/metrics")
+    elif METRICS_EXPORTER == "jsonl":
+        threading.Thread(target=_rollup_loop, name="buddy-metrics", daemon=True).start()
+        logger.info(f"📈 Writing turn metrics to {METRICS_JSONL}")
+    else:
+        logger.warning(f"Unknown BUDDY_METRICS_EXPORTER '{METRICS_EXPORTER}', metrics not exported")
+
+
+def _rollup_loop() -> None:
+    while True:
+        time.sleep(METRICS_ROLLUP_INTERVAL)
+        metrics = merged_metrics()
+        rollup = {stage: h.rollup() for stage, h in metrics.histograms.items() if h.count}
+        if rollup or metrics.counters:
+            _append_jsonl({
+                "type": "rollup",
+                "ts": time.time(),
+                "stages": rollup,
+                "counters": metrics.counters,
+                "gauges": metrics.gauges,
+            })
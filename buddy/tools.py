@@ -3,15 +3,345 @@ Tools for Buddy voice agent.
 """
 
 import asyncio
+import json
 import logging
 import os
-from typing import Optional
+import re
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Awaitable, Callable, Optional
 
 import httpx
-from livekit.agents import function_tool, RunContext, ToolError
+from livekit.agents import AgentSession, function_tool, get_job_context, RunContext, ToolError
+
+from buddy.event_results import EventSummary, process_results
+from buddy.event_store import EventQuery, get_event_store, parse_event_query
+from buddy.linkup import LinkupClient, LinkupUnavailable, fetch_linkup
+from buddy.load import track_tool_call
+from buddy.phrase_cache import get_phrase_cache
+from buddy.telemetry import record_span
 
 logger = logging.getLogger("tools")
 
+# Fresh results are served straight from cache; stale ones are served while a
+# background refresh runs. Beyond ttl + stale_ttl the caller waits for Linkup.
+SEARCH_CACHE_TTL = float(os.getenv("BUDDY_SEARCH_CACHE_TTL", "900"))
+SEARCH_CACHE_STALE_TTL = float(os.getenv("BUDDY_SEARCH_CACHE_STALE_TTL", "3600"))
+SEARCH_CACHE_SIZE = int(os.getenv("BUDDY_SEARCH_CACHE_SIZE", "512"))
+
+_QUERY_TOKEN = re.compile(r"[a-z0-9']+")
+_QUERY_STOPWORDS = frozenset({
+    "a", "an", "the", "in", "on", "at", "for", "of", "to", "and", "any",
+    "some", "events", "event", "things", "find", "me", "near", "nearby",
+})
+_QUERY_ALIASES = {
+    "sf": "san francisco",
+    "s.f.": "san francisco",
+    "tonite": "tonight",
+    "wknd": "weekend",
+}
+
+
+def normalize_search_query(search_query: str) -> str:
+    """
+    Reduce a search query to a cache key so near-identical searches share it.
+    
+    Lowercases, expands common aliases ("SF"), drops filler words and sorts the
+    remaining terms. The current date is included because relative phrases like
+    "tonight" or "this weekend" mean something different tomorrow.
+    """
+    text = search_query.lower()
+    for alias, expansion in _QUERY_ALIASES.items():
+        text = re.sub(rf"(?<![\w.]){re.escape(alias)}(?![\w])", expansion, text)
+    terms = sorted({t for t in _QUERY_TOKEN.findall(text) if t not in _QUERY_STOPWORDS})
+    return f"{date.today().isoformat()}|{' '.join(terms)}"
+
+
+@dataclass
+class SearchCacheStats:
+    """Counters for the Linkup search cache."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refreshes: int = 0
+    errors: int = 0
+    expired_hits: int = 0
+
+
+@dataclass
+class _SearchEntry:
+    data: dict
+    fetched_at: float
+
+
+class SearchCache:
+    """
+    Per-process TTL cache for Linkup searches with stale-while-revalidate and
+    single-flight coalescing: concurrent misses for the same key share one
+    upstream request. When that request fails, results of any age still in
+    the cache are served rather than nothing.
+    """
+
+    def __init__(
+        self,
+        ttl: float = SEARCH_CACHE_TTL,
+        stale_ttl: float = SEARCH_CACHE_STALE_TTL,
+        max_entries: int = SEARCH_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.stats = SearchCacheStats()
+        self._entries: "OrderedDict[str, _SearchEntry]" = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    async def get(
+        self,
+        search_query: str,
+        fetch: Callable[[str], Awaitable[dict]],
+    ) -> dict:
+        """
+        Return results for a query, calling fetch(search_query) only when needed.
+        
+        Args:
+            search_query: The query as the LLM phrased it
+            fetch: Coroutine function that performs the upstream search
+        """
+        key = normalize_search_query(search_query)
+        entry = self._entries.get(key)
+        
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                logger.info(f"⚡ Search cache hit for '{search_query}' ({age:.0f}s old)")
+                return entry.data
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stats.stale_hits += 1
+                logger.info(f"⚡ Serving stale results for '{search_query}' ({age:.0f}s old), refreshing")
+                if key not in self._in_flight:
+                    self.stats.refreshes += 1
+                    self._start_fetch(key, search_query, fetch)
+                return entry.data
+        
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            logger.info(f"🔗 Joining in-flight search for '{search_query}'")
+        else:
+            self.stats.misses += 1
+            task = self._start_fetch(key, search_query, fetch)
+        
+        # Shield so one caller giving up doesn't cancel the search for the others
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if entry is None:
+                raise
+            self.stats.expired_hits += 1
+            age = time.monotonic() - entry.fetched_at
+            logger.warning(f"⚡ Linkup failed, serving expired results for '{search_query}' ({age:.0f}s old)")
+            return entry.data
+
+    def _start_fetch(
+        self,
+        key: str,
+        search_query: str,
+        fetch: Callable[[str], Awaitable[dict]],
+    ) -> asyncio.Task:
+        async def _run() -> dict:
+            try:
+                data = await fetch(search_query)
+            except Exception:
+                self.stats.errors += 1
+                raise
+            finally:
+                self._in_flight.pop(key, None)
+            self._store(key, data)
+            return data
+        
+        task = asyncio.create_task(_run())
+        # Background refreshes have no awaiter; retrieve the error so it's logged once
+        task.add_done_callback(_log_fetch_failure)
+        self._in_flight[key] = task
+        return task
+
+    def _store(self, key: str, data: dict) -> None:
+        self._entries[key] = _SearchEntry(data=data, fetched_at=time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _log_fetch_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Linkup search failed: {task.exception()}")
+
+
+search_cache = SearchCache()
+
+
+# Text stream topic the frontend listens on for event links
+EVENT_LINKS_TOPIC = "buddy.events"
+# Keep references so in-flight publishes aren't garbage collected
+_publish_tasks: set[asyncio.Task] = set()
+
+
+def publish_event_links(search_query: str, events: list[EventSummary]) -> None:
+    """
+    Send the full event details (with URLs) to the room's frontend as JSON on
+    EVENT_LINKS_TOPIC, in the background so the LLM isn't kept waiting.
+    """
+    try:
+        room = get_job_context().room
+    except RuntimeError:
+        # Not running inside a job (scripts, load tests)
+        return
+    
+    payload = json.dumps({
+        "query": search_query,
+        "events": [event.to_dict() for event in events],
+    })
+    
+    async def _send():
+        try:
+            await room.local_participant.send_text(payload, topic=EVENT_LINKS_TOPIC)
+        except Exception as e:
+            logger.warning(f"Couldn't publish event links: {e}")
+    
+    task = asyncio.create_task(_send())
+    _publish_tasks.add(task)
+    task.add_done_callback(_publish_tasks.discard)
+
+
+# Hedged, retried, deadline-bound and circuit-broken Linkup searches for this process
+linkup = LinkupClient(fetch_linkup)
+
+
+async def _fetch_events(search_query: str) -> dict:
+    """Local event store first, then Linkup (cached and coalesced across sessions in this process)."""
+    store = get_event_store()
+    data = store.search(search_query)
+    if data is not None:
+        return data
+    try:
+        return await search_cache.get(search_query, linkup.search)
+    except Exception:
+        # Linkup is down or too slow: a thinner or older local answer beats none
+        data = store.search(search_query, fallback=True)
+        if data is None:
+            raise
+        logger.warning(f"🗂️ Linkup failed, answering '{search_query}' from the event store anyway")
+        return data
+
+
+# How long a search started from the transcript stays usable by the tool call
+EVENT_PREFETCH_MAX_AGE = 20.0
+
+
+@dataclass
+class _EventPrefetch:
+    # What the transcript asked for; the tool call must ask for the same thing
+    query: EventQuery
+    started_at: float
+    task: asyncio.Task
+    # Drops the prefetch once the turn's reply is done
+    on_speech_created: Optional[Callable] = None
+
+
+# Searches started by the turn router, per session, awaiting the LLM's tool call
+_prefetches: "weakref.WeakKeyDictionary[AgentSession, _EventPrefetch]" = weakref.WeakKeyDictionary()
+
+
+def prefetch_event_search(session: AgentSession, transcript: str) -> None:
+    """
+    Start the event search for a turn the router classified as event intent,
+    so it runs alongside the LLM instead of after its tool call. A tool call
+    in the same turn that asks for the same thing (see _same_search) picks it
+    up; it is dropped when the turn's reply is done.
+    """
+    search_query = transcript
+    if not re.search(r"\b(?:sf|san francisco)\b", transcript, re.IGNORECASE):
+        search_query = f"{transcript} San Francisco"
+    drop_event_prefetch(session)
+    task = asyncio.create_task(_fetch_events(search_query))
+    # Unclaimed prefetches have no awaiter; retrieve the error so it's logged once
+    task.add_done_callback(_log_fetch_failure)
+    prefetch = _EventPrefetch(query=parse_event_query(search_query), started_at=time.monotonic(), task=task)
+
+    def _on_speech_created(ev) -> None:
+        # The first reply generated after this point answers the turn (filler
+        # phrases come from say()); it's done once its tool calls have run
+        if ev.source != "generate_reply":
+            return
+        session.off("speech_created", _on_speech_created)
+        prefetch.on_speech_created = None
+        ev.speech_handle.add_done_callback(lambda _: drop_event_prefetch(session, prefetch))
+
+    prefetch.on_speech_created = _on_speech_created
+    session.on("speech_created", _on_speech_created)
+    _prefetches[session] = prefetch
+    logger.info(f"🏃 Prefetching events for '{search_query}'")
+
+
+def drop_event_prefetch(session: AgentSession, prefetch: Optional[_EventPrefetch] = None) -> None:
+    """
+    Cancel the session's unclaimed prefetch (only if it's still `prefetch`, when
+    given). A Linkup request it started keeps running, since the search cache
+    shares it, and its results are cached for whoever asks next.
+    """
+    current = _prefetches.get(session)
+    if current is None or (prefetch is not None and current is not prefetch):
+        return
+    del _prefetches[session]
+    current.task.cancel()
+    if current.on_speech_created is not None:
+        session.off("speech_created", current.on_speech_created)
+
+
+def _same_search(prefetched: EventQuery, requested: EventQuery) -> bool:
+    """
+    Whether the LLM's tool query asks for what the transcript did. The LLM
+    rephrases ("any good jazz shows this weekend?" becomes "jazz concerts San
+    Francisco this weekend"), so compare the date window, neighborhood and
+    categories rather than the words.
+    """
+    if (prefetched.dates, prefetched.neighborhood, prefetched.categories) != (
+        requested.dates, requested.neighborhood, requested.categories
+    ):
+        return False
+    shared_terms = set(prefetched.terms) & set(requested.terms)
+    # Different named things ("Outside Lands" vs "Fleet Week") are different searches
+    if prefetched.terms and requested.terms and not shared_terms:
+        return False
+    # Something has to match, or "anything fun?" would claim every search
+    return bool(requested.dates or requested.neighborhood or requested.categories or shared_terms)
+
+
+def _take_prefetch(session: AgentSession, search_query: str) -> Optional[asyncio.Task]:
+    prefetch = _prefetches.get(session)
+    if prefetch is None:
+        return None
+    if not _same_search(prefetch.query, parse_event_query(search_query)):
+        logger.info(f"🏃 Prefetched search doesn't match '{search_query}', searching again")
+        drop_event_prefetch(session)
+        return None
+    if time.monotonic() - prefetch.started_at > EVENT_PREFETCH_MAX_AGE:
+        drop_event_prefetch(session)
+        return None
+    # Claimed: the tool owns the task now, so dropping the entry mustn't cancel it
+    del _prefetches[session]
+    if prefetch.on_speech_created is not None:
+        session.off("speech_created", prefetch.on_speech_created)
+    return prefetch.task
+
 
 @function_tool()
 async def find_nearby_events(
@@ -35,72 +365,78 @@ async def find_nearby_events(
     # Provide feedback for longer searches
     async def _speak_status():
         await asyncio.sleep(0.5)
-        await context.session.say(
-            "Hang on, let me sniff around for the best options!",
-            add_to_chat_ctx=False
-        )
+        # Pre-synthesized audio starts in milliseconds instead of a TTS round trip
+        phrases = get_phrase_cache()
+        if phrases is not None:
+            await phrases.say(context.session, "search_filler", add_to_chat_ctx=False)
+        else:
+            await context.session.say(
+                "Hang on, let me sniff around for the best options!",
+                add_to_chat_ctx=False
+            )
     
     status_task = asyncio.create_task(_speak_status())
     
     try:
-        # Call Linkup API
-        api_key = os.getenv("LINKUP_API_KEY")
-        if not api_key:
-            raise ToolError("Event search is temporarily unavailable - missing API key")
+        started = time.perf_counter()
+        # Counted in the worker's load so dispatch backs off while searches pile up
+        with track_tool_call():
+            data = None
+            # The router may already have started this turn's search
+            prefetch = _take_prefetch(context.session, search_query)
+            if prefetch is not None:
+                try:
+                    data = await asyncio.shield(prefetch)
+                except LinkupUnavailable:
+                    # This turn's Linkup time is spent; searching again only adds dead air
+                    raise
+                except Exception:
+                    data = None
+                if data and data.get("results"):
+                    logger.info("🏃 Using the prefetched event search")
+                else:
+                    data = None
+            if data is None:
+                data = await _fetch_events(search_query)
+            if data.get("source") == "event_store":
+                logger.info(f"🗂️ Answered from the local event store in {(time.perf_counter() - started) * 1000:.1f}ms")
+        record_span("tool", time.perf_counter() - started)
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                "https://api.linkup.so/v1/search",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "q": search_query,
-                    "depth": "standard",
-                    "outputType": "searchResults"
-                }
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Cancel status update since we got results
-            status_task.cancel()
-            
-            # Log raw API response
-            logger.info(f"📦 Linkup API response keys: {list(data.keys())}")
-            logger.info(f"📦 Number of results: {len(data.get('results', []))}")
-            
-            # Parse results
-            if not data.get("results"):
-                logger.warning("❌ No results found in API response")
-                return "I couldn't find any events matching that search. Want to try something different?"
-            
-            # Format results for Buddy to present naturally
-            results_text = []
-            for i, result in enumerate(data["results"][:5], 1):
-                title = result.get("name", "Event")
-                url = result.get("url", "")
-                snippet = result.get("content", "")[:200]
-                
-                # Log each result for verification
-                logger.info(f"  Result {i}: {title}")
-                logger.info(f"    URL: {url}")
-                logger.info(f"    Snippet: {snippet[:100]}...")
-                
-                results_text.append(f"{i}. {title}\n{snippet}\n{url}")
-            
-            formatted = "\n\n".join(results_text)
-            
-            # Log the full tool return value that LLM will receive
-            tool_response = f"Here are some events I found:\n\n{formatted}\n\n" \
-                          f"Present these naturally and enthusiastically. Mention the most exciting ones first!"
-            
-            logger.info(f"✅ Tool returning to LLM ({len(tool_response)} chars)")
-            logger.info(f"📝 Tool response preview:\n{tool_response[:500]}...")
-            
-            return tool_response
+        # Cancel status update since we got results
+        status_task.cancel()
+        
+        # Log raw API response
+        logger.info(f"📦 Linkup API response keys: {list(data.keys())}")
+        logger.info(f"📦 Number of results: {len(data.get('results', []))}")
+        
+        # Parse results
+        if not data.get("results"):
+            logger.warning("❌ No results found in API response")
+            return "I couldn't find any events matching that search. Want to try something different?"
+        
+        # Compact, ranked summary for the LLM; links go to the frontend instead
+        tool_response, events = process_results(data["results"], search_query)
+        for i, event in enumerate(events, 1):
+            logger.info(f"  Result {i}: {event.title} (score {event.score:.2f})")
+            logger.info(f"    URL: {event.url}")
+        publish_event_links(search_query, events)
+        
+        logger.info(
+            f"✅ Tool returning to LLM ({len(tool_response)} chars, "
+            f"{len(events)}/{len(data['results'])} results)"
+        )
+        logger.info(f"📝 Tool response:\n{tool_response}")
+        
+        return tool_response
+    
+    except ToolError:
+        status_task.cancel()
+        raise
+    
+    except LinkupUnavailable as e:
+        logger.error(f"❌ Linkup unavailable: {e}")
+        status_task.cancel()
+        raise ToolError("Having trouble finding events right now - can you try again in a moment?")
     
     except httpx.HTTPError as e:
         logger.error(f"❌ Linkup API HTTP error: {e}")
@@ -0,0 +1,137 @@
+"""
+In-memory NumPy vector index for Buddy's knowledge base.
+
+The knowledge base is small enough that exact search over a float32 matrix is
+faster than going through Chroma's SQLite + HNSW stack. The embeddings are
+exported once to a .npy file and memory-mapped, so every job process on a host
+shares the same page-cache copy.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("rag")
+
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+
+
+class NumpyVectorIndex:
+    """
+    Exact top-k search over a memory-mapped embedding matrix.
+
+    Exposes the subset of the Chroma collection API that BuddyRAG uses
+    (count() and query(query_embeddings=..., n_results=...)), so it can be
+    swapped in for a collection without touching the retrieval code.
+    """
+
+    def __init__(self, index_dir: Path):
+        """
+        Args:
+            index_dir: Directory written by export_collection()
+        """
+        self.index_dir = Path(index_dir)
+        # Rows are unit-normalized at export time, so a dot product is cosine similarity
+        self.embeddings = np.load(self.index_dir / EMBEDDINGS_FILE, mmap_mode="r")
+
+        with open(self.index_dir / CHUNKS_FILE, encoding="utf-8") as f:
+            chunks = json.load(f)
+        self.ids: list[str] = chunks["ids"]
+        self.documents: list[str] = chunks["documents"]
+        self.metadatas: list[dict[str, Any]] = chunks["metadatas"]
+
+        if len(self.ids) != self.embeddings.shape[0]:
+            raise ValueError(
+                f"Index at {self.index_dir} is inconsistent: "
+                f"{len(self.ids)} chunks but {self.embeddings.shape[0]} embeddings"
+            )
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 3,
+        **_: Any,
+    ) -> dict[str, list]:
+        """
+        Return the n_results nearest chunks for each query embedding.
+
+        Distances are squared L2 between unit vectors (2 - 2·cos), which matches
+        what Chroma's default "l2" space reports for normalized embeddings.
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        k = min(n_results, self.count())
+        results: dict[str, list] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        for similarities in queries @ self.embeddings.T:
+            if k == 0:
+                top = np.empty(0, dtype=np.int64)
+            elif k < len(similarities):
+                top = np.argpartition(-similarities, k - 1)[:k]
+                top = top[np.argsort(-similarities[top])]
+            else:
+                top = np.argsort(-similarities)
+
+            results["ids"].append([self.ids[i] for i in top])
+            results["documents"].append([self.documents[i] for i in top])
+            results["metadatas"].append([self.metadatas[i] for i in top])
+            results["distances"].append([float(2 - 2 * similarities[i]) for i in top])
+
+        return results
+
+
+def export_collection(collection: Any, index_dir: Path) -> Path:
+    """
+    Export a Chroma collection's embeddings and chunks for NumpyVectorIndex.
+
+    Files are written to temporary names and renamed into place, so running
+    agents never memory-map a half-written matrix.
+
+    Args:
+        collection: Chroma collection to export
+        index_dir: Destination directory
+
+    Returns:
+        Path to the exported embeddings file
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+    if embeddings.size:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1, norms)
+
+    embeddings_path = index_dir / EMBEDDINGS_FILE
+    chunks_path = index_dir / CHUNKS_FILE
+    tmp_embeddings = index_dir / f".{EMBEDDINGS_FILE}.tmp"
+    tmp_chunks = index_dir / f".{CHUNKS_FILE}.tmp"
+
+    with open(tmp_embeddings, "wb") as f:
+        np.save(f, embeddings)
+    with open(tmp_chunks, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "ids": data["ids"],
+                "documents": data["documents"],
+                "metadatas": [meta or {} for meta in data["metadatas"]],
+            },
+            f,
+        )
+
+    # Chunks first: a reader that sees the new matrix must also see the new chunks
+    tmp_chunks.replace(chunks_path)
+    tmp_embeddings.replace(embeddings_path)
+
+    logger.info(f"Exported {len(data['ids'])} embeddings to {embeddings_path}")
+    return embeddings_path
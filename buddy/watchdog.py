@@ -0,0 +1,166 @@
+"""
+Event-loop watchdog for the agent process.
+
+Audio frames, VAD, the turn detector and tool calls all share one asyncio
+loop, so any synchronous call on it (a sync BuddyRAG query, a big JSON parse)
+comes out as choppy audio with nothing in the logs. The watchdog has two
+parts:
+
+- a heartbeat task on the loop that measures how late it wakes up and feeds
+  the "loop_lag" histogram in buddy/telemetry.py, so lag is exported next to
+  the turn stages, and the job's load report (buddy/load.py) through on_lag
+- a thread that notices when the heartbeat stops for longer than
+  BUDDY_WATCHDOG_BLOCK_MS and captures the loop thread's stack while the
+  blocking call is still on it
+
+Stalls are logged with the job's log context fields (the room), and each
+blocking call site's full stack is logged once per process.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from buddy.telemetry import LOOP_LAG, latency
+
+logger = logging.getLogger("watchdog")
+
+WATCHDOG_ENABLED = os.getenv("BUDDY_WATCHDOG", "true").lower() in ("1", "true", "yes")
+# Heartbeat period; lag is how late each heartbeat fires
+WATCHDOG_INTERVAL_MS = float(os.getenv("BUDDY_WATCHDOG_INTERVAL_MS", "50"))
+# A loop that doesn't tick for this long is blocked; its stack is captured
+WATCHDOG_BLOCK_MS = float(os.getenv("BUDDY_WATCHDOG_BLOCK_MS", "100"))
+# Innermost frames kept from a captured stack
+STACK_DEPTH = 12
+
+
+@dataclass
+class WatchdogStats:
+    samples: int = 0
+    max_lag_ms: float = 0.0
+    stalls: int = 0
+    # Distinct call sites the loop was caught blocked in
+    blocking_sites: int = 0
+
+
+@dataclass
+class _Stall:
+    started_at: float
+    site: Optional[str] = None
+    stack: Optional[str] = None
+
+
+class LoopWatchdog:
+    """Samples event-loop lag and captures the stack of calls that block it."""
+
+    def __init__(
+        self,
+        context_fields: Optional[dict[str, Any]] = None,
+        interval_ms: float = WATCHDOG_INTERVAL_MS,
+        block_ms: float = WATCHDOG_BLOCK_MS,
+        on_lag: Optional[Callable[[float], None]] = None,
+    ):
+        # Usually ctx.log_context_fields; read at log time so later updates show up
+        self.context_fields = context_fields if context_fields is not None else {}
+        # Called with every lag sample, e.g. JobLoadReporter.record_lag
+        self.on_lag = on_lag
+        self.interval = interval_ms / 1000
+        self.block = block_ms / 1000
+        self.stats = WatchdogStats()
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._stall: Optional[_Stall] = None
+        self._seen_sites: set[str] = set()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start watching the running loop (call from a coroutine on it)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, daemon=True, name="buddy_loop_watchdog").start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - started - self.interval) * 1000)
+            with self._lock:
+                self._last_tick = now
+                stall, self._stall = self._stall, None
+            self.stats.samples += 1
+            self.stats.max_lag_ms = max(self.stats.max_lag_ms, lag_ms)
+            latency.observe(LOOP_LAG, lag_ms)
+            if self.on_lag is not None:
+                self.on_lag(lag_ms)
+            if stall is not None:
+                self._report(stall, lag_ms)
+
+    def _watch(self) -> None:
+        # Check a few times per threshold so the stack is caught mid-stall
+        while not self._stopped.wait(self.block / 4):
+            with self._lock:
+                if self._stall is not None or time.monotonic() - self._last_tick < self.interval + self.block:
+                    continue
+                stall = _Stall(started_at=self._last_tick)
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    frames = traceback.extract_stack(frame)[-STACK_DEPTH:]
+                    innermost = frames[-1]
+                    stall.site = f"{innermost.filename}:{innermost.lineno} in {innermost.name}"
+                    stall.stack = "".join(traceback.format_list(frames))
+                    del frame
+                self._stall = stall
+
+    def _report(self, stall: _Stall, lag_ms: float) -> None:
+        self.stats.stalls += 1
+        tags = " ".join(f"{key}={value}" for key, value in self.context_fields.items())
+        site = stall.site or "unknown"
+        if stall.stack is not None and site not in self._seen_sites:
+            # Full stack the first time a call site blocks, one line after that
+            self._seen_sites.add(site)
+            self.stats.blocking_sites += 1
+            logger.warning(
+                f"🐢 Event loop blocked for {lag_ms:.0f}ms ({tags}) at {site}\n{stall.stack.rstrip()}"
+            )
+        else:
+            logger.warning(f"🐢 Event loop blocked for {lag_ms:.0f}ms ({tags}) at {site}")
+
+
+_watchdog: Optional[LoopWatchdog] = None
+
+
+def start_watchdog(
+    context_fields: Optional[dict[str, Any]] = None,
+    on_lag: Optional[Callable[[float], None]] = None,
+) -> Optional[LoopWatchdog]:
+    """Start this process's watchdog (idempotent; call from the entrypoint)."""
+    global _watchdog
+    if not WATCHDOG_ENABLED:
+        return None
+    if _watchdog is None:
+        _watchdog = LoopWatchdog(context_fields, on_lag=on_lag)
+    else:
+        if context_fields is not None:
+            _watchdog.context_fields = context_fields
+        if on_lag is not None:
+            _watchdog.on_lag = on_lag
+    _watchdog.start()
+    return _watchdog
@@ -5,6 +5,8 @@ import { useSession } from '@/components/app/session-provider';
 import { useChatMessages } from '@/hooks/useChatMessages';
 import { ReceivedChatMessage } from '@livekit/components-react';
 import TranscriptPanel from '@/components/app/transcript/TranscriptPanel';
+import EventLinksPanel from '@/components/app/events/EventLinksPanel';
+import { useEventLinks } from '@/hooks/useEventLinks';
 
 // Define the simple message structure expected by the component rendering logic
 type SimpleTranscriptMessage = { speaker: 'user' | 'buddy', text: string };
@@ -21,6 +23,7 @@ export default function Home() {
   const isConnected = isSessionActive;
 
   const liveMessages = useChatMessages();
+  const eventLinks = useEventLinks();
 
   const transcript: SimpleTranscriptMessage[] = useMemo(() => {
     // Show initial welcome message if no connection is active and no live messages exist.
@@ -80,6 +83,11 @@ export default function Home() {
           hasLiveMessages={liveMessages.length > 0}
         />
 
+        {/* Links for the events Buddy talked about */}
+        {eventLinks && eventLinks.events.length > 0 && (
+          <EventLinksPanel query={eventLinks.query} events={eventLinks.events} />
+        )}
+
         {/* Connection Status */}
         <div className="mt-4 text-center">
           <div className={`inline-flex items-center gap-2 px-4 py-2 rounded-full text-sm ${
@@ -0,0 +1,47 @@
+'use client';
+
+import type { EventLink } from '@/hooks/useEventLinks';
+
+interface EventLinksPanelProps {
+  query: string;
+  events: EventLink[];
+}
+
+export default function EventLinksPanel({ query, events }: EventLinksPanelProps) {
+  return (
+    <div className="mt-6 bg-white rounded-2xl shadow-xl border border-gray-200 overflow-hidden">
+      {/* Header */}
+      <div className="bg-gradient-to-r from-orange-500 to-orange-600 px-6 py-4 text-white">
+        <h2 className="text-xl font-semibold flex items-center gap-2">
+          <span>🎟️</span>
+          Events Buddy Found
+        </h2>
+        <p className="text-sm opacity-80">{query}</p>
+      </div>
+
+      <ul className="divide-y divide-gray-100">
+        {events.map((event, index) => (
+          // Urls can be empty or repeat, so the index keeps keys unique
+          <li key={`${index}-${event.url}`} className="px-6 py-4">
+            {event.url ? (
+              <a
+                href={event.url}
+                target="_blank"
+                rel="noopener noreferrer"
+                className="font-semibold text-blue-700 hover:underline"
+              >
+                {event.title}
+              </a>
+            ) : (
+              <span className="font-semibold text-gray-900">{event.title}</span>
+            )}
+            <div className="text-xs text-gray-500 mt-1">
+              {[event.date, event.venue, event.neighborhood].filter(Boolean).join(' · ')}
+            </div>
+            {event.snippet && <p className="text-sm text-gray-700 mt-1">{event.snippet}</p>}
+          </li>
+        ))}
+      </ul>
+    </div>
+  );
+}
@@ -0,0 +1,34 @@
+import { useMemo } from 'react';
+import { useTextStream } from '@livekit/components-react';
+
+// Must match EVENT_LINKS_TOPIC in buddy/tools.py
+export const EVENT_LINKS_TOPIC = 'buddy.events';
+
+export type EventLink = {
+  title: string;
+  url: string;
+  snippet: string;
+  date: string | null;
+  venue: string | null;
+  neighborhood: string | null;
+};
+
+type EventLinksMessage = { query: string; events: EventLink[] };
+
+export function useEventLinks() {
+  // Buddy speaks the highlights; the links arrive separately on their own topic
+  const { textStreams } = useTextStream(EVENT_LINKS_TOPIC);
+
+  return useMemo(() => {
+    const latest = textStreams[textStreams.length - 1];
+    if (!latest) {
+      return null;
+    }
+    try {
+      return JSON.parse(latest.text) as EventLinksMessage;
+    } catch {
+      // Stream still arriving or malformed
+      return null;
+    }
+  }, [textStreams]);
+}
@@ -0,0 +1,107 @@
+"""
+Compare the legacy character chunker with the token-aware chunker.
+Reports chunking throughput, chunk size distribution in model tokens
+(and how many chunks the embedding model would truncate), and retrieval
+recall/MRR on the labeled queries in data/eval/rag_queries.json, using a
+throwaway in-memory Chroma collection per chunker.
+
+Usage:
+    python scripts/benchmark_chunking.py [--repeat=20] [--k=3]
+"""
+
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import chromadb
+
+from chunking import MODEL_MAX_TOKENS, load_token_counter
+from rag_eval import load_labeled_queries, mean, percentile, recall_at_k, reciprocal_rank
+from setup_vector_store import (
+    CHUNKER,
+    discover_sources,
+    extract_text_from_pdf,
+    iter_char_chunks,
+    iter_page_chunks,
+)
+
+
+def load_pages(data_dir: Path) -> List[Dict]:
+    pages = []
+    for path in discover_sources(data_dir):
+        source = path.relative_to(data_dir).as_posix()
+        if path.suffix.lower() == '.pdf':
+            docs = extract_text_from_pdf(path)
+        else:
+            docs = [{'text': path.read_text(encoding='utf-8'), 'page': 1}]
+        for doc in docs:
+            doc['source'] = source
+        pages.extend(docs)
+    return pages
+
+
+def run_chunker(chunker: Callable, pages: List[Dict], repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunks = [chunk for page in pages for chunk in chunker(page)]
+    elapsed = time.perf_counter() - start
+    return chunks, len(chunks) * repeat / elapsed
+
+
+def evaluate_recall(name: str, chunks: List[Dict], labels: List[Dict], k: int) -> tuple:
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench_{name.replace('-', '_')}")
+    unique = list({chunk['id']: chunk for chunk in chunks}.values())
+    collection.add(
+        documents=[chunk['text'] for chunk in unique],
+        metadatas=[{'page': chunk['page'], 'source': chunk['source']} for chunk in unique],
+        ids=[chunk['id'] for chunk in unique],
+    )
+
+    recalls, ranks = [], []
+    for label in labels:
+        results = collection.query(query_texts=[label['query']], n_results=k)
+        metadatas, ids = results['metadatas'][0], results['ids'][0]
+        recalls.append(recall_at_k(label, metadatas, ids, k))
+        ranks.append(reciprocal_rank(label, metadatas, ids))
+    return mean(recalls), mean(ranks)
+
+
+def main():
+    repeat = 20
+    k = 3
+    for arg in sys.argv[1:]:
+        if arg.startswith('--repeat='):
+            repeat = int(arg.split('=', 1)[1])
+        elif arg.startswith('--k='):
+            k = int(arg.split('=', 1)[1])
+
+    project_root = Path(__file__).parent.parent
+    pages = load_pages(project_root / 'data')
+    labels = load_labeled_queries()
+    count_tokens, tokenizer_name = load_token_counter()
+    print(f"🔤 Measuring sizes with {tokenizer_name} tokens (model limit {MODEL_MAX_TOKENS})\n")
+
+    chunkers = {
+        'chars-800-100 (before)': iter_char_chunks,
+        f'{CHUNKER} (after)': partial(iter_page_chunks, count_tokens=count_tokens),
+    }
+
+    for name, chunker in chunkers.items():
+        chunks, rate = run_chunker(chunker, pages, repeat)
+        sizes = [count_tokens(chunk['text']) for chunk in chunks]
+        truncated = sum(1 for size in sizes if size > MODEL_MAX_TOKENS)
+        recall, mrr = evaluate_recall(name.split()[0], chunks, labels, k)
+
+        print(f"✂️  {name}")
+        print(f"   {len(chunks)} chunks | {rate:,.0f} chunks/sec")
+        print(f"   tokens: min {min(sizes)} | p50 {percentile(sizes, 50)} | "
+              f"p95 {percentile(sizes, 95)} | max {max(sizes)} | mean {mean(sizes):.0f}")
+        print(f"   truncated by model: {truncated} ({truncated / len(chunks):.0%})")
+        print(f"   recall@{k}: {recall:.2f} | MRR: {mrr:.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
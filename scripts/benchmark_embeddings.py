@@ -0,0 +1,178 @@
+"""
+Benchmark the shared embedding server against in-process embedding.
+
+Simulates a worker host: --processes separate processes (like LiveKit job
+processes), each with --threads sessions embedding single RAG queries back to
+back for --seconds. Runs twice:
+
+- local: every process loads its own copy of the model
+- server: one scripts/embedding_server.py on a Unix socket, processes send
+  their queries to it and it micro-batches them
+
+and reports embedding throughput, per-query latency, mean batch size and the
+host's total RSS (every client process, plus the server).
+
+Usage:
+    python scripts/benchmark_embeddings.py [--processes=8] [--threads=2] [--seconds=10]
+        [--window-ms=5] [--output=embeddings.json]
+"""
+
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.embedding_service import SharedEmbeddingFunction, local_embedding_model
+from rag_eval import load_labeled_queries, mean, percentile
+
+SERVER_SCRIPT = Path(__file__).parent / 'embedding_server.py'
+SERVER_START_TIMEOUT = 120.0
+
+
+def rss_mb(pid: int) -> float:
+    """Resident set size of a process (Linux)."""
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _client_process(mode: str, socket_path: str, threads: int, seconds: float,
+                    queries: List[str], results: multiprocessing.Queue) -> None:
+    embed = SharedEmbeddingFunction(Path(socket_path)) if mode == "server" else local_embedding_model()
+    embed(["warm up"])
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def _session(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            embed([queries[i % len(queries)]])
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+            i += 1
+
+    workers = [threading.Thread(target=_session, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    stats = getattr(embed, "stats", None)
+    results.put({
+        "latencies_ms": latencies,
+        "rss_mb": rss_mb(os.getpid()),
+        "fallbacks": stats.local - 1 if stats is not None else 0,
+    })
+
+
+def run_mode(mode: str, processes: int, threads: int, seconds: float,
+             window_ms: float, queries: List[str]) -> Dict:
+    socket_path = Path(tempfile.gettempdir()) / f"buddy-embeddings-bench-{os.getpid()}.sock"
+    server = None
+    if mode == "server":
+        server = subprocess.Popen(
+            [sys.executable, str(SERVER_SCRIPT), f"--socket={socket_path}", f"--window-ms={window_ms}"],
+            stdout=subprocess.DEVNULL,
+        )
+        started = time.perf_counter()
+        while not socket_path.exists():
+            if server.poll() is not None or time.perf_counter() - started > SERVER_START_TIMEOUT:
+                raise RuntimeError("Embedding server didn't start")
+            time.sleep(0.1)
+
+    try:
+        # Fresh interpreters, like LiveKit's job processes
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        clients = [
+            ctx.Process(target=_client_process, args=(mode, str(socket_path), threads, seconds, queries, results))
+            for _ in range(processes)
+        ]
+        for client in clients:
+            client.start()
+        reports = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+        server_rss = rss_mb(server.pid) if server is not None else 0.0
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = [ms for report in reports for ms in report["latencies_ms"]]
+    client_rss = sum(report["rss_mb"] for report in reports)
+    return {
+        "mode": mode,
+        "queries": len(latencies),
+        "throughput_qps": round(len(latencies) / seconds, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "mean": round(mean(latencies), 2),
+        },
+        "rss_mb": {
+            "clients": round(client_rss, 1),
+            "per_client": round(client_rss / processes, 1),
+            "server": round(server_rss, 1),
+            "host": round(client_rss + server_rss, 1),
+        },
+        "fallbacks": sum(report["fallbacks"] for report in reports),
+    }
+
+
+def main():
+    processes = 8
+    threads = 2
+    seconds = 10.0
+    window_ms = 5.0
+    output = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--processes='):
+            processes = int(arg.split('=', 1)[1])
+        elif arg.startswith('--threads='):
+            threads = int(arg.split('=', 1)[1])
+        elif arg.startswith('--seconds='):
+            seconds = float(arg.split('=', 1)[1])
+        elif arg.startswith('--window-ms='):
+            window_ms = float(arg.split('=', 1)[1])
+        elif arg.startswith('--output='):
+            output = Path(arg.split('=', 1)[1])
+
+    queries = [label["query"] for label in load_labeled_queries()]
+    print(f"🐕 Benchmarking query embedding: {processes} processes × {threads} sessions, {seconds:.0f}s each\n")
+
+    results = []
+    for mode in ("local", "server"):
+        result = run_mode(mode, processes, threads, seconds, window_ms, queries)
+        results.append(result)
+        latency, rss = result["latency_ms"], result["rss_mb"]
+        print(f"🧮 {mode:<7} {result['throughput_qps']:8.1f} queries/s | p50 {latency['p50']:6.1f}ms | "
+              f"p95 {latency['p95']:6.1f}ms | host RSS {rss['host']:7.1f} MB "
+              f"({rss['per_client']:.1f} MB per process + {rss['server']:.1f} MB server)")
+        if result["fallbacks"]:
+            print(f"   ⚠️  {result['fallbacks']} queries fell back to the local model")
+
+    if output is not None:
+        output.write_text(json.dumps({
+            "processes": processes,
+            "threads": threads,
+            "seconds": seconds,
+            "window_ms": window_ms,
+            "modes": results,
+        }, indent=2))
+        print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark hybrid BM25 + vector retrieval against the vector-only path.
+
+Runs the labeled queries (data/eval/rag_queries.json) through BuddyRAG in
+three modes, with the query cache off so every call does real work:
+
+- vector: embedding + vector search only
+- hybrid: vector and BM25 results fused with reciprocal rank fusion
+- hybrid+fast: as hybrid, but confident BM25 matches skip the embedding
+
+and reports latency, recall@k, MRR and how often the fast path was taken.
+
+Usage:
+    python scripts/setup_vector_store.py   # builds the BM25 index too
+    python scripts/benchmark_hybrid.py [--k=3] [--iterations=5] [--output=hybrid.json]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.rag import BuddyRAG
+from rag_eval import load_labeled_queries, mean, percentile, recall_at_k, reciprocal_rank
+
+MODES = {
+    "vector": {"hybrid": False},
+    # Coverage can't exceed 1, so the fast path never fires
+    "hybrid": {"hybrid": True, "lexical_confidence": 2.0},
+    "hybrid+fast": {"hybrid": True},
+}
+
+
+def benchmark_mode(name: str, options: Dict, labels: List[Dict], k: int, iterations: int) -> Dict:
+    rag = BuddyRAG(top_k=k, **options)
+    # Measure retrieval, not the cache
+    rag.cache = None
+    if options["hybrid"] and rag.lexical is None:
+        raise FileNotFoundError("No BM25 index found, run 'python scripts/setup_vector_store.py' first")
+
+    # Warm up the embedding model so the first timed query isn't an outlier
+    rag.retrieve_chunks("warm up", top_k=k)
+    rag.stats.lexical_fast_path = 0
+
+    recalls, ranks, latencies = [], [], []
+    for iteration in range(iterations):
+        for label in labels:
+            start = time.perf_counter()
+            chunks = rag.retrieve_chunks(label["query"], top_k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if iteration == 0:
+                metadatas = [{"page": chunk.page} for chunk in chunks]
+                ids = [chunk.id for chunk in chunks]
+                recalls.append(recall_at_k(label, metadatas, ids, k))
+                ranks.append(reciprocal_rank(label, metadatas, ids))
+
+    return {
+        "mode": name,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "mean": round(mean(latencies), 3),
+        },
+        "recall_at_k": round(mean(recalls), 4),
+        "mrr": round(mean(ranks), 4),
+        "fast_path_rate": round(rag.stats.lexical_fast_path / len(latencies), 4),
+    }
+
+
+def main():
+    k = 3
+    iterations = 5
+    output = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--k='):
+            k = int(arg.split('=', 1)[1])
+        elif arg.startswith('--iterations='):
+            iterations = int(arg.split('=', 1)[1])
+        elif arg.startswith('--output='):
+            output = Path(arg.split('=', 1)[1])
+
+    labels = load_labeled_queries()
+    print(f"🐕 Benchmarking hybrid retrieval: {len(labels)} queries × {iterations} iterations, k={k}\n")
+
+    results = []
+    for name, options in MODES.items():
+        result = benchmark_mode(name, options, labels, k, iterations)
+        results.append(result)
+        latency = result["latency_ms"]
+        print(f"🔍 {name:<12} p50 {latency['p50']:7.2f}ms | p95 {latency['p95']:7.2f}ms | "
+              f"recall@{k} {result['recall_at_k']:.3f} | MRR {result['mrr']:.3f} | "
+              f"fast path {result['fast_path_rate']:.0%}")
+
+    if output is not None:
+        output.write_text(json.dumps({"k": k, "iterations": iterations, "modes": results}, indent=2))
+        print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark the Linkup client (buddy/linkup.py) against the old single request.
+
+Runs searches at a steady rate against a simulated Linkup whose latency has a
+heavy tail (most answers around --median-ms, --slow-rate of them 3-8s) and
+which fails --error-rate of requests with a 503. Each scenario runs twice:
+
+- single: one request with the old flat 10s timeout
+- client: LinkupClient (deadline, hedging at p95, retries, circuit breaker)
+
+Scenarios:
+
+- healthy: the latency distribution above
+- outage: every request hangs until it times out, as when Linkup is down
+
+It reports search latency (p50/p95/p99/max), failed searches, Linkup requests
+per search (what the API bill sees), hedges and their win rate, retries and
+searches rejected by the open breaker.
+
+Usage:
+    python scripts/benchmark_linkup.py [--seconds=10] [--rate=40] [--median-ms=800]
+        [--slow-rate=0.05] [--error-rate=0.01] [--output=linkup.json]
+"""
+
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.linkup import LinkupClient
+from buddy.telemetry import latency
+from rag_eval import mean, percentile
+
+OLD_TIMEOUT = 10.0
+SCENARIOS = ("healthy", "outage")
+
+
+class SimulatedLinkup:
+    """Fetch function with Linkup-like latency and failures, counting requests."""
+
+    def __init__(self, median_ms: float, slow_rate: float, error_rate: float, outage: bool, seed: int = 7):
+        self.median = median_ms / 1000
+        self.slow_rate = slow_rate
+        self.error_rate = error_rate
+        self.outage = outage
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    async def fetch(self, query: str, timeout: float) -> dict:
+        self.requests += 1
+        request = httpx.Request("POST", "https://api.linkup.so/v1/search")
+        if self.outage:
+            seconds = float("inf")
+        elif self.random.random() < self.slow_rate:
+            seconds = self.random.uniform(3.0, 8.0)
+        else:
+            seconds = self.median * self.random.lognormvariate(0, 0.35)
+        if seconds > timeout:
+            await asyncio.sleep(timeout)
+            raise httpx.ReadTimeout("timed out", request=request)
+        await asyncio.sleep(seconds)
+        if self.random.random() < self.error_rate:
+            raise httpx.HTTPStatusError("503", request=request, response=httpx.Response(503, request=request))
+        return {"results": [{"name": query}]}
+
+
+async def run_mode(mode: str, scenario: str, options: Dict) -> Dict:
+    latency.reset()
+    upstream = SimulatedLinkup(options["median_ms"], options["slow_rate"], options["error_rate"],
+                               outage=scenario == "outage")
+    client = LinkupClient(upstream.fetch)
+    search = client.search if mode == "client" else (lambda query: upstream.fetch(query, OLD_TIMEOUT))
+
+    latencies: List[float] = []
+    failures = 0
+
+    async def _one(i: int) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            await search(f"events {i}")
+        except Exception:
+            failures += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    searches = int(options["seconds"] * options["rate"])
+    tasks = []
+    for i in range(searches):
+        tasks.append(asyncio.create_task(_one(i)))
+        await asyncio.sleep(1 / options["rate"])
+    await asyncio.gather(*tasks)
+
+    stats = client.stats
+    return {
+        "mode": mode,
+        "scenario": scenario,
+        "searches": searches,
+        "failed": failures,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1),
+            "mean": round(mean(latencies), 1),
+        },
+        "requests_per_search": round(upstream.requests / searches, 3),
+        "hedges": stats.hedges,
+        "hedge_win_rate": round(stats.hedge_win_rate, 3),
+        "retries": stats.retries,
+        "rejected": stats.rejected,
+        "breaker_trips": stats.breaker_trips,
+    }
+
+
+async def main():
+    options = {"seconds": 10.0, "rate": 40.0, "median_ms": 800.0, "slow_rate": 0.05, "error_rate": 0.01}
+    output = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--seconds='):
+            options["seconds"] = float(arg.split('=', 1)[1])
+        elif arg.startswith('--rate='):
+            options["rate"] = float(arg.split('=', 1)[1])
+        elif arg.startswith('--median-ms='):
+            options["median_ms"] = float(arg.split('=', 1)[1])
+        elif arg.startswith('--slow-rate='):
+            options["slow_rate"] = float(arg.split('=', 1)[1])
+        elif arg.startswith('--error-rate='):
+            options["error_rate"] = float(arg.split('=', 1)[1])
+        elif arg.startswith('--output='):
+            output = Path(arg.split('=', 1)[1])
+
+    print(f"🐕 Benchmarking Linkup searches: {options['rate']:.0f}/s for {options['seconds']:.0f}s, "
+          f"median {options['median_ms']:.0f}ms, {options['slow_rate']:.0%} slow, {options['error_rate']:.0%} errors\n")
+
+    results = []
+    for scenario in SCENARIOS:
+        for mode in ("single", "client"):
+            result = await run_mode(mode, scenario, options)
+            results.append(result)
+            ms = result["latency_ms"]
+            print(f"🔎 {scenario:<8} {mode:<7} p50 {ms['p50']:6.0f}ms | p95 {ms['p95']:6.0f}ms | "
+                  f"p99 {ms['p99']:6.0f}ms | max {ms['max']:6.0f}ms | failed {result['failed']:3d} | "
+                  f"{result['requests_per_search']:.2f} requests/search")
+            if mode == "client":
+                print(f"   hedges {result['hedges']} (won {result['hedge_win_rate']:.0%}) | "
+                      f"retries {result['retries']} | breaker trips {result['breaker_trips']} | "
+                      f"rejected {result['rejected']}")
+
+    if output is not None:
+        output.write_text(json.dumps({"options": options, "results": results}, indent=2))
+        print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Benchmark the Chroma and NumPy retrieval backends against each other.
+Reports open time, search-only and end-to-end query latency, and how often
+both backends return the same top-k chunks.
+
+Usage:
+    python scripts/setup_vector_store.py --export-numpy   # once
+    python scripts/benchmark_rag_backends.py [--iterations=200] [--k=3]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.rag import BuddyRAG
+
+QUERIES = [
+    "What is Buddy's backstory?",
+    "Tell me about the Mission District",
+    "What events are happening in November?",
+    "What's Buddy's personality like?",
+    "Tell me about outdoor activities in SF",
+    "Why do you want me to go outside?",
+    "Have you been to Ocean Beach?",
+    "Tell me a story about someone you helped",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples_ms: List[float]) -> str:
+    return (
+        f"p50 {percentile(samples_ms, 50):7.3f}ms | "
+        f"p95 {percentile(samples_ms, 95):7.3f}ms | "
+        f"mean {statistics.mean(samples_ms):7.3f}ms"
+    )
+
+
+def open_backend(backend: str) -> tuple:
+    start = time.perf_counter()
+    rag = BuddyRAG(backend=backend)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    # Measure the backends, not the cache
+    rag.cache = None
+    return rag, elapsed_ms
+
+
+def benchmark(iterations: int, k: int):
+    print("🐕 Benchmarking RAG backends\n")
+
+    backends: Dict[str, BuddyRAG] = {}
+    for name in ("chroma", "numpy"):
+        rag, open_ms = open_backend(name)
+        backends[name] = rag
+        print(f"⏱️  {name:<6} open: {open_ms:8.1f}ms ({rag.collection.count()} chunks)")
+    print()
+
+    # Embed once so search-only timings exclude the (shared) embedding cost
+    embedder = backends["chroma"].embedding_function
+    embeddings = [embedder([q])[0] for q in QUERIES]
+
+    top_ids: Dict[str, List[List[str]]] = {}
+    for name, rag in backends.items():
+        search_ms, e2e_ms = [], []
+        ids = []
+        for i in range(iterations):
+            embedding = embeddings[i % len(QUERIES)]
+            start = time.perf_counter()
+            results = rag.collection.query(query_embeddings=[embedding], n_results=k)
+            search_ms.append((time.perf_counter() - start) * 1000)
+            if i < len(QUERIES):
+                ids.append(results["ids"][0])
+
+        for i in range(iterations):
+            start = time.perf_counter()
+            rag.retrieve(QUERIES[i % len(QUERIES)], top_k=k)
+            e2e_ms.append((time.perf_counter() - start) * 1000)
+
+        top_ids[name] = ids
+        print(f"🔍 {name:<6} search-only: {summarize(search_ms)}")
+        print(f"🔍 {name:<6} end-to-end:  {summarize(e2e_ms)}")
+    print()
+
+    # HNSW is approximate; the NumPy index is exact
+    overlaps = [
+        len(set(a) & set(b)) / k
+        for a, b in zip(top_ids["chroma"], top_ids["numpy"])
+    ]
+    print(f"🤝 Top-{k} agreement: {statistics.mean(overlaps):.0%}")
+
+
+def main():
+    iterations = 200
+    k = 3
+    for arg in sys.argv[1:]:
+        if arg.startswith('--iterations='):
+            iterations = int(arg.split('=', 1)[1])
+        elif arg.startswith('--k='):
+            k = int(arg.split('=', 1)[1])
+
+    benchmark(iterations=iterations, k=k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark the turn router (buddy/router.py) on labeled transcripts.
+
+Classifies the labeled turns of two sets and reports, for each, accuracy, a
+confusion matrix, classification time, and what the routing is worth per turn:
+
+- dev (data/eval/turn_routes.json): written alongside the router's word lists,
+  so it mostly shows the rules do what they were written to do
+- held-out (data/eval/turn_routes_heldout.json): written separately and never
+  used to tune the rules, including small talk that mentions events or places.
+  This is the estimate to trust; don't tune the router on it
+
+- small talk routed correctly skips a RAG retrieval (--rag-ms)
+- events routed correctly start the search one LLM round trip earlier
+  (--llm-ms, end of speech to the tool call)
+- knowledge misrouted as small talk loses its context, and non-event turns
+  misrouted as events waste a search; both are counted
+
+Usage:
+    python scripts/benchmark_router.py [--rag-ms=150] [--llm-ms=600] [--output=router.json]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.router import EVENTS, KNOWLEDGE, ROUTES, SMALL_TALK, TurnRouter
+from rag_eval import mean, percentile
+
+EVAL_DIR = Path(__file__).parent.parent / 'data' / 'eval'
+EVAL_SETS = {
+    "dev": EVAL_DIR / 'turn_routes.json',
+    "held-out": EVAL_DIR / 'turn_routes_heldout.json',
+}
+# Classifications per turn for the timing numbers
+TIMING_ITERATIONS = 200
+
+
+def evaluate(turns: list[dict], rag_ms: float, llm_ms: float) -> dict:
+    """Route every labeled turn and score the decisions."""
+    router = TurnRouter()
+    confusion = {expected: dict.fromkeys(ROUTES, 0) for expected in ROUTES}
+    misses = []
+    for turn in turns:
+        decision = router.classify(turn['text'])
+        confusion[turn['route']][decision.route] += 1
+        if decision.route != turn['route']:
+            misses.append({"text": turn['text'], "expected": turn['route'], "got": decision.route})
+
+    timings_us = []
+    for turn in turns:
+        start = time.perf_counter()
+        for _ in range(TIMING_ITERATIONS):
+            router.classify(turn['text'])
+        timings_us.append((time.perf_counter() - start) / TIMING_ITERATIONS * 1e6)
+
+    correct = sum(confusion[route][route] for route in ROUTES)
+    per_route = {}
+    for route in ROUTES:
+        labeled = sum(confusion[route].values())
+        predicted = sum(confusion[expected][route] for expected in ROUTES)
+        per_route[route] = {
+            "labeled": labeled,
+            "recall": round(confusion[route][route] / labeled, 3) if labeled else 0.0,
+            "precision": round(confusion[route][route] / predicted, 3) if predicted else 0.0,
+        }
+
+    saved = {
+        SMALL_TALK: confusion[SMALL_TALK][SMALL_TALK] * rag_ms,
+        EVENTS: confusion[EVENTS][EVENTS] * llm_ms,
+    }
+    return {
+        "turns": len(turns),
+        "correct": correct,
+        "accuracy": round(correct / len(turns), 4),
+        "per_route": per_route,
+        "confusion": confusion,
+        "classify_us": {
+            "p50": round(percentile(timings_us, 50), 2),
+            "p99": round(percentile(timings_us, 99), 2),
+            "mean": round(mean(timings_us), 2),
+        },
+        "savings_ms": {
+            "small_talk_per_turn": round(saved[SMALL_TALK] / per_route[SMALL_TALK]["labeled"], 1),
+            "events_per_turn": round(saved[EVENTS] / per_route[EVENTS]["labeled"], 1),
+            "mean_per_turn": round(sum(saved.values()) / len(turns), 1),
+        },
+        "costs": {
+            "knowledge_lost": confusion[KNOWLEDGE][SMALL_TALK] + confusion[EVENTS][SMALL_TALK],
+            "wasted_searches": confusion[SMALL_TALK][EVENTS] + confusion[KNOWLEDGE][EVENTS],
+        },
+        "misses": misses,
+    }
+
+
+def print_results(name: str, path: Path, results: dict) -> None:
+    print(f"📋 {name} ({path.name}): accuracy {results['accuracy']:.1%} "
+          f"({results['correct']}/{results['turns']})")
+    for route, stats in results["per_route"].items():
+        print(f"   {route:<11} precision {stats['precision']:.2f} | recall {stats['recall']:.2f} | "
+              f"{stats['labeled']} labeled")
+    confusion = results["confusion"]
+    print("\n   confusion (rows labeled, columns routed):")
+    print("   " + " " * 12 + "".join(f"{route:>12}" for route in ROUTES))
+    for expected in ROUTES:
+        print(f"   {expected:<12}" + "".join(f"{confusion[expected][route]:>12}" for route in ROUTES))
+    timing = results["classify_us"]
+    print(f"\n⏱️  classify: p50 {timing['p50']:.1f}µs | p99 {timing['p99']:.1f}µs")
+    savings = results["savings_ms"]
+    print(f"⚡ saved per small-talk turn ~{savings['small_talk_per_turn']:.0f}ms (RAG skipped), "
+          f"per event turn ~{savings['events_per_turn']:.0f}ms (search starts before the tool call), "
+          f"~{savings['mean_per_turn']:.0f}ms per turn overall")
+    costs = results["costs"]
+    print(f"⚠️  {costs['knowledge_lost']} turns lost RAG context, {costs['wasted_searches']} wasted searches")
+    for miss in results["misses"]:
+        print(f"   ✗ {miss['text']!r}: {miss['expected']} -> {miss['got']}")
+    print()
+
+
+def main():
+    rag_ms = 150.0
+    llm_ms = 600.0
+    output = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--rag-ms='):
+            rag_ms = float(arg.split('=', 1)[1])
+        elif arg.startswith('--llm-ms='):
+            llm_ms = float(arg.split('=', 1)[1])
+        elif arg.startswith('--output='):
+            output = Path(arg.split('=', 1)[1])
+
+    results = {}
+    for name, path in EVAL_SETS.items():
+        with open(path, encoding='utf-8') as f:
+            turns = json.load(f)['turns']
+        results[name] = evaluate(turns, rag_ms, llm_ms)
+        print_results(name, path, results[name])
+
+    dev, held_out = results["dev"], results["held-out"]
+    print(f"🐕 Router accuracy: {held_out['accuracy']:.1%} held-out "
+          f"(vs {dev['accuracy']:.1%} on the turns written with the rules)")
+
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
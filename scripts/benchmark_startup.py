@@ -0,0 +1,241 @@
+"""
+Benchmark the worker's cold start.
+
+Imports: in a fresh interpreter, runs buddy/main.py's module-level import
+statements one at a time, in its order, and reports what each one adds, then
+the modules main.py defers (RAG). Read straight from main.py, so a new heavy
+import shows up here without editing this script.
+
+Spawn to ready: starts job processes the way LiveKit's worker does (its
+ProcJobExecutor running main.prewarm) and times each one from spawn until it
+is ready for a job, in three modes, each in its own interpreter:
+
+- spawn: a fresh interpreter per process (LiveKit's default off Linux)
+- forkserver: LiveKit's default on Linux, forked with the plugins preloaded
+- fast-start: forkserver plus buddy.preload (BUDDY_FAST_START, the default)
+
+The first process of a forkserver mode includes booting the forkserver.
+Processes stay up until all are measured, so the reported PSS shows how much
+memory they share.
+
+Usage:
+    python scripts/benchmark_startup.py [--processes=4] [--repeat=3]
+        [--modes=spawn,forkserver,fast-start] [--output=startup.json]
+"""
+
+import ast
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_eval import mean, percentile
+
+MAIN_PATH = Path(__file__).parent.parent / 'buddy' / 'main.py'
+MODES = ("spawn", "forkserver", "fast-start")
+INITIALIZE_TIMEOUT = 120.0
+
+
+def main_imports() -> List[tuple]:
+    """(module, names, statement) for each module-level import in buddy/main.py, in order."""
+    source = MAIN_PATH.read_text()
+    imports = []
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Import):
+            module, names = ", ".join(alias.name for alias in node.names), []
+        elif isinstance(node, ast.ImportFrom):
+            module, names = node.module, [alias.asname or alias.name for alias in node.names]
+        else:
+            continue
+        imports.append((module, names, ast.get_source_segment(source, node)))
+    return imports
+
+
+def pss_mb(pid: int) -> float:
+    """Proportional set size (shared pages split between their users), Linux."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure_imports() -> Dict:
+    """Runs in a fresh interpreter: what each of main.py's imports adds."""
+    import importlib
+
+    timings = {}
+    started = time.perf_counter()
+    for module, names, statement in main_imports():
+        namespace = {}
+        step = time.perf_counter()
+        exec(statement, namespace)
+        elapsed = (time.perf_counter() - step) * 1000
+        # `from livekit.plugins import openai` imports the openai plugin package
+        if len(names) == 1 and isinstance(namespace[names[0]], types.ModuleType):
+            module = f"{module}.{names[0]}"
+        timings[module] = elapsed
+    step = time.perf_counter()
+    importlib.import_module("buddy.main")
+    timings["buddy.main (module body)"] = (time.perf_counter() - step) * 1000
+    total = (time.perf_counter() - started) * 1000
+
+    from buddy.main import RAG_MODULES
+
+    deferred = {}
+    for name in RAG_MODULES:
+        step = time.perf_counter()
+        importlib.import_module(name)
+        deferred[name] = (time.perf_counter() - step) * 1000
+    return {"imports_ms": timings, "total_ms": total, "deferred_ms": deferred}
+
+
+async def time_processes(mode: str, processes: int) -> Dict:
+    """Runs in a fresh interpreter: spawn-to-ready of LiveKit job processes."""
+    import multiprocessing
+
+    from livekit.agents import Plugin
+    from livekit.agents.ipc.job_proc_executor import ProcJobExecutor
+
+    from buddy.fast_start import register_fast_start
+    from buddy.main import entrypoint, prewarm
+
+    if mode == "spawn":
+        ctx = multiprocessing.get_context("spawn")
+    else:
+        if mode == "fast-start":
+            register_fast_start()
+        ctx = multiprocessing.get_context("forkserver")
+        # What LiveKit's worker preloads
+        ctx.set_forkserver_preload([plugin.package for plugin in Plugin.registered_plugins] + ["av"])
+
+    loop = asyncio.get_running_loop()
+    executors = []
+    ready_ms = []
+    pss = []
+    try:
+        for _ in range(processes):
+            executor = ProcJobExecutor(
+                initialize_process_fnc=prewarm,
+                job_entrypoint_fnc=entrypoint,
+                inference_executor=None,
+                initialize_timeout=INITIALIZE_TIMEOUT,
+                close_timeout=10.0,
+                memory_warn_mb=0,
+                memory_limit_mb=0,
+                ping_interval=2.5,
+                ping_timeout=60.0,
+                high_ping_threshold=0.5,
+                http_proxy=None,
+                mp_ctx=ctx,
+                loop=loop,
+            )
+            started = time.perf_counter()
+            await executor.start()
+            executors.append(executor)
+            await executor.initialize()
+            ready_ms.append((time.perf_counter() - started) * 1000)
+        pss = [pss_mb(executor.pid) for executor in executors]
+    finally:
+        for executor in executors:
+            await executor.aclose()
+    return {"ready_ms": ready_ms, "pss_mb": pss}
+
+
+def run_child(args: List[str]) -> Dict:
+    """Run this script in a fresh interpreter and read back its JSON result."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = Path(f.name)
+    try:
+        subprocess.run(
+            [sys.executable, __file__, *args, f"--result-file={result_path}"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        return json.loads(result_path.read_text())
+    finally:
+        result_path.unlink(missing_ok=True)
+
+
+def main():
+    processes = 4
+    repeat = 3
+    modes = list(MODES)
+    output = None
+    child = None
+    result_file = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--processes='):
+            processes = int(arg.split('=', 1)[1])
+        elif arg.startswith('--repeat='):
+            repeat = int(arg.split('=', 1)[1])
+        elif arg.startswith('--modes='):
+            modes = arg.split('=', 1)[1].split(',')
+        elif arg.startswith('--output='):
+            output = Path(arg.split('=', 1)[1])
+        elif arg.startswith('--child='):
+            child = arg.split('=', 1)[1]
+        elif arg.startswith('--result-file='):
+            result_file = Path(arg.split('=', 1)[1])
+
+    if child is not None:
+        if child == "imports":
+            result = measure_imports()
+        else:
+            result = asyncio.run(time_processes(child, processes))
+        result_file.write_text(json.dumps(result))
+        return
+
+    print(f"🐕 Benchmarking worker startup ({repeat} cold imports, {processes} job processes per mode)\n")
+
+    runs = [run_child(["--child=imports"]) for _ in range(repeat)]
+    imports = {
+        label: round(percentile([run["imports_ms"][label] for run in runs], 50), 1)
+        for label in runs[0]["imports_ms"]
+    }
+    deferred = {
+        name: round(percentile([run["deferred_ms"][name] for run in runs], 50), 1)
+        for name in runs[0]["deferred_ms"]
+    }
+    total = round(percentile([run["total_ms"] for run in runs], 50), 1)
+    print(f"📦 import buddy.main: {total:.0f}ms (median of {repeat})")
+    for label, ms in sorted(imports.items(), key=lambda item: -item[1]):
+        print(f"   {ms:8.1f}ms  {label}")
+    print("   deferred until a session needs RAG:")
+    for name, ms in deferred.items():
+        print(f"   {ms:8.1f}ms  {name}")
+
+    results = {"imports": {"total_ms": total, "modules_ms": imports, "deferred_ms": deferred}, "modes": []}
+    print()
+    for mode in modes:
+        result = run_child([f"--child={mode}", f"--processes={processes}"])
+        ready, pss = result["ready_ms"], result["pss_mb"]
+        warm = ready[1:] or ready
+        summary = {
+            "mode": mode,
+            "first_ready_ms": round(ready[0], 1),
+            "ready_ms": {
+                "p50": round(percentile(warm, 50), 1),
+                "max": round(max(warm), 1),
+                "mean": round(mean(warm), 1),
+            },
+            "pss_mb_per_process": round(mean(pss), 1),
+            "raw_ready_ms": [round(ms, 1) for ms in ready],
+        }
+        results["modes"].append(summary)
+        print(f"🚀 {mode:<11} first process ready in {summary['first_ready_ms']:7.0f}ms | "
+              f"then p50 {summary['ready_ms']['p50']:6.0f}ms | PSS {summary['pss_mb_per_process']:6.1f} MB per process")
+
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2))
+        print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Synthesize Buddy's fixed phrases (buddy/phrase_cache.py) ahead of time.
+Run this at build/deploy time, or after changing the voice or the phrase list,
+so the first session on a fresh worker doesn't have to.
+
+Audio goes to phrase_audio/ (or BUDDY_PHRASE_CACHE_DIR). Variants that are
+already cached are skipped; files from an old voice config are evicted.
+
+Usage:
+    python scripts/build_phrase_cache.py [--force]
+
+    --force re-synthesizes every phrase
+"""
+
+import asyncio
+import shutil
+import sys
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from livekit.plugins import elevenlabs
+
+from buddy.main import TTS_MODEL, TTS_VOICE_ID
+from buddy.phrase_cache import PhraseAudioCache
+
+
+async def build_phrase_cache(force: bool = False) -> None:
+    cache = PhraseAudioCache(voice_id=TTS_VOICE_ID, model=TTS_MODEL)
+    if force and cache.cache_dir.exists():
+        shutil.rmtree(cache.cache_dir)
+
+    loaded = cache.load()
+    if cache.stats.evicted:
+        print(f"🔄 Evicted {cache.stats.evicted} phrases from an old voice config")
+    missing = cache.missing()
+    print(f"🐕 {loaded} phrases already cached, {len(missing)} to synthesize "
+          f"(voice {TTS_VOICE_ID}, model {TTS_MODEL})")
+    if not missing:
+        return
+
+    async with aiohttp.ClientSession() as http_session:
+        tts = elevenlabs.TTS(voice_id=TTS_VOICE_ID, model=TTS_MODEL, http_session=http_session)
+        added = await cache.synthesize_missing(tts)
+        await tts.aclose()
+
+    print(f"✅ Synthesized {added}/{len(missing)} phrases into {cache.cache_dir}")
+    if added < len(missing):
+        raise RuntimeError("Some phrases failed to synthesize, see the log above")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(build_phrase_cache(force="--force" in sys.argv))
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,146 @@
+"""
+Token-aware, single-pass chunker for the ingestion scripts.
+
+Chunks are sized in tokens of the embedding model (all-MiniLM-L6-v2 reads at
+most 256 wordpieces and silently truncates the rest), split on sentence
+boundaries and flushed early at paragraph breaks when the chunk is already
+reasonably full. Each sentence is tokenized once and each chunk is joined once,
+so the whole page is processed in one linear pass.
+"""
+
+import re
+from collections import deque
+from typing import Callable, Iterator, List, Tuple
+
+# all-MiniLM-L6-v2 max sequence length is 256 including [CLS] and [SEP]
+MODEL_MAX_TOKENS = 254
+DEFAULT_MAX_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 30
+# Flush at a paragraph break once the chunk is at least this full
+PARAGRAPH_FLUSH_RATIO = 0.5
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n+")
+_WHITESPACE = re.compile(r"\s+")
+# A sentence runs up to terminal punctuation (plus closing quotes) and trailing space
+_SENTENCE = re.compile(r"[^.!?]+(?:[.!?]+[\"'”’)]*|$)\s*")
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+TokenCounter = Callable[[str], int]
+
+
+def approximate_token_count(text: str) -> int:
+    """Wordpiece-ish estimate: words and punctuation, plus ~30% for subword splits."""
+    words = _APPROX_TOKEN.findall(text)
+    return len(words) + sum(1 for w in words if len(w) > 6) * 2 // 3
+
+
+def load_token_counter() -> Tuple[TokenCounter, str]:
+    """
+    Return a token counter for the embedding model and a label describing it.
+
+    Uses the tokenizer bundled with Chroma's default embedding function when
+    it can be loaded, and falls back to an approximation otherwise.
+    """
+    try:
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+        tokenizer = ONNXMiniLM_L6_V2().tokenizer
+        # Chroma enables truncation at 256; we need true lengths to size chunks
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+
+        def _count(text: str) -> int:
+            return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+        return _count, "all-MiniLM-L6-v2 wordpiece"
+    except Exception:
+        return approximate_token_count, "approximate"
+
+
+def normalize_page_text(text: str) -> List[str]:
+    """
+    Split page text into whitespace-normalized paragraphs.
+
+    Some PDFs extract with a line break between every word; when most "lines"
+    are single words the line structure carries no meaning and is collapsed.
+    """
+    lines = text.count("\n") + 1
+    words = len(text.split())
+    if words and lines / words > 0.5:
+        paragraphs = [text]
+    else:
+        paragraphs = _PARAGRAPH_BREAK.split(text)
+    return [p for p in (_WHITESPACE.sub(" ", para).strip() for para in paragraphs) if p]
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, count: TokenCounter) -> Iterator[Tuple[str, int]]:
+    """Break a sentence longer than max_tokens on word boundaries."""
+    words = sentence.split(" ")
+    start = 0
+    tokens = 0
+    for i, word in enumerate(words):
+        word_tokens = count(word)
+        if tokens + word_tokens > max_tokens and i > start:
+            yield " ".join(words[start:i]), tokens
+            start, tokens = i, 0
+        tokens += word_tokens
+    if start < len(words):
+        yield " ".join(words[start:]), tokens
+
+
+def iter_token_chunks(
+    text: str,
+    count: TokenCounter,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> Iterator[Tuple[str, int]]:
+    """
+    Yield (chunk_text, token_count) for one page of text.
+
+    Sentences are packed until the next one would exceed max_tokens; the last
+    sentences of each chunk, up to overlap_tokens, are carried into the next.
+    Token counts are approximate at chunk joins (spaces aren't tokens).
+    """
+    window: deque = deque()  # (sentence, tokens) in the current chunk
+    window_tokens = 0
+
+    def _emit() -> Tuple[str, int]:
+        return " ".join(s for s, _ in window), window_tokens
+
+    for paragraph in normalize_page_text(text):
+        for match in _SENTENCE.finditer(paragraph):
+            sentence = match.group(0).strip()
+            if not sentence:
+                continue
+            tokens = count(sentence)
+            pieces = (
+                _split_long_sentence(sentence, max_tokens, count)
+                if tokens > max_tokens else ((sentence, tokens),)
+            )
+            for piece, piece_tokens in pieces:
+                if window and window_tokens + piece_tokens > max_tokens:
+                    yield _emit()
+                    # Keep trailing sentences for overlap, but never a whole chunk
+                    carried = 0
+                    keep = 0
+                    for _, t in reversed(window):
+                        if carried + t > overlap_tokens or keep == len(window) - 1:
+                            break
+                        carried += t
+                        keep += 1
+                    while len(window) > keep:
+                        window_tokens -= window.popleft()[1]
+                    if window_tokens + piece_tokens > max_tokens:
+                        window.clear()
+                        window_tokens = 0
+                window.append((piece, piece_tokens))
+                window_tokens += piece_tokens
+
+        # Prefer ending chunks where the author ended a paragraph
+        if window and window_tokens >= max_tokens * PARAGRAPH_FLUSH_RATIO:
+            yield _emit()
+            window.clear()
+            window_tokens = 0
+
+    if window:
+        yield _emit()
@@ -0,0 +1,69 @@
+"""
+Run the host's shared query embedding server (buddy/embedding_service.py).
+
+Start one per worker host, before the agent. Job processes find it on
+BUDDY_EMBEDDING_SOCKET and send it their RAG query embeddings, which it
+micro-batches across sessions. Without it they embed in process as before.
+
+Usage:
+    python scripts/embedding_server.py [--socket=/tmp/buddy-embeddings.sock]
+        [--window-ms=5] [--max-batch=32]
+"""
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.embedding_service import (
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_MAX_BATCH,
+    EMBEDDING_SOCKET,
+    EmbeddingServer,
+    local_embedding_model,
+)
+
+STATS_INTERVAL = 60.0
+
+
+async def log_stats(server: EmbeddingServer) -> None:
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        stats = server.stats
+        logging.getLogger("rag").info(
+            f"📊 Embedding server: {stats} (mean batch {stats.mean_batch:.1f})"
+        )
+
+
+async def main():
+    socket_path = EMBEDDING_SOCKET
+    window_ms = EMBEDDING_BATCH_WINDOW_MS
+    max_batch = EMBEDDING_MAX_BATCH
+    for arg in sys.argv[1:]:
+        if arg.startswith('--socket='):
+            socket_path = Path(arg.split('=', 1)[1])
+        elif arg.startswith('--window-ms='):
+            window_ms = float(arg.split('=', 1)[1])
+        elif arg.startswith('--max-batch='):
+            max_batch = int(arg.split('=', 1)[1])
+
+    # Load the model before accepting connections so the first queries aren't slow
+    model = local_embedding_model()
+    model(["warm up"])
+
+    server = EmbeddingServer(socket_path, embed=model, batch_window_ms=window_ms, max_batch=max_batch)
+    stats_task = asyncio.create_task(log_stats(server))
+    try:
+        await server.serve_forever()
+    finally:
+        stats_task.cancel()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,246 @@
+"""
+Streaming ingestion pipeline used by setup_vector_store.py.
+
+Stages, each bounded so peak memory doesn't grow with the corpus:
+    1. Page extraction - PDF page ranges spread across a process pool, with a
+       fixed window of tasks in flight, yielded in page order
+    2. Chunking - a generator over pages (supplied by the caller)
+    3. Embedding - fixed-size batches on a worker thread
+    4. Upserts - bulk collection.upsert() calls on a worker thread
+
+Stages 3 and 4 are connected by bounded queues, so when embedding or the
+vector store falls behind, submit() blocks and extraction stops pulling pages.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from pypdf import PdfReader
+
+PAGES_PER_TASK = 8
+EMBED_BATCH_SIZE = 64
+# Batches allowed to wait between stages before producers block
+QUEUE_DEPTH = 4
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    """Items processed and time spent busy in one pipeline stage."""
+    name: str
+    unit: str
+    items: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name:<10} {self.items:>7} {self.unit:<7} in {self.seconds:7.2f}s busy ({self.rate:,.1f} {self.unit}/s)"
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> List[Dict]:
+    """
+    Extract pages [start, stop) from a PDF. Runs in a worker process, so it
+    opens its own reader. Page numbers are 1-based; empty pages are skipped.
+    """
+    reader = PdfReader(pdf_path)
+    pages = []
+    for index in range(start, stop):
+        text = reader.pages[index].extract_text()
+        if text.strip():
+            pages.append({'text': text, 'page': index + 1})
+    return pages
+
+
+class IngestPipeline:
+    """
+    Streams pages through chunking, embedding and upserts.
+
+    Usage:
+        with IngestPipeline(collection, embed_fn) as pipeline:
+            for chunk in pipeline.iter_chunks(pipeline.iter_pages(path), chunker):
+                pipeline.submit(chunk)
+        print(pipeline.report())
+    """
+
+    def __init__(
+        self,
+        collection,
+        embedding_function: Callable[[List[str]], List],
+        workers: Optional[int] = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+    ):
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.batch_size = batch_size
+
+        self.extract_stats = StageStats('extract', 'pages')
+        self.chunk_stats = StageStats('chunk', 'chunks')
+        self.embed_stats = StageStats('embed', 'chunks')
+        self.upsert_stats = StageStats('upsert', 'chunks')
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._batch: List[Dict] = []
+        self._embed_queue: "queue.Queue" = queue.Queue(maxsize=QUEUE_DEPTH)
+        self._upsert_queue: "queue.Queue" = queue.Queue(maxsize=QUEUE_DEPTH)
+        self._error: Optional[BaseException] = None
+        self._threads = [
+            threading.Thread(target=self._embed_worker, name='ingest-embed', daemon=True),
+            threading.Thread(target=self._upsert_worker, name='ingest-upsert', daemon=True),
+        ]
+        self._started_at = 0.0
+        self._elapsed = 0.0
+
+    def __enter__(self) -> "IngestPipeline":
+        self._started_at = time.perf_counter()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+            self._put(self._embed_queue, _DONE)
+            for thread in self._threads:
+                thread.join()
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+            self._elapsed = time.perf_counter() - self._started_at
+        if exc_type is None:
+            self._raise_if_failed()
+
+    def iter_pages(self, path: Path) -> Iterator[Dict]:
+        """
+        Yield a document's pages in order. PDFs are extracted in parallel with
+        at most 2 x workers page ranges in flight; other files are one page.
+        """
+        if path.suffix.lower() != '.pdf':
+            start = time.perf_counter()
+            text = path.read_text(encoding='utf-8')
+            self.extract_stats.seconds += time.perf_counter() - start
+            if text.strip():
+                self.extract_stats.items += 1
+                yield {'text': text, 'page': 1}
+            return
+
+        page_count = len(PdfReader(path).pages)
+        ranges = iter(range(0, page_count, PAGES_PER_TASK))
+        pending: deque = deque()
+
+        def _submit_next() -> bool:
+            start = next(ranges, None)
+            if start is None:
+                return False
+            stop = min(start + PAGES_PER_TASK, page_count)
+            pending.append(self._executor.submit(extract_page_range, str(path), start, stop))
+            return True
+
+        while len(pending) < self.workers * 2 and _submit_next():
+            pass
+
+        while pending:
+            start = time.perf_counter()
+            pages = pending.popleft().result()
+            # Wall time waiting on the pool is the extraction stage's visible cost
+            self.extract_stats.seconds += time.perf_counter() - start
+            self.extract_stats.items += len(pages)
+            _submit_next()
+            yield from pages
+
+    def iter_chunks(self, pages: Iterable[Dict], chunker: Callable[[Dict], Iterator[Dict]]) -> Iterator[Dict]:
+        """Apply a per-page chunk generator, timing only the chunking itself."""
+        for page in pages:
+            start = time.perf_counter()
+            chunks = list(chunker(page))
+            self.chunk_stats.seconds += time.perf_counter() - start
+            self.chunk_stats.items += len(chunks)
+            yield from chunks
+
+    def submit(self, chunk: Dict):
+        """Queue a chunk for embedding; blocks when downstream stages are full."""
+        self._raise_if_failed()
+        self._batch.append(chunk)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send any partial batch downstream."""
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._put(self._embed_queue, batch)
+
+    def report(self) -> str:
+        lines = [str(stats) for stats in (
+            self.extract_stats, self.chunk_stats, self.embed_stats, self.upsert_stats,
+        )]
+        lines.append(f"{'total':<10} {self._elapsed:.2f}s wall")
+        return "\n".join(lines)
+
+    def _put(self, target: "queue.Queue", item):
+        # Poll so a failed worker can't leave the producer blocked forever
+        while True:
+            self._raise_if_failed()
+            try:
+                target.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"Ingestion failed: {self._error}") from self._error
+
+    def _fail(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+
+    def _embed_worker(self):
+        try:
+            while True:
+                batch = self._embed_queue.get()
+                if batch is _DONE:
+                    break
+                start = time.perf_counter()
+                embeddings = self.embedding_function([chunk['text'] for chunk in batch])
+                self.embed_stats.seconds += time.perf_counter() - start
+                self.embed_stats.items += len(batch)
+                self._put(self._upsert_queue, (batch, embeddings))
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._upsert_queue.put(_DONE)
+
+    def _upsert_worker(self):
+        # Keep draining after a failure so the embed worker never blocks on a full queue
+        while True:
+            item = self._upsert_queue.get()
+            if item is _DONE:
+                break
+            if self._error is not None:
+                continue
+            batch, embeddings = item
+            try:
+                start = time.perf_counter()
+                self.collection.upsert(
+                    ids=[chunk['id'] for chunk in batch],
+                    embeddings=[list(map(float, e)) for e in embeddings],
+                    documents=[chunk['text'] for chunk in batch],
+                    metadatas=[{'page': chunk['page'], 'source': chunk['source']} for chunk in batch],
+                )
+                self.upsert_stats.seconds += time.perf_counter() - start
+                self.upsert_stats.items += len(batch)
+            except BaseException as e:
+                self._fail(e)
@@ -0,0 +1,275 @@
+"""
+Deterministic local stand-ins for Buddy's external services, for load tests.
+
+- FakeSTT replays scripted utterances as a streaming STT would: start of
+  speech, word-by-word interim transcripts, a final transcript and end of speech.
+- FakeLLM streams a canned reply after a configurable time-to-first-token, and
+  calls find_nearby_events when the user asks about events.
+- FakeTTS returns silent PCM sized to the text after a configurable TTFB.
+- NullAudioOutput plays audio into the void (optionally at real-time pace) and
+  reports when the first frame of each reply arrives.
+- MockLinkup serves canned search results over HTTP with a configurable delay.
+
+None of them touch the network beyond localhost, so runs are repeatable and free.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from aiohttp import web
+from livekit import rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectOptions,
+    llm,
+    stt,
+    tts,
+    utils,
+)
+from livekit.agents.voice.io import AudioOutput, AudioOutputCapabilities
+
+SAMPLE_RATE = 24000
+# Roughly how long TTS audio lasts per character of text
+SECONDS_PER_CHAR = 0.06
+EVENT_KEYWORDS = ("event", "happening", "concert", "festival", "tonight", "this weekend", "things to do")
+
+
+@dataclass
+class FakeLatency:
+    """Simulated service latencies, in seconds."""
+
+    stt_word_interval: float = 0.25
+    stt_final_delay: float = 0.2
+    llm_ttft: float = 0.35
+    llm_tokens_per_sec: float = 80.0
+    tts_ttfb: float = 0.25
+    linkup: float = 1.2
+
+
+class FakeSTT(stt.STT):
+    """Streaming STT that transcribes whatever say() is given, ignoring audio."""
+
+    def __init__(self, latency: FakeLatency):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=True, interim_results=True))
+        self.latency = latency
+        self._utterances: asyncio.Queue[tuple[str, asyncio.Future]] = asyncio.Queue()
+
+    async def say(self, text: str) -> float:
+        """Speak an utterance; returns the time.perf_counter() of end of speech."""
+        done = asyncio.get_running_loop().create_future()
+        await self._utterances.put((text, done))
+        return await done
+
+    async def _recognize_impl(self, buffer, *, language=None, conn_options: APIConnectOptions):
+        raise NotImplementedError("FakeSTT only supports streaming")
+
+    def stream(self, *, language=None, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return _FakeRecognizeStream(stt=self, conn_options=conn_options)
+
+
+class _FakeRecognizeStream(stt.RecognizeStream):
+    async def _run(self) -> None:
+        fake: FakeSTT = self._stt
+        while True:
+            text, done = await fake._utterances.get()
+            self._send(stt.SpeechEventType.START_OF_SPEECH)
+            words = text.split()
+            for i in range(1, len(words) + 1):
+                await asyncio.sleep(fake.latency.stt_word_interval)
+                self._send(stt.SpeechEventType.INTERIM_TRANSCRIPT, " ".join(words[:i]))
+            await asyncio.sleep(fake.latency.stt_final_delay)
+            self._send(stt.SpeechEventType.FINAL_TRANSCRIPT, text)
+            self._send(stt.SpeechEventType.END_OF_SPEECH)
+            if not done.done():
+                done.set_result(time.perf_counter())
+
+    def _send(self, event_type: stt.SpeechEventType, text: str = "") -> None:
+        alternatives = [stt.SpeechData(language="en", text=text, confidence=1.0)] if text else []
+        self._event_ch.send_nowait(stt.SpeechEvent(type=event_type, alternatives=alternatives))
+
+
+class FakeLLM(llm.LLM):
+    """Streams a fixed reply; routes event questions through find_nearby_events."""
+
+    def __init__(self, latency: FakeLatency):
+        super().__init__()
+        self.latency = latency
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools=None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs,
+    ) -> "llm.LLMStream":
+        return _FakeLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class _FakeLLMStream(llm.LLMStream):
+    REPLY = (
+        "Oh, great question! I love sniffing around this city. "
+        "You should definitely get outside and check it out, it's the best!"
+    )
+
+    async def _run(self) -> None:
+        fake: FakeLLM = self._llm
+        request_id = utils.shortuuid("fake_llm_")
+        await asyncio.sleep(fake.latency.llm_ttft)
+
+        user_text, answered_by_tool = "", False
+        for item in reversed(self._chat_ctx.items):
+            if item.type == "function_call_output":
+                answered_by_tool = True
+            elif item.type == "message" and item.role == "user":
+                user_text = (item.text_content or "").lower()
+                break
+
+        tool_names = {getattr(tool, "__name__", "") for tool in self._tools}
+        wants_events = any(keyword in user_text for keyword in EVENT_KEYWORDS)
+        if wants_events and not answered_by_tool and "find_nearby_events" in tool_names:
+            call = llm.FunctionToolCall(
+                name="find_nearby_events",
+                arguments=json.dumps({"search_query": f"{user_text} san francisco"}),
+                call_id=utils.shortuuid("call_"),
+            )
+            self._event_ch.send_nowait(
+                llm.ChatChunk(id=request_id, delta=llm.ChoiceDelta(role="assistant", tool_calls=[call]))
+            )
+            return
+
+        words = self.REPLY.split(" ")
+        prompt_tokens = len(self._chat_ctx.items) * 50
+        interval = 1.0 / fake.latency.llm_tokens_per_sec
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(interval)
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", content=word if i == 0 else f" {word}"),
+                )
+            )
+        self._event_ch.send_nowait(
+            llm.ChatChunk(
+                id=request_id,
+                usage=llm.CompletionUsage(
+                    completion_tokens=len(words),
+                    prompt_tokens=prompt_tokens,
+                    total_tokens=prompt_tokens + len(words),
+                ),
+            )
+        )
+
+
+class FakeTTS(tts.TTS):
+    """Non-streaming TTS returning silence proportional to the text length."""
+
+    def __init__(self, latency: FakeLatency):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.latency = latency
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return _FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class _FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts
+        output_emitter.initialize(
+            request_id=utils.shortuuid("fake_tts_"),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(fake.latency.tts_ttfb)
+        samples = int(len(self.input_text) * SECONDS_PER_CHAR * SAMPLE_RATE)
+        chunk = SAMPLE_RATE // 10  # 100ms of 16-bit mono
+        for offset in range(0, samples, chunk):
+            output_emitter.push(bytes(2 * min(chunk, samples - offset)))
+        output_emitter.flush()
+
+
+class NullAudioOutput(AudioOutput):
+    """Discards agent audio, optionally holding each segment for its real duration."""
+
+    def __init__(self, realtime: bool = True, on_first_frame: Optional[Callable[[], None]] = None):
+        super().__init__(label="NullAudioOutput", capabilities=AudioOutputCapabilities(pause=False))
+        self.realtime = realtime
+        self.on_first_frame = on_first_frame
+        self._segment_duration = 0.0
+        self._capturing = False
+        self._playout: Optional[asyncio.TimerHandle] = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._capturing:
+            self._capturing = True
+            self._segment_duration = 0.0
+            if self.on_first_frame is not None:
+                self.on_first_frame()
+        self._segment_duration += frame.samples_per_channel / frame.sample_rate
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._capturing:
+            return
+        self._capturing = False
+        duration = self._segment_duration
+        delay = duration if self.realtime else 0.0
+        self._playout = asyncio.get_running_loop().call_later(
+            delay, lambda: self.on_playback_finished(playback_position=duration, interrupted=False)
+        )
+
+    def clear_buffer(self) -> None:
+        if self._playout is not None and not self._playout.cancelled():
+            self._playout.cancel()
+            self._playout = None
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        self._capturing = False
+
+
+class MockLinkup:
+    """Local HTTP server answering Linkup /v1/search requests with canned events."""
+
+    RESULTS = [
+        {"name": "Live Jazz in Dolores Park", "url": "https://example.com/jazz", "content": "Free outdoor jazz on the lawn this Saturday afternoon."},
+        {"name": "Ferry Building Farmers Market", "url": "https://example.com/market", "content": "Local produce, food stalls and coffee by the bay."},
+        {"name": "Mission Street Food Night", "url": "https://example.com/food", "content": "Dozens of food trucks and live music on Valencia."},
+        {"name": "Ocean Beach Bonfire", "url": "https://example.com/bonfire", "content": "Community bonfire with s'mores at sunset."},
+        {"name": "Golden Gate Park Swing Dance", "url": "https://example.com/swing", "content": "Beginner-friendly swing dancing near the bandshell."},
+    ]
+
+    def __init__(self, latency: FakeLatency, port: int):
+        self.latency = latency
+        self.port = port
+        self.requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1/search"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/v1/search", self._search)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _search(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await request.json()
+        await asyncio.sleep(self.latency.linkup)
+        return web.json_response({"results": self.RESULTS})
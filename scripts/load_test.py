@@ -0,0 +1,388 @@
+"""
+Offline multi-session load test for the Buddy voice agent.
+
+Drives N concurrent AgentSessions through scripted conversations against the
+real Assistant, RAG and find_nearby_events code, with STT, LLM, TTS and Linkup
+replaced by the local fakes in load_fakes.py. Like LiveKit's worker, which
+runs each room in its own job process, every session runs in its own process
+on this host; they all load their imports (and RAG) first, then start talking
+together. The mock Linkup runs in this process and is shared.
+
+For each session count it reports per-turn latency (end of user speech to the
+first agent audio), the per-stage breakdown from buddy.telemetry, event-loop
+lag across the session processes, their total CPU and RSS, then the most
+rooms this host ran within the SLO.
+
+Usage:
+    python scripts/load_test.py [--sessions=1,5,10,20] [--turns=5] [--think=1.0]
+        [--rag] [--no-tools] [--fast-playback] [--slo-ms=2000] [--max-lag-ms=50]
+        [--llm-ttft=0.35] [--tts-ttfb=0.25] [--linkup-latency=1.2]
+        [--output=load_results.json]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Point the tool at the mock before buddy.tools reads its config
+MOCK_LINKUP_PORT = int(os.getenv("BUDDY_LOAD_LINKUP_PORT", "8765"))
+os.environ["LINKUP_API_URL"] = f"http://127.0.0.1:{MOCK_LINKUP_PORT}/v1/search"
+os.environ.setdefault("LINKUP_API_KEY", "load-test")
+
+from livekit.agents import AgentSession, ConversationItemAddedEvent
+
+from buddy.http_client import aclose_http_client, init_http_client
+from buddy.main import Assistant
+from buddy.telemetry import LatencyHistogram, TurnTracker, latency
+from buddy.tools import find_nearby_events
+from load_fakes import FakeLatency, FakeLLM, FakeSTT, FakeTTS, MockLinkup, NullAudioOutput
+from rag_eval import mean, percentile
+
+CONVERSATIONS = [
+    [
+        "Hey Buddy, how's it going?",
+        "What's your backstory?",
+        "Tell me about the Mission District",
+        "Any events happening this weekend?",
+        "Cool, thanks Buddy!",
+    ],
+    [
+        "Hi there!",
+        "Have you been to Ocean Beach?",
+        "Are there any concerts tonight?",
+        "What's your favorite spot in Dolores Park?",
+        "Okay, bye!",
+    ],
+    [
+        "What's your personality like?",
+        "Tell me about outdoor activities in SF",
+        "What festivals are happening this month?",
+        "Tell me the food truck story",
+        "Thanks, talk soon!",
+    ],
+]
+LAG_SAMPLE_INTERVAL = 0.05
+REPLY_TIMEOUT = 30.0
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep."""
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples_ms: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples_ms.append(max(0.0, (time.perf_counter() - started - self.interval) * 1000))
+
+
+def current_rss_mb() -> float:
+    """Resident set size now (Linux), falling back to the peak elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+async def run_session(index: int, options: Dict, fake_latency: FakeLatency, rag) -> Dict:
+    """One simulated room: speak each scripted line and wait for Buddy's reply."""
+    fake_stt = FakeSTT(fake_latency)
+    session = AgentSession(
+        stt=fake_stt,
+        llm=FakeLLM(fake_latency),
+        tts=FakeTTS(fake_latency),
+        turn_detection="stt",
+        min_endpointing_delay=options["endpointing"],
+        # NullAudioOutput can't pause, so there is nothing to resume
+        resume_false_interruption=False,
+    )
+    # Created inside this session's task so spans from its turns land here
+    tracker = TurnTracker(room=f"load-{index}")
+    session.on("metrics_collected", lambda ev: tracker.on_metrics(ev.metrics))
+
+    turn_latencies: List[float] = []
+    end_of_speech: List[float] = []
+
+    def _on_first_frame() -> None:
+        if end_of_speech:
+            turn_latencies.append((time.perf_counter() - end_of_speech.pop()) * 1000)
+
+    replies: asyncio.Queue = asyncio.Queue()
+
+    def _on_item_added(ev: ConversationItemAddedEvent) -> None:
+        if getattr(ev.item, "role", None) == "assistant":
+            replies.put_nowait(ev.item)
+
+    session.on("conversation_item_added", _on_item_added)
+    session.output.audio = NullAudioOutput(realtime=options["realtime"], on_first_frame=_on_first_frame)
+
+    assistant = Assistant(rag=rag)
+    if options["tools"]:
+        await assistant.update_tools([find_nearby_events])
+    await session.start(agent=assistant)
+
+    timeouts = 0
+    conversation = CONVERSATIONS[index % len(CONVERSATIONS)]
+    try:
+        for text in conversation[: options["turns"]]:
+            end_of_speech[:] = [await fake_stt.say(text)]
+            try:
+                await asyncio.wait_for(replies.get(), timeout=REPLY_TIMEOUT)
+            except asyncio.TimeoutError:
+                timeouts += 1
+            await asyncio.sleep(options["think"])
+    finally:
+        await session.aclose()
+        tracker.close()
+
+    return {"turn_latencies_ms": turn_latencies, "timeouts": timeouts}
+
+
+async def run_child_session(index: int, options: Dict) -> Dict:
+    """Runs in a session process: one room, as in a LiveKit job process."""
+    rag = None
+    if options["rag"]:
+        # chromadb and the embedding model only load when RAG is on
+        from buddy.kb_registry import get_rag
+
+        rag = get_rag()
+    # Imports and RAG are loaded; wait for the other sessions to be ready too
+    print("ready", flush=True)
+    await asyncio.to_thread(sys.stdin.readline)
+
+    init_http_client()
+    lag = LoopLagMonitor()
+    lag.start()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    error = None
+    session: Dict = {"turn_latencies_ms": [], "timeouts": 0}
+    try:
+        session = await run_session(index, options, options["latency"], rag)
+    except Exception as e:
+        error = repr(e)
+    finally:
+        await lag.stop()
+        await aclose_http_client()
+
+    return {
+        **session,
+        "error": error,
+        "elapsed_s": time.perf_counter() - started,
+        "loop_lag_ms": lag.samples_ms,
+        "cpu_s": time.process_time() - cpu_before,
+        "rss_mb": current_rss_mb(),
+        "histograms": {stage: h.to_dict() for stage, h in latency.histograms.items()},
+    }
+
+
+async def run_level(sessions: int, options: Dict) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="buddy-load-") as result_dir:
+        result_paths = [Path(result_dir) / f"{i}.json" for i in range(sessions)]
+        procs = [
+            await asyncio.create_subprocess_exec(
+                sys.executable, __file__, *options["argv"], f"--child={i}", f"--result-file={path}",
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            )
+            for i, path in enumerate(result_paths)
+        ]
+        # Each says "ready" once imported, then all get "go" together
+        await asyncio.gather(*(proc.stdout.readline() for proc in procs))
+        await asyncio.gather(*(proc.communicate(b"go\n") for proc in procs))
+
+        results = []
+        for proc, path in zip(procs, result_paths):
+            try:
+                results.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                results.append({"error": f"session process exited with {proc.returncode}"})
+
+    failed = [r["error"] for r in results if r.get("error")]
+    for error in failed[:3]:
+        logging.getLogger("load_test").error(f"Session failed: {error}")
+    finished = [r for r in results if not r.get("error")]
+    turns = [ms for r in finished for ms in r["turn_latencies_ms"]]
+    lag_ms = [ms for r in finished for ms in r["loop_lag_ms"]]
+    stages: Dict[str, LatencyHistogram] = {}
+    for r in finished:
+        for stage, hist in r["histograms"].items():
+            # Unbounded, so every session's samples count toward the quantiles
+            stages.setdefault(stage, LatencyHistogram(window=None)).merge(
+                LatencyHistogram.from_dict(hist, window=None)
+            )
+    rss = [r["rss_mb"] for r in finished]
+    # From "go" until the last conversation ended (process shutdown not included)
+    elapsed = max((r["elapsed_s"] for r in finished), default=0.0)
+
+    return {
+        "sessions": sessions,
+        "turns": len(turns),
+        "failed_sessions": len(failed),
+        "timeouts": sum(r["timeouts"] for r in finished),
+        "elapsed_s": round(elapsed, 2),
+        "turn_latency_ms": {
+            "p50": round(percentile(turns, 50), 1),
+            "p95": round(percentile(turns, 95), 1),
+            "p99": round(percentile(turns, 99), 1),
+            "mean": round(mean(turns), 1),
+        },
+        "stages_ms": {stage: h.rollup() for stage, h in stages.items() if h.count},
+        "loop_lag_ms": {
+            "p50": round(percentile(lag_ms, 50), 2),
+            "p95": round(percentile(lag_ms, 95), 2),
+            "max": round(max(lag_ms, default=0.0), 2),
+        },
+        "cpu_percent": round(100 * sum(r["cpu_s"] for r in finished) / elapsed, 1) if elapsed else 0.0,
+        "rss_mb_per_session": round(mean(rss), 1) if rss else 0.0,
+        "rss_mb_total": round(sum(rss), 1),
+    }
+
+
+def print_level(result: Dict) -> None:
+    turn, lag = result["turn_latency_ms"], result["loop_lag_ms"]
+    print(f"👥 {result['sessions']} sessions | {result['turns']} turns in {result['elapsed_s']}s"
+          f" | {result['timeouts']} timeouts | {result['failed_sessions']} failed")
+    print(f"   turn: p50 {turn['p50']:.0f}ms | p95 {turn['p95']:.0f}ms | p99 {turn['p99']:.0f}ms")
+    stages = " | ".join(
+        f"{stage} p95 {rollup['p95']:.0f}ms" for stage, rollup in result["stages_ms"].items()
+    )
+    if stages:
+        print(f"   stages: {stages}")
+    print(f"   loop lag: p50 {lag['p50']:.1f}ms | p95 {lag['p95']:.1f}ms | max {lag['max']:.1f}ms")
+    print(f"   CPU {result['cpu_percent']:.0f}% of one core | RSS {result['rss_mb_per_session']:.0f} MB "
+          f"per session process ({result['rss_mb_total']:.0f} MB total)\n")
+
+
+def parse_args(argv: List[str]) -> Dict:
+    options = {
+        "sessions": [1, 5, 10, 20],
+        "turns": 5,
+        "think": 1.0,
+        "endpointing": 0.5,
+        "rag": False,
+        "tools": True,
+        "realtime": True,
+        "slo_ms": 2000.0,
+        "max_lag_ms": 50.0,
+        "output": None,
+        "latency": FakeLatency(),
+        "child": None,
+        "result_file": None,
+        # Passed on to the session processes
+        "argv": [arg for arg in argv if not arg.startswith(("--child=", "--result-file="))],
+    }
+    for arg in argv:
+        key, _, value = arg.lstrip("-").partition("=")
+        if key == "sessions":
+            options["sessions"] = [int(v) for v in value.split(",") if v]
+        elif key == "turns":
+            options["turns"] = int(value)
+        elif key in ("think", "endpointing"):
+            options[key] = float(value)
+        elif key == "slo-ms":
+            options["slo_ms"] = float(value)
+        elif key == "max-lag-ms":
+            options["max_lag_ms"] = float(value)
+        elif key == "rag":
+            options["rag"] = True
+        elif key == "no-tools":
+            options["tools"] = False
+        elif key == "fast-playback":
+            options["realtime"] = False
+        elif key == "output":
+            options["output"] = Path(value)
+        elif key == "llm-ttft":
+            options["latency"].llm_ttft = float(value)
+        elif key == "tts-ttfb":
+            options["latency"].tts_ttfb = float(value)
+        elif key == "linkup-latency":
+            options["latency"].linkup = float(value)
+        elif key == "child":
+            options["child"] = int(value)
+        elif key == "result-file":
+            options["result_file"] = Path(value)
+    return options
+
+
+async def main(options: Dict) -> None:
+    fake_latency: FakeLatency = options["latency"]
+    linkup = MockLinkup(fake_latency, port=MOCK_LINKUP_PORT)
+    await linkup.start()
+
+    print(f"🐕 Load testing Buddy: RAG {'on' if options['rag'] else 'off'}, "
+          f"tools {'on' if options['tools'] else 'off'}, one process per session on {os.cpu_count()} CPUs, "
+          f"SLO p95 turn ≤ {options['slo_ms']:.0f}ms, p95 loop lag ≤ {options['max_lag_ms']:.0f}ms\n")
+
+    levels = []
+    try:
+        for sessions in options["sessions"]:
+            result = await run_level(sessions, options)
+            levels.append(result)
+            print_level(result)
+    finally:
+        await linkup.stop()
+
+    within_slo = [
+        level["sessions"] for level in levels
+        if level["turns"]
+        and not level["failed_sessions"]
+        and level["turn_latency_ms"]["p95"] <= options["slo_ms"]
+        and level["loop_lag_ms"]["p95"] <= options["max_lag_ms"]
+    ]
+    capacity = max(within_slo, default=0)
+    print(f"✅ Rooms on this host within SLO (one job process each): {capacity}")
+    print(f"   Linkup mock served {linkup.requests} searches")
+
+    if options["output"] is not None:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "rag": options["rag"],
+                "tools": options["tools"],
+                "realtime_playback": options["realtime"],
+                "turns": options["turns"],
+                "think_s": options["think"],
+                "endpointing_s": options["endpointing"],
+                "fake_latency_s": vars(fake_latency),
+                "slo_ms": options["slo_ms"],
+                "max_lag_ms": options["max_lag_ms"],
+                "cpus": os.cpu_count(),
+            },
+            "levels": levels,
+            "rooms_per_host": capacity,
+        }
+        options["output"].write_text(json.dumps(report, indent=2))
+        print(f"💾 Results saved to {options['output']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    options = parse_args(sys.argv[1:])
+    if options["child"] is not None:
+        result = asyncio.run(run_child_session(options["child"], options))
+        options["result_file"].write_text(json.dumps(result))
+    else:
+        asyncio.run(main(options))
@@ -0,0 +1,68 @@
+"""
+Shared helpers for the RAG benchmark scripts: the labeled query set and
+retrieval quality / latency metrics.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+LABELED_QUERIES_PATH = Path(__file__).parent.parent / 'data' / 'eval' / 'rag_queries.json'
+
+
+def load_labeled_queries(path: Path = LABELED_QUERIES_PATH) -> List[Dict]:
+    """
+    Load the labeled query set: a list of {'query', 'expected_pages'} dicts,
+    optionally with 'expected_chunks' (chunk IDs).
+    """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['queries']
+
+
+def is_relevant(label: Dict, metadata: Dict, chunk_id: str) -> bool:
+    """A retrieved chunk is relevant if its ID or page is in the label."""
+    if chunk_id in label.get('expected_chunks', ()):
+        return True
+    return metadata.get('page') in label.get('expected_pages', ())
+
+
+def recall_at_k(label: Dict, metadatas: Sequence[Dict], ids: Sequence[str], k: int) -> Optional[float]:
+    """
+    Fraction of the expected pages/chunks found in the top k results. The
+    denominator is capped at k so a query with many relevant pages can still
+    score 1.0. Returns None for queries with no expected results.
+    """
+    expected = set(label.get('expected_chunks', ())) | set(label.get('expected_pages', ()))
+    if not expected:
+        return None
+    found = set()
+    for meta, chunk_id in zip(metadatas[:k], ids[:k]):
+        if chunk_id in expected:
+            found.add(chunk_id)
+        elif meta.get('page') in expected:
+            found.add(meta.get('page'))
+    return len(found) / min(len(expected), k)
+
+
+def reciprocal_rank(label: Dict, metadatas: Sequence[Dict], ids: Sequence[str]) -> Optional[float]:
+    """1/rank of the first relevant result (0 if none). None for unlabeled queries."""
+    if not label.get('expected_chunks') and not label.get('expected_pages'):
+        return None
+    for rank, (meta, chunk_id) in enumerate(zip(metadatas, ids), start=1):
+        if is_relevant(label, meta, chunk_id):
+            return 1.0 / rank
+    return 0.0
+
+
+def mean(values: Sequence[Optional[float]]) -> float:
+    scored = [v for v in values if v is not None]
+    return sum(scored) / len(scored) if scored else 0.0
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile; 0 for an empty sample."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,118 @@
+"""
+Refresh the local event store (buddy/event_store.py) from Linkup.
+
+Runs a fixed set of broad San Francisco event searches, normalizes and dedupes
+the results, drops events that are already over and writes a new
+event_store.db (or BUDDY_EVENT_STORE) that agent job processes pick up on
+their next lookup. Run it as its own long-lived process next to the worker, or
+from cron with --once.
+
+If most searches fail the old store is kept; job processes fall back to live
+searches once it is older than BUDDY_EVENT_STORE_MAX_AGE.
+
+Usage:
+    python scripts/refresh_event_store.py [--once] [--interval=3600]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.event_results import dedupe, parse_results
+from buddy.event_store import EVENT_STORE_PATH, StoredEvent, write_store
+from buddy.http_client import aclose_http_client
+from buddy.linkup import LinkupClient, fetch_linkup
+
+load_dotenv()
+
+REFRESH_INTERVAL = float(os.getenv("BUDDY_EVENT_REFRESH_INTERVAL", "3600"))
+# Searches at once; Linkup rate-limits bursts
+REFRESH_CONCURRENCY = 4
+# Nobody is waiting on a refresh, so searches get longer than a live turn's deadline
+REFRESH_DEADLINE = 30.0
+
+
+def refresh_queries(today: date) -> list[str]:
+    """Broad searches that together cover what users usually ask about."""
+    month = today.strftime("%B %Y")
+    return [
+        "events in San Francisco this week",
+        "things to do in San Francisco this weekend",
+        f"events in San Francisco {month}",
+        "live music concerts San Francisco this week",
+        f"food festivals San Francisco {month}",
+        "art exhibits and gallery openings San Francisco",
+        "comedy shows San Francisco this week",
+        "outdoor events and festivals San Francisco",
+        "farmers markets and street fairs San Francisco",
+        "family friendly events San Francisco this weekend",
+        "nightlife and dance parties San Francisco this weekend",
+        "theater and performances San Francisco this month",
+    ]
+
+
+async def refresh_once(path: Path = EVENT_STORE_PATH) -> bool:
+    """Pull, normalize and write the store. Returns False if the old store was kept."""
+    today = date.today()
+    queries = refresh_queries(today)
+    semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+    # Retries and the circuit breaker, so a Linkup outage fails the refresh fast
+    client = LinkupClient(fetch_linkup, deadline=REFRESH_DEADLINE)
+
+    async def _search(query: str) -> list[dict]:
+        async with semaphore:
+            try:
+                return (await client.search(query)).get("results", [])
+            except Exception as e:
+                print(f"⚠️  '{query}' failed: {e}")
+                return []
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_search(query) for query in queries))
+    succeeded = sum(1 for r in results if r)
+    if succeeded < len(queries) / 2:
+        print(f"❌ Only {succeeded}/{len(queries)} searches returned results, keeping the old store")
+        return False
+
+    events = dedupe(parse_results([result for batch in results for result in batch]))
+    stored = [StoredEvent.from_summary(event, today) for event in events]
+    # Events that are already over would never be shown
+    current = [e for e in stored if (e.end_date or e.start_date or today) >= today]
+    count = write_store(current, path)
+    dated = sum(1 for e in current if e.start_date)
+    print(f"✅ Event store refreshed: {count} events ({dated} dated) from {succeeded}/{len(queries)} "
+          f"searches in {time.perf_counter() - started:.1f}s -> {path}")
+    return True
+
+
+async def main():
+    once = "--once" in sys.argv
+    interval = REFRESH_INTERVAL
+    for arg in sys.argv[1:]:
+        if arg.startswith('--interval='):
+            interval = float(arg.split('=', 1)[1])
+
+    try:
+        while True:
+            await refresh_once()
+            if once:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await aclose_http_client()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
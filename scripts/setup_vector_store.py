@@ -1,15 +1,49 @@
 """
-One-time script to chunk PDF and load into ChromaDB.
-Run this once after cloning the repo or when updating the knowledge base.
+Chunk the documents in data/ and load them into ChromaDB.
+Run this after cloning the repo or whenever the knowledge base changes.
+
+Ingestion is incremental: chunk IDs are hashed from their content and a
+manifest (chroma_db/manifest.json) records which source pages are already
+embedded, so only new or changed chunks are embedded and orphaned ones are
+deleted. Use --force to rebuild everything from scratch.
+
+Pages stream through a bounded pipeline (see ingest_pipeline.py), so memory
+stays flat however large the corpus gets.
 
 Usage:
-    python scripts/setup_vector_store.py
+    python scripts/setup_vector_store.py [--force] [--export-numpy] [--kb=<id>]
+
+    --export-numpy also writes chroma_db/numpy_index/ for BUDDY_RAG_BACKEND=numpy
+    --kb builds another city's or persona's knowledge base from
+      knowledge_bases/<id>/data/ into knowledge_bases/<id>/chroma_db/
 """
 
+import hashlib
+import json
+import sys
 import chromadb
+from chromadb.utils import embedding_functions
+from functools import partial
 from pathlib import Path
 from pypdf import PdfReader
-from typing import List, Dict
+from typing import Iterator, List, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.kb_registry import DEFAULT_KB, KB_ROOT, knowledge_base_path
+from buddy.lexical_index import BM25_INDEX_FILE, BM25Index
+from buddy.vector_index import export_collection
+from chunking import DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS, iter_token_chunks, load_token_counter
+from ingest_pipeline import IngestPipeline
+
+# Document types picked up from the data/ directory
+SOURCE_EXTENSIONS = {'.pdf', '.txt', '.md'}
+MANIFEST_VERSION = 1
+# Recorded in the manifest; changing the chunker re-chunks every page
+CHUNKER = f"tokens-{DEFAULT_MAX_TOKENS}-{DEFAULT_OVERLAP_TOKENS}"
+DELETE_BATCH_SIZE = 500
+# Chunks read back per request when building the BM25 index
+BM25_PAGE_SIZE = 500
 
 def extract_text_from_pdf(pdf_path: Path) -> List[Dict[str, any]]:
     """
@@ -30,68 +64,196 @@ def extract_text_from_pdf(pdf_path: Path) -> List[Dict[str, any]]:
     print(f"📄 Extracted text from {len(documents)} pages")
     return documents
 
-def chunk_text(documents: List[Dict], chunk_size: int = 500, overlap: int = 50) -> List[Dict]:
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def chunk_id_for(source: str, page: int, text: str) -> str:
+    """Stable chunk ID derived from where the chunk came from and what it says."""
+    return hash_text(f"{source}\x00{page}\x00{text}")[:24]
+
+def iter_page_chunks(doc: Dict, count_tokens=None, max_tokens: int = DEFAULT_MAX_TOKENS,
+                     overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> Iterator[Dict]:
+    """
+    Lazily split one page into token-sized, sentence-aligned chunks.
+    Preserves metadata (source and page numbers) and gives each chunk a
+    content-hashed ID, so unchanged chunks keep their ID across runs.
+    """
+    if count_tokens is None:
+        count_tokens, _ = load_token_counter()
+    page = doc['page']
+    source = doc.get('source', '')
+    
+    for text, tokens in iter_token_chunks(doc['text'], count_tokens, max_tokens, overlap_tokens):
+        yield {
+            'text': text,
+            'page': page,
+            'source': source,
+            'tokens': tokens,
+            'id': chunk_id_for(source, page, text)
+        }
+
+def iter_char_chunks(doc: Dict, chunk_size: int = 800, overlap: int = 100) -> Iterator[Dict]:
     """
-    Split documents into chunks with overlap.
-    Preserves metadata (page numbers).
+    Legacy character-based chunker, kept as the baseline for
+    scripts/benchmark_chunking.py.
     """
-    chunks = []
-    chunk_id = 0
+    text = doc['text']
+    page = doc['page']
+    source = doc.get('source', '')
     
-    for doc in documents:
-        text = doc['text']
-        page = doc['page']
+    # Simple character-based chunking
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        chunk_text = text[start:end]
         
-        # Simple character-based chunking
-        start = 0
-        while start < len(text):
-            end = start + chunk_size
-            chunk_text = text[start:end]
-            
-            # Try to break at sentence boundary
-            if end < len(text):
-                # Look for last period, question mark, or exclamation
-                last_sentence = max(
-                    chunk_text.rfind('. '),
-                    chunk_text.rfind('? '),
-                    chunk_text.rfind('! ')
-                )
-                if last_sentence > chunk_size * 0.5:  # Only if we find one in latter half
-                    chunk_text = chunk_text[:last_sentence + 1]
-                    end = start + last_sentence + 1
+        # Try to break at sentence boundary
+        if end < len(text):
+            # Look for last period, question mark, or exclamation
+            last_sentence = max(
+                chunk_text.rfind('. '),
+                chunk_text.rfind('? '),
+                chunk_text.rfind('! ')
+            )
+            if last_sentence > chunk_size * 0.5:  # Only if we find one in latter half
+                chunk_text = chunk_text[:last_sentence + 1]
+                end = start + last_sentence + 1
+        
+        yield {
+            'text': chunk_text.strip(),
+            'page': page,
+            'source': source,
+            'id': chunk_id_for(source, page, chunk_text.strip())
+        }
+        
+        start = end - overlap  # Overlap for context continuity
+
+def chunk_text(documents: List[Dict], max_tokens: int = DEFAULT_MAX_TOKENS,
+               overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> List[Dict]:
+    """
+    Split documents into token-sized chunks with overlap.
+    Preserves metadata (source and page numbers).
+    """
+    count_tokens, _ = load_token_counter()
+    chunks = [
+        chunk
+        for doc in documents
+        for chunk in iter_page_chunks(doc, count_tokens, max_tokens, overlap_tokens)
+    ]
+    
+    if chunks:
+        print(f"✂️  Created {len(chunks)} chunks (avg {sum(c['tokens'] for c in chunks) // len(chunks)} tokens/chunk)")
+    return chunks
+
+def discover_sources(data_dir: Path) -> List[Path]:
+    """Find every supported document in the data directory."""
+    return sorted(
+        path for path in data_dir.rglob('*')
+        if path.is_file() and path.suffix.lower() in SOURCE_EXTENSIONS
+    )
+
+def load_manifest(manifest_path: Path) -> Dict:
+    """Load the ingestion manifest, or an empty one if missing or outdated."""
+    if manifest_path.exists():
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('chunker') == CHUNKER:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'chunker': CHUNKER, 'sources': {}}
+
+def save_manifest(manifest_path: Path, manifest: Dict):
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp_path.replace(manifest_path)
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def sync_source(pipeline: IngestPipeline, path: Path, source: str, entry: Dict,
+                existing_ids: set, seen_ids: set, count_tokens) -> tuple:
+    """
+    Stream one source document through the pipeline, embedding only what changed.
+    
+    Unchanged files are skipped without re-extracting. For changed files only
+    pages whose text hash differs from the manifest (or whose chunks are
+    missing from the collection) are re-chunked and embedded.
+    
+    Returns:
+        (new manifest entry, number of chunks submitted for embedding)
+    """
+    def _page_is_stored(page_entry: Dict) -> bool:
+        return all(chunk_id in existing_ids for chunk_id in page_entry['chunks'])
+    
+    file_hash = file_sha256(path)
+    if entry and entry.get('sha256') == file_hash and all(
+        _page_is_stored(page) for page in entry['pages'].values()
+    ):
+        return entry, 0
+    
+    old_pages = entry.get('pages', {}) if entry else {}
+    pages = {}
+    
+    def _changed_pages() -> Iterator[Dict]:
+        for doc in pipeline.iter_pages(path):
+            doc['source'] = source
+            page_key = str(doc['page'])
+            page_hash = hash_text(doc['text'])
             
-            chunks.append({
-                'text': chunk_text.strip(),
-                'page': page,
-                'id': f"chunk_{chunk_id}"
-            })
+            old_page = old_pages.get(page_key)
+            if old_page and old_page['sha256'] == page_hash and _page_is_stored(old_page):
+                pages[page_key] = old_page
+                continue
             
-            chunk_id += 1
-            start = end - overlap  # Overlap for context continuity
+            pages[page_key] = {'sha256': page_hash, 'chunks': []}
+            yield doc
     
-    print(f"✂️  Created {len(chunks)} chunks (avg {sum(len(c['text']) for c in chunks) // len(chunks)} chars/chunk)")
-    return chunks
+    chunker = partial(iter_page_chunks, count_tokens=count_tokens)
+    submitted = 0
+    for chunk in pipeline.iter_chunks(_changed_pages(), chunker):
+        page_chunks = pages[str(chunk['page'])]['chunks']
+        if chunk['id'] not in page_chunks:
+            page_chunks.append(chunk['id'])
+        if chunk['id'] in existing_ids or chunk['id'] in seen_ids:
+            continue
+        seen_ids.add(chunk['id'])
+        pipeline.submit(chunk)
+        submitted += 1
+    
+    return {'sha256': file_hash, 'pages': pages}, submitted
 
-def setup_chroma(force_recreate: bool = False):
+def build_lexical_index(collection, page_size: int = BM25_PAGE_SIZE) -> BM25Index:
+    """BM25 index over the collection, read back a page at a time rather than all at once."""
+    lexical_index = BM25Index.build([], [], [])
+    for offset in range(0, collection.count(), page_size):
+        stored = collection.get(include=['documents', 'metadatas'], limit=page_size, offset=offset)
+        for chunk_id, document, metadata in zip(stored['ids'], stored['documents'], stored['metadatas']):
+            lexical_index.add(chunk_id, document, metadata)
+    return lexical_index
+
+
+def setup_chroma(force_recreate: bool = False, export_numpy: bool = False, kb_id: str = DEFAULT_KB):
     """
-    Main setup function: load PDF, chunk, and store in ChromaDB.
+    Main setup function: chunk every document in the knowledge base's data
+    directory and sync its ChromaDB.
     """
-    print("🐕 Setting up Buddy's knowledge base...\n")
+    print(f"🐕 Setting up Buddy's knowledge base ({kb_id})...\n")
     
     # Paths
     project_root = Path(__file__).parent.parent
-    pdf_path = project_root / 'data' / 'All_about_buddy.pdf'
-    chroma_path = project_root / 'chroma_db'
-    
-    # Validate PDF exists
-    if not pdf_path.exists():
-        raise FileNotFoundError(f"PDF not found at {pdf_path}")
+    data_dir = project_root / 'data' if kb_id == DEFAULT_KB else KB_ROOT / kb_id / 'data'
+    chroma_path = knowledge_base_path(kb_id)
+    manifest_path = chroma_path / 'manifest.json'
     
-    # Extract text from PDF
-    documents = extract_text_from_pdf(pdf_path)
-    
-    # Chunk the text
-    chunks = chunk_text(documents, chunk_size=800, overlap=100)
+    sources = discover_sources(data_dir)
+    if not sources:
+        raise FileNotFoundError(f"No documents ({', '.join(sorted(SOURCE_EXTENSIONS))}) found in {data_dir}")
+    print(f"📚 Found {len(sources)} source document(s) in {data_dir}")
     
     # Initialize ChromaDB
     client = chromadb.PersistentClient(path=str(chroma_path))
@@ -103,6 +265,7 @@ def setup_chroma(force_recreate: bool = False):
             print("🗑️  Deleted existing collection")
         except Exception:
             pass
+        manifest_path.unlink(missing_ok=True)
     
     # Create collection
     collection = client.get_or_create_collection(
@@ -110,14 +273,52 @@ def setup_chroma(force_recreate: bool = False):
         metadata={"description": "Buddy's backstory, personality, and SF knowledge"}
     )
     
-    # Add chunks to collection
-    collection.add(
-        documents=[chunk['text'] for chunk in chunks],
-        metadatas=[{'page': chunk['page']} for chunk in chunks],
-        ids=[chunk['id'] for chunk in chunks]
-    )
+    # Work out what changed since the last run. Compare against what's actually
+    # stored, so missing chunks are re-embedded and legacy positional IDs cleaned up
+    manifest = load_manifest(manifest_path)
+    existing_ids = set(collection.get(include=[])['ids'])
+    new_manifest = {'version': MANIFEST_VERSION, 'chunker': CHUNKER, 'sources': {}}
+    seen_ids = set()
+    embedded = 0
+    count_tokens, tokenizer_name = load_token_counter()
+    print(f"🔤 Chunking by {tokenizer_name} tokens ({CHUNKER})")
+    
+    # Stream changed pages through extraction -> chunking -> embedding -> upsert
+    pipeline = IngestPipeline(collection, embedding_functions.DefaultEmbeddingFunction())
+    with pipeline:
+        for path in sources:
+            source = path.relative_to(data_dir).as_posix()
+            entry, submitted = sync_source(
+                pipeline, path, source, manifest['sources'].get(source), existing_ids, seen_ids,
+                count_tokens
+            )
+            new_manifest['sources'][source] = entry
+            embedded += submitted
+            status = f"{submitted} chunk(s) to embed" if submitted else "unchanged"
+            print(f"   • {source}: {status}")
     
-    print(f"✅ Successfully loaded {len(chunks)} chunks into ChromaDB")
+    wanted_ids = {
+        chunk_id
+        for entry in new_manifest['sources'].values()
+        for page in entry['pages'].values()
+        for chunk_id in page['chunks']
+    }
+    orphan_ids = sorted(existing_ids - wanted_ids)
+    
+    # Remove chunks whose source text is gone
+    for start in range(0, len(orphan_ids), DELETE_BATCH_SIZE):
+        collection.delete(ids=orphan_ids[start:start + DELETE_BATCH_SIZE])
+    
+    save_manifest(manifest_path, new_manifest)
+    
+    # BM25 over every stored chunk, for hybrid retrieval and the lexical fast path
+    lexical_index = build_lexical_index(collection)
+    lexical_index.save(chroma_path / BM25_INDEX_FILE)
+    print(f"🔤 Built BM25 index over {lexical_index.count()} chunks ({len(lexical_index.postings)} terms)")
+    
+    print(f"\n⏱️  Pipeline throughput:\n{pipeline.report()}\n")
+    print(f"✅ Embedded {embedded} new chunk(s), deleted {len(orphan_ids)} orphaned, "
+          f"{collection.count()} total in ChromaDB")
     print(f"📍 Vector store saved to: {chroma_path}\n")
     
     # Quick validation query
@@ -129,16 +330,20 @@ def setup_chroma(force_recreate: bool = False):
     print(f"   Found {len(results['documents'][0])} relevant chunks")
     print(f"   Sample: {results['documents'][0][0][:100]}...\n")
     
+    if export_numpy:
+        embeddings_path = export_collection(collection, chroma_path / 'numpy_index')
+        print(f"🧮 Exported NumPy index to: {embeddings_path}\n")
+    
     print("🎉 Setup complete! You can now run the agent.")
 
 if __name__ == "__main__":
-    import sys
-    
     # Optional: pass --force to recreate the collection
     force = '--force' in sys.argv
+    export_numpy = '--export-numpy' in sys.argv
+    kb_id = next((arg.split('=', 1)[1] for arg in sys.argv[1:] if arg.startswith('--kb=')), DEFAULT_KB)
     
     try:
-        setup_chroma(force_recreate=force)
+        setup_chroma(force_recreate=force, export_numpy=export_numpy, kb_id=kb_id)
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -4,12 +4,37 @@ Tests ChromaDB queries before integrating with the voice agent.
 
 Usage:
     python scripts/test_rag.py
+    python scripts/test_rag.py --samples
+    python scripts/test_rag.py --benchmark [--k=1,3,5] [--concurrency=1,4,8]
+        [--iterations=5] [--queries=data/eval/rag_queries.json] [--output=results.json]
+
+Benchmark mode runs the labeled query set through BuddyRAG (so the configured
+backend and query cache are exercised) for every top_k x concurrency x
+cold/warm combination, and reports latency percentiles, throughput,
+recall@k and MRR. Results are saved as JSON for comparing runs.
 """
 
 import chromadb
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from buddy.rag import BuddyRAG
+from rag_eval import (
+    LABELED_QUERIES_PATH,
+    load_labeled_queries,
+    mean,
+    percentile,
+    recall_at_k,
+    reciprocal_rank,
+)
+
 class RAGTester:
     def __init__(self):
         project_root = Path(__file__).parent.parent
@@ -121,12 +146,152 @@ class RAGTester:
                 print("   ✗ No results found")
             print()
 
+class RAGBenchmark:
+    """Latency, throughput and quality benchmark over a labeled query set."""
+    
+    def __init__(self, labels: List[Dict], iterations: int = 5):
+        self.labels = labels
+        self.iterations = iterations
+    
+    def evaluate_quality(self, rag: BuddyRAG, top_k: int) -> Dict:
+        """recall@k and MRR straight from the backend (the cache doesn't change ranking)."""
+        recalls, ranks = [], []
+        for label in self.labels:
+            embedding = rag.embedding_function([label['query']])[0]
+            results = rag.collection.query(query_embeddings=[embedding], n_results=top_k)
+            metadatas, ids = results['metadatas'][0], results['ids'][0]
+            recalls.append(recall_at_k(label, metadatas, ids, top_k))
+            ranks.append(reciprocal_rank(label, metadatas, ids))
+        return {'recall_at_k': round(mean(recalls), 4), 'mrr': round(mean(ranks), 4)}
+    
+    def measure(self, rag: BuddyRAG, top_k: int, concurrency: int, passes: int) -> Dict:
+        """Run the query set `passes` times with `concurrency` threads."""
+        queries = [label['query'] for label in self.labels] * passes
+        
+        def _timed(query: str) -> float:
+            start = time.perf_counter()
+            rag.retrieve(query, top_k=top_k)
+            return (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(_timed, queries))
+        elapsed = time.perf_counter() - start
+        
+        return {
+            'queries': len(queries),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'p99': round(percentile(latencies, 99), 3),
+                'mean': round(mean(latencies), 3),
+            },
+            'throughput_qps': round(len(queries) / elapsed, 2),
+        }
+    
+    @staticmethod
+    def cache_lookups(rag: BuddyRAG) -> tuple:
+        """(hits, lookups) so far, to report a per-run cache hit rate."""
+        if rag.cache is None:
+            return 0, 0
+        stats = rag.cache.stats
+        hits = stats.exact_hits + stats.semantic_hits
+        return hits, hits + stats.misses
+    
+    def run(self, k_values: List[int], concurrency_levels: List[int]) -> List[Dict]:
+        runs = []
+        for top_k in k_values:
+            for concurrency in concurrency_levels:
+                # Cold: fresh retriever with an empty query cache, one pass
+                rag = BuddyRAG(top_k=top_k)
+                quality = self.evaluate_quality(rag, top_k)
+                for cache_state, passes in (('cold', 1), ('warm', self.iterations)):
+                    before = self.cache_lookups(rag)
+                    result = self.measure(rag, top_k, concurrency, passes)
+                    run = {
+                        'cache_state': cache_state,
+                        'top_k': top_k,
+                        'concurrency': concurrency,
+                        **result,
+                        **quality,
+                    }
+                    if rag.cache is not None:
+                        hits, lookups = (a - b for a, b in zip(self.cache_lookups(rag), before))
+                        run['cache_hit_rate'] = round(hits / lookups, 4) if lookups else 0.0
+                    runs.append(run)
+                    self.print_run(run)
+        return runs
+    
+    @staticmethod
+    def print_run(run: Dict):
+        latency = run['latency_ms']
+        print(f"   k={run['top_k']:<2} c={run['concurrency']:<2} {run['cache_state']:<4} | "
+              f"p50 {latency['p50']:8.2f}ms p95 {latency['p95']:8.2f}ms p99 {latency['p99']:8.2f}ms | "
+              f"{run['throughput_qps']:8.1f} q/s | recall@k {run['recall_at_k']:.2f} MRR {run['mrr']:.2f}")
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v]
+
+
+def run_benchmark(args: List[str]):
+    k_values = [1, 3, 5]
+    concurrency_levels = [1, 4, 8]
+    iterations = 5
+    queries_path = LABELED_QUERIES_PATH
+    output_path = None
+    
+    for arg in args:
+        if arg.startswith('--k='):
+            k_values = parse_int_list(arg[4:])
+        elif arg.startswith('--concurrency='):
+            concurrency_levels = parse_int_list(arg[14:])
+        elif arg.startswith('--iterations='):
+            iterations = int(arg[13:])
+        elif arg.startswith('--queries='):
+            queries_path = Path(arg[10:])
+        elif arg.startswith('--output='):
+            output_path = Path(arg[9:])
+    
+    labels = load_labeled_queries(queries_path)
+    print(f"🏁 Benchmarking {len(labels)} labeled queries from {queries_path}\n")
+    
+    benchmark = RAGBenchmark(labels, iterations=iterations)
+    runs = benchmark.run(k_values, concurrency_levels)
+    
+    probe = BuddyRAG()
+    manifest_path = Path(probe.chroma_path) / 'manifest.json'
+    chunker = None
+    if manifest_path.exists():
+        chunker = json.loads(manifest_path.read_text()).get('chunker')
+    
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'backend': probe.backend,
+            'chunks': probe.collection.count(),
+            'chunker': chunker,
+            'cache': probe.cache is not None,
+            'queries': str(queries_path),
+            'iterations': iterations,
+        },
+        'runs': runs,
+    }
+    
+    if output_path is None:
+        output_path = Path(f"rag_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output_path.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Results saved to {output_path}")
+
+
 def main():
-    import sys
+    # Check for --benchmark / --samples flags
+    if '--benchmark' in sys.argv:
+        run_benchmark(sys.argv[1:])
+        return
     
     tester = RAGTester()
     
-    # Check for --samples flag
     if '--samples' in sys.argv:
         tester.run_sample_queries()
     else:
@@ -0,0 +1,54 @@
+from livekit.agents import llm
+
+from buddy.context_compaction import RAG_CONTEXT_PREFIX
+from buddy.main import Assistant
+from buddy.rag import RetrievedChunk
+
+# Knowledge-base chunks run to a few hundred tokens
+CHUNKS = [
+    RetrievedChunk(id="a", text="Buddy grew up chasing sea lions at Pier 39 every single morning. " * 10, score=0.8),
+    RetrievedChunk(id="b", text="Buddy's favorite burrito is the super carnitas at La Taqueria. " * 10, score=0.7),
+]
+
+
+class FakeRAG:
+    """Returns the same chunks for every query."""
+
+    async def aretrieve_chunks(self, query: str, timeout: float = None) -> list[RetrievedChunk]:
+        return list(CHUNKS)
+
+
+def assistant() -> Assistant:
+    agent = Assistant(rag=FakeRAG())
+    agent.speculator = None
+    agent.router = None
+    return agent
+
+
+async def user_turn(agent: Assistant, text: str) -> str:
+    """Run one turn the way AgentActivity does and return the injected context."""
+    turn_ctx = agent.chat_ctx.copy()
+    message = llm.ChatMessage(role="user", content=[text])
+    await agent.on_user_turn_completed(turn_ctx, message)
+    injected = turn_ctx.items[-1].text_content
+    assert injected.startswith(RAG_CONTEXT_PREFIX)
+    # The activity saves the user message and the reply after generating
+    chat_ctx = agent.chat_ctx.copy()
+    chat_ctx.insert(message)
+    chat_ctx.add_message(role="assistant", content="Woof, sea lions and burritos!")
+    await agent.update_chat_ctx(chat_ctx)
+    return injected
+
+
+async def test_repeated_chunks_are_referenced_on_the_next_turn():
+    agent = assistant()
+
+    first = await user_turn(agent, "where did buddy grow up?")
+    second = await user_turn(agent, "tell me more about buddy growing up")
+
+    assert len(second) < len(first)
+    assert "Already shared earlier in this conversation" in second
+    assert agent.ledger.stats.repeated_chunks == 2
+    # The full text the references point at is still in the prompt
+    compacted = agent.compactor.compact(agent.chat_ctx)
+    assert sum(CHUNKS[0].text in (item.text_content or "") for item in compacted.items) == 1
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from chunking import approximate_token_count, iter_token_chunks, normalize_page_text
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def sentence(i: int, length: int = 10) -> str:
+    return " ".join([f"s{i}"] * (length - 1)) + f" end{i}."
+
+
+def test_paragraphs_are_split_and_whitespace_collapsed():
+    text = "Buddy grew up  at Pier 39.\n\n  He chased\tsea lions every morning. \n\n\n"
+
+    assert normalize_page_text(text) == ["Buddy grew up at Pier 39.", "He chased sea lions every morning."]
+
+
+def test_word_per_line_pdfs_are_one_paragraph():
+    assert normalize_page_text("Buddy\nloves\nsea\nlions\n\nat\nthe\npier") == ["Buddy loves sea lions at the pier"]
+
+
+def test_chunks_stay_within_the_token_limit_and_overlap():
+    text = " ".join(sentence(i) for i in range(10))
+
+    chunks = list(iter_token_chunks(text, words, max_tokens=30, overlap_tokens=10))
+
+    assert all(tokens <= 30 for _, tokens in chunks)
+    assert all(words(chunk) == tokens for chunk, tokens in chunks)
+    # Each chunk starts with the last sentence of the one before
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous[0].endswith(current[0].split(". ")[0] + ".")
+    assert chunks[-1][0].endswith("end9.")
+
+
+def test_overlap_never_carries_a_whole_chunk():
+    text = " ".join(sentence(i) for i in range(4))
+
+    chunks = list(iter_token_chunks(text, words, max_tokens=10, overlap_tokens=10))
+
+    assert [chunk for chunk, _ in chunks] == [sentence(i) for i in range(4)]
+
+
+def test_long_sentences_are_split_on_words():
+    text = " ".join(["word"] * 25) + "."
+
+    chunks = list(iter_token_chunks(text, words, max_tokens=10, overlap_tokens=0))
+
+    assert [tokens for _, tokens in chunks] == [10, 10, 5]
+
+
+def test_full_paragraphs_end_their_chunk():
+    text = sentence(0, 12) + "\n\n" + sentence(1, 6)
+
+    chunks = list(iter_token_chunks(text, words, max_tokens=20, overlap_tokens=0))
+
+    assert [chunk for chunk, _ in chunks] == [sentence(0, 12), sentence(1, 6)]
+
+
+def test_approximate_count_adds_for_long_words():
+    assert approximate_token_count("Buddy ate.") == 3
+    assert approximate_token_count("extraordinarily") == 1
+    assert approximate_token_count("extraordinarily unbelievable wonderful") == 5
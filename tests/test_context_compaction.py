@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+from livekit.agents import llm
+
+from buddy.context_compaction import RAG_CONTEXT_PREFIX, SUMMARY_MESSAGE_ID, ContextCompactor
+
+PERSONA = "You are Buddy, a friendly dog who knows San Francisco events."
+
+
+class FakeSummarizer:
+    """Streams a fixed summary the way llm.LLM.chat() does."""
+
+    def __init__(self, summary: str = "User is Sam and loves jazz in the Mission."):
+        self.summary = summary
+        self.requests = []
+
+    def chat(self, chat_ctx):
+        self.requests.append(chat_ctx)
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        for word in self.summary.split(" "):
+            yield SimpleNamespace(delta=SimpleNamespace(content=word + " "))
+
+
+def conversation(turns: int, words: int = 20) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content=PERSONA)
+    for i in range(turns):
+        chat_ctx.add_message(role="user", content=f"question {i} " + "word " * words)
+        chat_ctx.add_message(role="assistant", content=f"answer {i} " + "woof " * words)
+    return chat_ctx
+
+
+def texts(chat_ctx: llm.ChatContext) -> list[str]:
+    return [item.text_content for item in chat_ctx.items if item.type == "message"]
+
+
+def test_small_history_is_sent_unchanged():
+    chat_ctx = conversation(3)
+
+    compacted = ContextCompactor(PERSONA, max_tokens=1000).compact(chat_ctx)
+
+    assert texts(compacted) == texts(chat_ctx)
+
+
+def test_oldest_turns_are_dropped_to_fit_but_the_persona_stays():
+    compactor = ContextCompactor(PERSONA, max_tokens=150)
+
+    compacted = compactor.compact(conversation(10))
+
+    assert compacted.items[0].text_content == PERSONA
+    assert texts(compacted)[-1].startswith("answer 9")
+    assert not any(text.startswith("question 0") for text in texts(compacted))
+    assert compactor.stats.last_tokens <= 150
+    assert compactor.stats.truncated_items > 0
+
+
+def test_old_rag_context_and_tool_calls_are_dropped():
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content=PERSONA)
+    chat_ctx.add_message(role="user", content="any jazz tonight?")
+    chat_ctx.add_message(role="assistant", content=f"{RAG_CONTEXT_PREFIX} Buddy loves jazz.")
+    chat_ctx.items.append(llm.FunctionCall(call_id="c1", name="find_nearby_events", arguments='{"q": "jazz"}'))
+    chat_ctx.items.append(llm.FunctionCallOutput(call_id="c1", name="find_nearby_events", output="Jazz Night", is_error=False))
+    chat_ctx.add_message(role="assistant", content="Jazz Night at SFJAZZ!")
+    for i in range(2):
+        chat_ctx.add_message(role="user", content=f"question {i}")
+        chat_ctx.add_message(role="assistant", content=f"{RAG_CONTEXT_PREFIX} Buddy loves tacos {i}.")
+        chat_ctx.add_message(role="assistant", content=f"answer {i}")
+    compactor = ContextCompactor(PERSONA, max_tokens=1000, tool_ttl_turns=2, rag_ttl_turns=2)
+
+    compacted = compactor.compact(chat_ctx)
+
+    assert not any(item.type in ("function_call", "function_call_output") for item in compacted.items)
+    # Recent RAG context stays so later turns can refer back to it
+    assert [text for text in texts(compacted) if text.startswith(RAG_CONTEXT_PREFIX)] == [
+        f"{RAG_CONTEXT_PREFIX} Buddy loves tacos 0.",
+        f"{RAG_CONTEXT_PREFIX} Buddy loves tacos 1.",
+    ]
+    assert "Jazz Night at SFJAZZ!" in texts(compacted)
+    assert compactor.stats.dropped_tool_items == 2
+    assert compactor.stats.dropped_rag_items == 1
+
+
+async def test_older_turns_are_folded_into_a_summary_in_the_background():
+    summarizer = FakeSummarizer()
+    compactor = ContextCompactor(PERSONA, max_tokens=400, keep_turns=2)
+    chat_ctx = conversation(6)
+
+    compactor.compact(chat_ctx, summarizer)
+    await asyncio.wait_for(compactor._summary_task, 1)
+    compacted = compactor.compact(chat_ctx, summarizer)
+
+    assert compactor.summary == summarizer.summary
+    assert compactor.stats.summarized_items == 8
+    summary = next(item for item in compacted.items if item.id == SUMMARY_MESSAGE_ID)
+    assert summarizer.summary in summary.text_content
+    assert [text.split(" ")[0:2] for text in texts(compacted)[2:]] == [
+        ["question", "4"], ["answer", "4"], ["question", "5"], ["answer", "5"],
+    ]
+
+
+async def test_failed_summary_falls_back_to_truncation():
+    class BrokenSummarizer(FakeSummarizer):
+        async def __aenter__(self):
+            raise RuntimeError("LLM is down")
+
+    compactor = ContextCompactor(PERSONA, max_tokens=400, keep_turns=2)
+
+    compactor.compact(conversation(6), BrokenSummarizer())
+    await asyncio.wait_for(compactor._summary_task, 1)
+
+    assert compactor.summary == ""
+    assert compactor.stats.summary_failures == 1
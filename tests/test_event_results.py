@@ -0,0 +1,82 @@
+from buddy.event_results import (
+    EventSummary,
+    clean_snippet,
+    clean_title,
+    dedupe,
+    estimate_tokens,
+    parse_results,
+    process_results,
+    summarize_events,
+)
+
+
+def result(name: str, url: str, content: str) -> dict:
+    return {"type": "text", "name": name, "url": url, "content": content}
+
+
+def test_snippet_loses_links_and_chrome():
+    text = "![poster](https://x.com/a.png) **Jazz Night** at [SFJAZZ](https://sfjazz.org). Buy tickets now! Read more"
+
+    assert clean_snippet(text) == "Jazz Night at SFJAZZ"
+
+
+def test_title_drops_site_suffix_but_keeps_real_dashes():
+    assert clean_title("Jazz Night | Eventbrite", "https://www.eventbrite.com/e/1") == "Jazz Night"
+    assert clean_title("Noe Valley - Street Fair", "https://sf.funcheap.com/x") == "Noe Valley - Street Fair"
+
+
+def test_results_pick_up_date_venue_and_neighborhood():
+    [event] = parse_results([
+        result("Dumpling Fest", "https://example.com/d", "Sat Nov 8 at The Chapel in the Mission. Free entry."),
+    ])
+
+    assert event.date == "Sat Nov 8"
+    assert event.venue == "The Chapel"
+    assert event.neighborhood == "Mission"
+
+
+def test_duplicates_merge_their_details():
+    events = dedupe([
+        EventSummary(title="Outside Lands 2025", url="https://a.com/1", snippet=""),
+        EventSummary(title="Outside Lands 2025!", url="https://b.com/2", snippet="", date="Aug 8-10"),
+    ])
+
+    assert len(events) == 1
+    assert events[0].url == "https://a.com/1"
+    assert events[0].date == "Aug 8-10"
+
+
+def test_events_without_urls_are_not_merged_by_url():
+    events = dedupe([
+        EventSummary(title="Taco Crawl", url="", snippet=""),
+        EventSummary(title="Symphony Matinee", url="", snippet=""),
+    ])
+
+    assert [e.title for e in events] == ["Taco Crawl", "Symphony Matinee"]
+
+
+def test_summary_stays_within_budget_and_keeps_the_first_event():
+    events = [EventSummary(title=f"Event {i}", url="", snippet="word " * 60) for i in range(5)]
+
+    summary = summarize_events(events, token_budget=60)
+
+    assert estimate_tokens(summary) <= 60 + len(summary.splitlines())
+    assert "1. Event 0" in summary
+
+    tiny = summarize_events(events, token_budget=1)
+    assert "1. Event 0" in tiny
+    assert "2. Event 1" not in tiny
+
+
+def test_pipeline_ranks_by_query_and_returns_only_summarized_events():
+    results = [
+        result("Comedy Night", "https://example.com/c", "Stand-up at the Punch Line, Nov 8"),
+        result("Jazz Night", "https://example.com/j", "Live jazz at SFJAZZ Center, Nov 8"),
+        result("Jazz Night | Eventbrite", "https://www.eventbrite.com/j", "Live jazz, Nov 8"),
+    ]
+
+    summary, events = process_results(results, "jazz this weekend", max_results=5)
+
+    assert [e.title for e in events] == ["Jazz Night", "Comedy Night"]
+    assert summary.splitlines()[1].startswith("1. Jazz Night")
+    assert "https://" not in summary
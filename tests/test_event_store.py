@@ -0,0 +1,110 @@
+import os
+import time
+from datetime import date
+
+from buddy.event_store import EventStore, StoredEvent, parse_date_range, parse_event_query, write_store
+
+# A Wednesday
+TODAY = date(2025, 11, 5)
+
+
+def event(event_id: str, title: str, start: date, categories: list[str], neighborhood: str = None) -> StoredEvent:
+    return StoredEvent(
+        id=event_id, title=title, url=f"https://example.com/{event_id}", snippet=f"{title} in San Francisco",
+        start_date=start, end_date=None, date_text=start.strftime("%b %d"), venue=None,
+        neighborhood=neighborhood, categories=categories,
+    )
+
+
+def test_relative_dates():
+    assert parse_date_range("anything tonight?", TODAY) == (TODAY, TODAY)
+    assert parse_date_range("what's on this weekend", TODAY) == (date(2025, 11, 8), date(2025, 11, 9))
+    assert parse_date_range("next week", TODAY) == (date(2025, 11, 10), date(2025, 11, 16))
+
+
+def test_explicit_dates():
+    assert parse_date_range("Nov 15-16", TODAY) == (date(2025, 11, 15), date(2025, 11, 16))
+    assert parse_date_range("on 11/8", TODAY) == (date(2025, 11, 8), date(2025, 11, 8))
+    # Well past without a year means next year
+    assert parse_date_range("March 3rd", TODAY) == (date(2026, 3, 3), date(2026, 3, 3))
+    assert parse_date_range("in December", TODAY) == (date(2025, 12, 1), date(2025, 12, 31))
+
+
+def test_may_is_only_a_month_with_in():
+    assert parse_date_range("you may like this", TODAY) is None
+    assert parse_date_range("events in may", TODAY) == (date(2026, 5, 1), date(2026, 5, 31))
+
+
+def test_query_keeps_only_specific_terms():
+    query = parse_event_query("food festivals this weekend", TODAY)
+
+    assert query.categories == ("food", "festival")
+    assert query.dates == (date(2025, 11, 8), date(2025, 11, 9))
+    assert query.terms == ()
+
+    assert parse_event_query("is outside lands happening", TODAY).terms == ("outside", "lands")
+
+
+def test_store_answers_broad_queries_with_enough_matches(tmp_path):
+    path = tmp_path / "events.db"
+    write_store([
+        event("a", "Jazz Night", date(2025, 11, 8), ["music"]),
+        event("b", "Symphony Matinee", date(2025, 11, 9), ["music"]),
+        event("c", "Indie Concert", date(2025, 11, 8), ["music"]),
+        event("d", "Taco Crawl", date(2025, 11, 8), ["food"]),
+    ], path)
+    store = EventStore(path, min_results=3)
+
+    data = store.search("music this weekend", today=TODAY)
+    assert data["source"] == "event_store"
+    assert {r["name"] for r in data["results"]} == {"Jazz Night", "Symphony Matinee", "Indie Concert"}
+
+    # One food event isn't enough to answer a broad question locally
+    assert store.search("food this weekend", today=TODAY) is None
+    assert store.stats.hits == 1
+    assert store.stats.misses == 1
+
+
+def test_store_answers_a_named_event_from_one_match(tmp_path):
+    path = tmp_path / "events.db"
+    write_store([event("a", "Outside Lands", date(2025, 11, 8), ["music", "festival"])], path)
+    store = EventStore(path, min_results=3)
+
+    data = store.search("outside lands", today=TODAY)
+
+    assert [r["name"] for r in data["results"]] == ["Outside Lands"]
+
+
+def test_stale_store_is_only_used_as_a_fallback(tmp_path):
+    path = tmp_path / "events.db"
+    write_store([event("a", "Taco Crawl", date(2025, 11, 8), ["food"])], path)
+    store = EventStore(path, max_age=0.0, min_results=3)
+    time.sleep(0.01)
+
+    assert store.search("food this weekend", today=TODAY) is None
+    assert store.stats.unavailable == 1
+
+    data = store.search("food this weekend", today=TODAY, fallback=True)
+    assert [r["name"] for r in data["results"]] == ["Taco Crawl"]
+    assert store.stats.fallback_hits == 1
+
+
+def test_store_reopens_when_the_file_is_replaced(tmp_path):
+    path = tmp_path / "events.db"
+    write_store([event("a", "Taco Crawl", date(2025, 11, 8), ["food"])], path)
+    store = EventStore(path, min_results=1)
+    assert [r["name"] for r in store.search("food this weekend", today=TODAY)["results"]] == ["Taco Crawl"]
+
+    write_store([event("b", "Dumpling Fest", date(2025, 11, 9), ["food", "festival"])], path)
+    # Make sure the replacement looks different even on coarse mtime filesystems
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+
+    assert [r["name"] for r in store.search("food this weekend", today=TODAY)["results"]] == ["Dumpling Fest"]
+    assert store.stats.reopens == 2
+
+
+def test_missing_store_sends_searches_live(tmp_path):
+    store = EventStore(tmp_path / "missing.db")
+
+    assert store.search("music tonight", today=TODAY) is None
+    assert store.stats.unavailable == 1
@@ -0,0 +1,83 @@
+from buddy.lexical_index import BM25Index, tokenize
+from buddy.rag import RetrievedChunk, fuse_rankings, lexical_confident
+
+DOCUMENTS = [
+    "Buddy's favorite food trucks park at Off the Grid in Fort Mason.",
+    "Buddy grew up chasing sea lions at Pier 39.",
+    "Buddy loves the Mission burritos and the food at La Taqueria.",
+    "Buddy naps in Dolores Park on sunny afternoons.",
+]
+
+
+def index() -> BM25Index:
+    return BM25Index.build([f"c{i}" for i in range(len(DOCUMENTS))], DOCUMENTS, [{} for _ in DOCUMENTS])
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("What are Buddy's favorite food trucks?") == ["buddy", "favorite", "food", "truck"]
+    assert tokenize("the galleries and parks") == ["gallery", "park"]
+
+
+def test_search_ranks_the_chunk_with_the_rare_terms_first():
+    hits = index().search("sea lions at the pier", k=2)
+
+    assert hits[0].position == 1
+    assert hits[0].coverage == 1.0
+
+
+def test_coverage_is_partial_when_terms_are_missing():
+    hits = index().search("food trucks in Oakland", k=4)
+
+    assert hits[0].position == 0
+    assert 0 < hits[0].coverage < 1
+    # "food" alone matches the taqueria chunk too
+    assert {hit.position for hit in hits} == {0, 2}
+
+
+def test_queries_with_nothing_indexed_find_nothing():
+    assert index().search("quantum chromodynamics", k=3) == []
+    assert index().search("what is the", k=3) == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "bm25.json"
+    index().save(path)
+
+    loaded = BM25Index.load(path)
+
+    assert loaded.count() == len(DOCUMENTS)
+    assert [hit.position for hit in loaded.search("dolores park naps", k=1)] == [3]
+
+
+def test_fast_path_needs_a_specific_query():
+    bm25 = index()
+    hits = bm25.search("sea lions at the pier", k=3 * 3)
+
+    assert lexical_confident(bm25, "sea lions at the pier", hits, k=3)
+
+
+def test_generic_query_is_not_confident_despite_full_coverage():
+    bm25 = index()
+    hits = bm25.search("who is Buddy?", k=3 * 3)
+
+    # Every chunk mentions Buddy, so every chunk covers the whole query
+    assert [hit.coverage for hit in hits] == [1.0] * len(DOCUMENTS)
+    assert bm25.query_weight("who is Buddy?") < 0.5
+    assert not lexical_confident(bm25, "who is Buddy?", hits, k=3)
+    # Even ignoring the weight, nothing separates the top k from the rest
+    assert not lexical_confident(bm25, "who is Buddy?", hits, k=3, min_weight=0.0)
+
+
+def chunk(chunk_id: str, score: float) -> RetrievedChunk:
+    return RetrievedChunk(id=chunk_id, text=chunk_id, score=score)
+
+
+def test_fusion_prefers_chunks_both_rankings_agree_on():
+    vector = [chunk("a", 0.9), chunk("b", 0.8), chunk("c", 0.7)]
+    lexical = [chunk("c", 12.0), chunk("d", 9.0), chunk("b", 3.0)]
+
+    fused = fuse_rankings([vector, lexical], k=3)
+
+    assert [c.id for c in fused] == ["c", "b", "a"]
+    # Scores come from the first ranking a chunk appears in
+    assert fused[0].score == 0.7
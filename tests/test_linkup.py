@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from buddy import linkup
+from buddy.linkup import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LinkupClient, LinkupUnavailable, fetch_linkup
+
+REQUEST = httpx.Request("POST", "https://api.linkup.so/v1/search")
+
+
+def unavailable() -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError("503", request=REQUEST, response=httpx.Response(503, request=REQUEST))
+
+
+class FakeLinkup:
+    """Answers each request after its delay, or raises its error, in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = 0
+
+    async def fetch(self, query: str, timeout: float) -> dict:
+        outcome = self.outcomes[min(self.requests, len(self.outcomes) - 1)]
+        self.requests += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        await asyncio.sleep(min(outcome, timeout))
+        if outcome > timeout:
+            raise httpx.ReadTimeout("timed out", request=REQUEST)
+        return {"results": [query]}
+
+
+@pytest.fixture(autouse=True)
+def quick_backoff(monkeypatch):
+    monkeypatch.setattr(linkup, "LINKUP_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(linkup, "LINKUP_MIN_ATTEMPT", 0.01)
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_cooldown():
+    breaker = CircuitBreaker(failures=2, cooldown=0.01, probe_timeout=1.0)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_only_transient_errors_count():
+    bad_request = httpx.HTTPStatusError("400", request=REQUEST, response=httpx.Response(400, request=REQUEST))
+
+    assert linkup.is_transient(unavailable())
+    assert linkup.is_transient(httpx.ConnectError("refused", request=REQUEST))
+    assert not linkup.is_transient(bad_request)
+    assert not linkup.is_transient(ValueError("bad json"))
+
+
+async def test_transient_failures_are_retried():
+    upstream = FakeLinkup(unavailable(), 0.0)
+    client = LinkupClient(upstream.fetch, deadline=1.0, hedge=False, retries=2)
+
+    assert await client.search("jazz") == {"results": ["jazz"]}
+    assert upstream.requests == 2
+    assert client.stats.retries == 1
+
+
+async def test_other_errors_are_not_retried():
+    upstream = FakeLinkup(ValueError("bad json"))
+    client = LinkupClient(upstream.fetch, deadline=1.0, hedge=False, retries=2)
+
+    with pytest.raises(ValueError):
+        await client.search("jazz")
+    assert upstream.requests == 1
+
+
+async def test_slow_request_is_hedged_and_the_hedge_can_win(monkeypatch):
+    monkeypatch.setattr(linkup, "LINKUP_HEDGE_DELAY_MS", 20)
+    # Ignore latencies other tests recorded
+    monkeypatch.setattr(linkup, "LINKUP_HEDGE_MIN_SAMPLES", 10**9)
+    upstream = FakeLinkup(0.5, 0.0)
+    client = LinkupClient(upstream.fetch, deadline=1.0, hedge=True)
+
+    started = time.monotonic()
+    assert await client.search("jazz") == {"results": ["jazz"]}
+
+    assert time.monotonic() - started < 0.4
+    assert client.stats.hedges == 1
+    assert client.stats.hedge_wins == 1
+
+
+async def test_search_gives_up_at_the_deadline():
+    upstream = FakeLinkup(5.0)
+    client = LinkupClient(upstream.fetch, deadline=0.1, hedge=False, retries=2)
+
+    started = time.monotonic()
+    with pytest.raises(LinkupUnavailable):
+        await client.search("jazz")
+
+    assert time.monotonic() - started < 0.5
+    assert client.stats.deadline_exceeded == 1
+
+
+async def test_open_breaker_fails_fast():
+    upstream = FakeLinkup(unavailable())
+    breaker = CircuitBreaker(failures=2, cooldown=60.0)
+    client = LinkupClient(upstream.fetch, deadline=1.0, hedge=False, retries=0, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.search("jazz")
+    with pytest.raises(LinkupUnavailable):
+        await client.search("jazz")
+
+    assert upstream.requests == 2
+    assert client.stats.breaker_trips == 1
+    assert client.stats.rejected == 1
+
+
+async def test_fetch_without_api_key_is_unavailable(monkeypatch):
+    monkeypatch.delenv("LINKUP_API_KEY", raising=False)
+
+    with pytest.raises(LinkupUnavailable):
+        await fetch_linkup("jazz")
@@ -0,0 +1,37 @@
+from buddy.phrase_cache import PhraseAudioCache, _Clip
+
+PHRASES = {"search_filler": ("Hang on!", "One sec!")}
+
+
+def make_cache(tmp_path) -> PhraseAudioCache:
+    return PhraseAudioCache(voice_id="voice", model="model", cache_dir=str(tmp_path), phrases=PHRASES)
+
+
+def write(cache: PhraseAudioCache, text: str) -> None:
+    cache._write_clip(cache.clip_path(text), _Clip(pcm=b"\x00\x01" * 480, sample_rate=24000, num_channels=1))
+
+
+def test_load_evicts_files_from_an_old_voice(tmp_path):
+    write(make_cache(tmp_path), "Hang on!")
+    old_voice = PhraseAudioCache(voice_id="old", model="model", cache_dir=str(tmp_path), phrases=PHRASES)
+    write(old_voice, "One sec!")
+
+    cache = make_cache(tmp_path)
+
+    assert cache.load() == 1
+    assert cache.missing() == ["One sec!"]
+    assert cache.stats.evicted == 1
+    assert not old_voice.clip_path("One sec!").exists()
+
+
+def test_reload_picks_up_phrases_written_by_another_process(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.load() == 0
+
+    # Another job process synthesized them after this one loaded (or forked)
+    write(make_cache(tmp_path), "Hang on!")
+    write(make_cache(tmp_path), "One sec!")
+
+    assert cache.reload_if_missing() == 2
+    assert cache.missing() == []
+    assert cache.reload_if_missing() == 0
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from buddy import rag
+from buddy.rag import RETRIEVAL_WORKERS, BuddyRAG, RetrievalStats, RetrievedChunk
+
+
+def make_rag(retrieve) -> BuddyRAG:
+    """A BuddyRAG without a knowledge base behind it, answering with retrieve()."""
+    instance = object.__new__(BuddyRAG)
+    instance.timeout = 1.0
+    instance.stats = RetrievalStats()
+    instance.retrieve_chunks = retrieve
+    return instance
+
+
+def chunk_for(query: str) -> list[RetrievedChunk]:
+    return [RetrievedChunk(id=query, text=f"about {query}", score=0.9)]
+
+
+async def test_slots_are_released_after_each_retrieval():
+    instance = make_rag(lambda query, top_k=None: chunk_for(query))
+
+    for i in range(RETRIEVAL_WORKERS * 3):
+        chunks = await instance.aretrieve_chunks(f"query {i}")
+        assert [chunk.id for chunk in chunks] == [f"query {i}"]
+
+    assert instance.stats.shed == 0
+    assert instance.stats.completed == RETRIEVAL_WORKERS * 3
+    assert rag._in_flight == 0
+
+
+async def test_calls_beyond_the_workers_are_shed_then_served_again():
+    release = threading.Event()
+
+    def blocking(query, top_k=None):
+        release.wait(timeout=5)
+        return chunk_for(query)
+
+    instance = make_rag(blocking)
+    busy = [asyncio.create_task(instance.aretrieve_chunks(f"busy {i}")) for i in range(RETRIEVAL_WORKERS)]
+    await asyncio.sleep(0.05)
+
+    assert await instance.aretrieve_chunks("one too many") == []
+    assert instance.stats.shed == 1
+
+    release.set()
+    await asyncio.gather(*busy)
+    await asyncio.sleep(0)
+    assert rag._in_flight == 0
+    assert await instance.aretrieve_chunks("after") == chunk_for("after")
+
+
+async def test_timed_out_retrieval_holds_its_slot_until_it_finishes():
+    release = threading.Event()
+
+    def blocking(query, top_k=None):
+        release.wait(timeout=5)
+        return chunk_for(query)
+
+    instance = make_rag(blocking)
+    assert await instance.aretrieve_chunks("slow", timeout=0.01) == []
+    assert instance.stats.timed_out == 1
+    assert rag._in_flight == 1
+
+    release.set()
+    while rag._in_flight:
+        await asyncio.sleep(0.01)
+    assert await instance.aretrieve_chunks("next") == chunk_for("next")
+
+
+async def test_blocking_retrieval_leaves_the_event_loop_free():
+    def slow(query, top_k=None):
+        time.sleep(0.2)
+        return chunk_for(query)
+
+    instance = make_rag(slow)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    context = await instance.aretrieve("where did buddy grow up")
+    ticker.cancel()
+
+    assert context == "about where did buddy grow up"
+    assert ticks >= 10
+
+
+async def test_retrieval_past_the_deadline_returns_no_context_promptly():
+    release = threading.Event()
+
+    def blocking(query, top_k=None):
+        release.wait(timeout=5)
+        return chunk_for(query)
+
+    instance = make_rag(blocking)
+    started = time.monotonic()
+    context = await instance.aretrieve("slow", timeout=0.05)
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert context == ""
+    assert elapsed < 0.5
+    assert instance.stats.timed_out == 1
+
+
+async def test_cancelled_retrieval_is_counted():
+    release = threading.Event()
+
+    def blocking(query, top_k=None):
+        release.wait(timeout=5)
+        return chunk_for(query)
+
+    instance = make_rag(blocking)
+    task = asyncio.create_task(instance.aretrieve_chunks("interrupted"))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    release.set()
+
+    assert instance.stats.cancelled == 1
+    while rag._in_flight:
+        await asyncio.sleep(0.01)
@@ -0,0 +1,61 @@
+import time
+
+from buddy.rag_cache import SemanticQueryCache, normalize_query
+
+
+def test_queries_normalize_case_punctuation_and_spacing():
+    assert normalize_query("  What's   Buddy's FAVORITE food?! ") == "what's buddy's favorite food"
+
+
+def test_exact_hit_ignores_phrasing_noise():
+    cache = SemanticQueryCache()
+    cache.put("Where did Buddy grow up?", [1.0, 0.0], top_k=3, value="pier 39")
+
+    assert cache.get_exact("where did buddy grow up", top_k=3) == "pier 39"
+    # A different top_k is a different retrieval
+    assert cache.get_exact("where did buddy grow up", top_k=5) is None
+    assert cache.stats.exact_hits == 1
+
+
+def test_similar_embedding_hits_within_threshold():
+    cache = SemanticQueryCache(similarity_threshold=0.9)
+    cache.put("where did buddy grow up", [1.0, 0.0], top_k=3, value="pier 39")
+
+    assert cache.get_similar([0.99, 0.05], top_k=3) == "pier 39"
+    assert cache.get_similar([0.0, 1.0], top_k=3) is None
+    assert cache.stats.semantic_hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticQueryCache(max_entries=2)
+    cache.put("a", [1.0, 0.0], top_k=3, value="a")
+    cache.put("b", [0.0, 1.0], top_k=3, value="b")
+    cache.get_exact("a", top_k=3)
+    cache.put("c", [1.0, 1.0], top_k=3, value="c")
+
+    assert cache.get_exact("a", top_k=3) == "a"
+    assert cache.get_exact("b", top_k=3) is None
+    assert cache.stats.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = SemanticQueryCache(ttl=0.01)
+    cache.put("a", [1.0, 0.0], top_k=3, value="a")
+    time.sleep(0.02)
+
+    assert cache.get_exact("a", top_k=3) is None
+    assert cache.get_similar([1.0, 0.0], top_k=3) is None
+    assert len(cache) == 0
+    assert cache.stats.expirations == 1
+
+
+def test_invalidate_drops_everything():
+    cache = SemanticQueryCache()
+    cache.put("a", [1.0, 0.0], top_k=3, value="a")
+
+    cache.invalidate()
+
+    assert len(cache) == 0
+    assert cache.stats.invalidations == 1
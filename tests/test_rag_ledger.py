@@ -0,0 +1,62 @@
+from buddy.rag import RetrievedChunk
+from buddy.rag_ledger import RetrievalLedger
+
+
+def chunk(chunk_id: str, score: float = 0.8) -> RetrievedChunk:
+    return RetrievedChunk(id=chunk_id, text=f"Buddy grew up chasing sea lions at Pier 39, story {chunk_id}", score=score)
+
+
+def test_weak_matches_are_skipped():
+    ledger = RetrievalLedger(min_score=0.5)
+
+    plan = ledger.plan([chunk("a", 0.2), chunk("b", 0.4)])
+
+    assert plan.render() == ""
+    assert ledger.stats.skipped_low_score == 1
+
+
+def test_chunks_not_marked_in_context_are_resent_in_full():
+    ledger = RetrievalLedger(min_score=0.5)
+
+    first = ledger.plan([chunk("a")])
+    second = ledger.plan([chunk("a")])
+
+    assert [c.id for c in first.new] == ["a"]
+    assert [c.id for c in second.new] == ["a"]
+    assert second.repeated == []
+    assert "Already shared" not in second.render()
+
+
+def test_chunks_marked_in_context_become_references():
+    ledger = RetrievalLedger(min_score=0.5)
+    ledger.mark_in_context(ledger.plan([chunk("a")]))
+
+    plan = ledger.plan([chunk("a"), chunk("b")])
+
+    assert [c.id for c in plan.new] == ["b"]
+    assert [c.id for c in plan.repeated] == ["a"]
+    rendered = plan.render()
+    assert rendered.startswith(chunk("b").text)
+    assert 'Already shared earlier in this conversation: "Buddy grew up chasing sea lions at Pier..."' in rendered
+    assert ledger.stats.saved_tokens > 0
+
+
+def test_marked_chunks_expire_after_ttl():
+    ledger = RetrievalLedger(min_score=0.5, ttl_turns=2)
+    ledger.mark_in_context(ledger.plan([chunk("a")]))
+    ledger.plan([])
+    ledger.plan([])
+
+    plan = ledger.plan([chunk("a")])
+
+    assert [c.id for c in plan.new] == ["a"]
+
+
+def test_turns_without_retrieval_still_age_marked_chunks():
+    ledger = RetrievalLedger(min_score=0.5, ttl_turns=2)
+    ledger.mark_in_context(ledger.plan([chunk("a")]))
+    ledger.skip_turn()
+
+    plan = ledger.plan([chunk("a")])
+
+    assert [c.id for c in plan.new] == ["a"]
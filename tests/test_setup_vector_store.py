@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+import chromadb
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from setup_vector_store import build_lexical_index
+
+from buddy.lexical_index import BM25Index
+
+
+def test_lexical_index_is_built_page_by_page(monkeypatch):
+    documents = [f"Buddy story {i} about {'sea lions' if i == 7 else 'naps'}" for i in range(12)]
+    ids = [f"c{i}" for i in range(12)]
+    metadatas = [{"page": i} for i in range(12)]
+    collection = chromadb.EphemeralClient().get_or_create_collection("paged", embedding_function=None)
+    collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=[[float(i), 1.0] for i in range(12)])
+    pages = []
+    get = collection.get
+    monkeypatch.setattr(collection, "get", lambda **kwargs: pages.append(kwargs["limit"]) or get(**kwargs))
+
+    index = build_lexical_index(collection, page_size=5)
+
+    assert pages == [5, 5, 5]
+    expected = BM25Index.build(ids, documents, metadatas)
+    assert sorted(index.ids) == sorted(expected.ids)
+    assert index.avg_doc_length == expected.avg_doc_length
+    [hit] = index.search("sea lions", k=3)
+    assert index.ids[hit.position] == "c7"
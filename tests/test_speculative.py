@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from buddy.rag import RetrievalStats, RetrievedChunk
+from buddy.speculative import SpeculativeRetriever
+
+
+class FakeRAG:
+    """aretrieve_chunks() that answers after a delay, recording every query."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None, slots: int = 2):
+        self.delay = delay
+        self.error = error
+        self.slots = slots
+        self.stats = RetrievalStats()
+        self.queries: list[str] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def aretrieve_chunks(self, query, top_k=None, timeout=None):
+        if self.running >= self.slots:
+            self.stats.shed += 1
+            return []
+        self.queries.append(query)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if self.error is not None:
+            raise self.error
+        return [RetrievedChunk(id=query, text=query, score=0.9)]
+
+
+async def test_final_transcript_reuses_a_matching_prefetch():
+    rag = FakeRAG()
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+
+    speculator.on_interim("tell me about your family")
+    await asyncio.sleep(0.05)
+    chunks = await speculator.retrieve("Tell me about your family?", timeout=1.0)
+
+    assert [c.id for c in chunks] == ["tell me about your family"]
+    assert rag.queries == ["tell me about your family"]
+    assert speculator.stats.hits == 1
+
+
+async def test_newer_transcript_waits_for_the_running_prefetch():
+    rag = FakeRAG(delay=0.1)
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+
+    speculator.on_interim("tell me about your")
+    await asyncio.sleep(0.03)
+    speculator.on_interim("tell me about your family")
+    await asyncio.sleep(0.03)
+    speculator.on_interim("tell me about your family in Oakland")
+    await asyncio.sleep(0.3)
+
+    # Only one retrieval at a time, and the middle transcript was skipped
+    assert rag.max_running == 1
+    assert rag.queries == ["tell me about your", "tell me about your family in Oakland"]
+    assert speculator.stats.superseded == 1
+
+    chunks = await speculator.retrieve("tell me about your family in Oakland", timeout=1.0)
+    assert [c.id for c in chunks] == ["tell me about your family in Oakland"]
+    assert speculator.stats.hits == 1
+
+
+async def test_failed_prefetch_falls_back_to_a_fresh_retrieval():
+    rag = FakeRAG(error=RuntimeError("boom"))
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+
+    speculator.on_interim("tell me about your family")
+    await asyncio.sleep(0.05)
+    rag.error = None
+    chunks = await speculator.retrieve("tell me about your family", timeout=1.0)
+
+    assert [c.id for c in chunks] == ["tell me about your family"]
+    assert speculator.stats.misses == 1
+    assert len(rag.queries) == 2
+
+
+async def test_final_turn_drops_the_waiting_transcript():
+    # Slow enough that the first prefetch is still running when the turn ends
+    rag = FakeRAG(delay=0.2)
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+
+    speculator.on_interim("what do you like")
+    await asyncio.sleep(0.03)
+    speculator.on_interim("what do you like to eat")
+    await asyncio.sleep(0.03)
+    await speculator.retrieve("what do you like to eat for dinner", timeout=1.0)
+    await asyncio.sleep(0.25)
+
+    assert rag.queries == ["what do you like", "what do you like to eat for dinner"]
+    speculator.close()
+
+
+@pytest.mark.parametrize("delay", [0.0, 0.05])
+async def test_close_cancels_speculation(delay):
+    rag = FakeRAG(delay=delay)
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+
+    speculator.on_interim("what do you like to eat")
+    await asyncio.sleep(0.02)
+    speculator.close()
+    await asyncio.sleep(0.1)
+
+    assert len(rag.queries) <= 1
+
+
+async def test_turn_routed_elsewhere_drops_its_prefetch():
+    rag = FakeRAG()
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+
+    speculator.on_interim("tell me about your family")
+    await asyncio.sleep(0.05)
+    speculator.reset()
+    chunks = await speculator.retrieve("tell me about your family", timeout=1.0)
+
+    # The next turn retrieves for itself rather than reusing the old utterance
+    assert speculator.stats.hits == 0
+    assert speculator.stats.misses == 1
+    assert rag.queries == ["tell me about your family", "tell me about your family"]
+    assert [c.id for c in chunks] == ["tell me about your family"]
+
+
+async def test_shedding_behind_an_abandoned_prefetch_is_counted():
+    # Cancelling the prefetch doesn't free the slot its retrieval holds
+    rag = FakeRAG(delay=0.2, slots=1)
+    speculator = SpeculativeRetriever(rag, debounce=0.01)
+    real = rag.aretrieve_chunks
+
+    async def uncancellable(query, top_k=None, timeout=None):
+        return await asyncio.shield(asyncio.ensure_future(real(query, top_k, timeout)))
+
+    rag.aretrieve_chunks = uncancellable
+    speculator.on_interim("what do you like to eat")
+    await asyncio.sleep(0.05)
+    chunks = await speculator.retrieve("where did you grow up", timeout=1.0)
+
+    assert chunks == []
+    assert speculator.stats.abandoned == 1
+    assert speculator.stats.shed_after_abandon == 1
+    await asyncio.sleep(0.25)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+from livekit.agents.metrics import EOUMetrics, LLMMetrics, TTSMetrics
+
+from buddy import telemetry
+from buddy.telemetry import (
+    SAMPLE_WINDOW,
+    LatencyHistogram,
+    TurnTracker,
+    latency,
+    merged_metrics,
+    render_prometheus,
+    schedule_snapshot,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    latency.reset()
+    yield
+    latency.reset()
+
+
+def eou(speech_id: str, hook: float = 0.0) -> EOUMetrics:
+    return EOUMetrics(
+        timestamp=0.0, end_of_utterance_delay=0.3, transcription_delay=0.1,
+        on_user_turn_completed_delay=hook, last_speaking_time=0.0, speech_id=speech_id,
+    )
+
+
+def llm(speech_id: str, ttft: float) -> LLMMetrics:
+    return LLMMetrics(
+        label="llm", request_id="r", timestamp=0.0, duration=1.0, ttft=ttft, cancelled=False,
+        completion_tokens=1, prompt_tokens=1, prompt_cached_tokens=0, total_tokens=2,
+        tokens_per_second=1.0, speech_id=speech_id,
+    )
+
+
+def tts(speech_id: str, ttfb: float) -> TTSMetrics:
+    return TTSMetrics(
+        label="tts", request_id="r", timestamp=0.0, ttfb=ttfb, duration=1.0, audio_duration=1.0,
+        cancelled=False, characters_count=10, streamed=True, speech_id=speech_id,
+    )
+
+
+def test_turn_total_includes_the_turn_completed_hook():
+    tracker = TurnTracker(room="room")
+    tracker.add_span("rag", 0.15)
+    tracker.on_metrics(eou("s1", hook=0.2))
+    tracker.on_metrics(llm("s1", ttft=0.4))
+    tracker.on_metrics(tts("s1", ttfb=0.25))
+
+    (total,) = latency.histograms["turn"].samples
+    assert total == pytest.approx(300 + 200 + 400 + 250)
+    assert list(latency.histograms["rag"].samples) == [pytest.approx(150)]
+
+
+def test_tool_turn_uses_the_ttft_of_the_generation_after_the_tool():
+    tracker = TurnTracker(room="room")
+    tracker.on_metrics(eou("s1"))
+    tracker.on_metrics(llm("s1", ttft=0.3))
+    tracker.add_span("tool", 1.0)
+    tracker.on_metrics(llm("s1", ttft=0.5))
+    tracker.on_metrics(tts("s1", ttfb=0.2))
+
+    assert list(latency.histograms["llm_ttft"].samples) == [pytest.approx(500)]
+    (total,) = latency.histograms["turn"].samples
+    assert total == pytest.approx(300 + 1000 + 500 + 200)
+
+
+def test_histogram_round_trips_and_merges():
+    hist = LatencyHistogram()
+    for ms in (10, 60, 20000):
+        hist.observe(ms)
+
+    merged = LatencyHistogram.from_dict(hist.to_dict())
+    merged.merge(hist)
+
+    assert merged.count == 6
+    assert merged.buckets[0] == 2 and merged.buckets[-1] == 2
+    assert merged.quantile(0.5) == 60
+
+
+def test_gauges_of_exited_processes_are_not_exported(tmp_path):
+    latency.increment("linkup_hedges", 2)
+    latency.set_gauge("linkup_breaker_open", 1.0)
+    latency.write_snapshot(tmp_path)
+    # A job process that has exited (pid far above pid_max)
+    snapshot = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    (tmp_path / "99999999.json").write_text(json.dumps(snapshot))
+
+    text = render_prometheus(merged_metrics(tmp_path))
+
+    assert "buddy_linkup_hedges_total 4" in text
+    assert "buddy_linkup_breaker_open 1" in text
+
+
+def test_merge_keeps_every_process_samples(tmp_path):
+    # Two job processes with full sample windows, one fast and one slow
+    for pid, ms in ((1, 100.0), (2, 900.0)):
+        hist = LatencyHistogram()
+        for _ in range(SAMPLE_WINDOW):
+            hist.observe(ms)
+        (tmp_path / f"{pid}.json").write_text(json.dumps({
+            "histograms": {"turn": hist.to_dict()}, "counters": {}, "gauges": {},
+        }))
+
+    turn = merged_metrics(tmp_path).histograms["turn"]
+
+    assert len(turn.samples) == 2 * SAMPLE_WINDOW
+    assert turn.quantile(0.25) == 100.0
+    assert turn.quantile(0.75) == 900.0
+
+
+async def test_snapshots_are_throttled_and_written_off_the_loop(monkeypatch):
+    writes = []
+    loop_thread = threading.get_ident()
+    monkeypatch.setattr(telemetry, "METRICS_SNAPSHOT_INTERVAL", 0.1)
+    monkeypatch.setattr(telemetry, "_last_snapshot", 0.0)
+    monkeypatch.setattr(telemetry, "_snapshot_task", None)
+    monkeypatch.setattr(latency, "write_snapshot", lambda: writes.append(threading.get_ident()))
+
+    for _ in range(20):
+        schedule_snapshot()
+    await asyncio.sleep(0.05)
+    for _ in range(20):
+        schedule_snapshot()
+    await asyncio.sleep(0.15)
+
+    # One write right away, then one trailing write for the turns after it
+    assert len(writes) == 2
+    assert loop_thread not in writes
@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+from livekit.agents.voice.events import SpeechCreatedEvent
+from livekit.agents.voice.speech_handle import SpeechHandle
+from livekit.rtc import EventEmitter
+
+from buddy import tools
+
+
+class FakeSession(EventEmitter):
+    """Stands in for AgentSession: prefetches only use its speech_created events."""
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    queries = []
+
+    async def fetch(search_query):
+        queries.append(search_query)
+        await asyncio.sleep(0.01)
+        return {"results": [{"name": search_query}]}
+
+    monkeypatch.setattr(tools, "_fetch_events", fetch)
+    return queries
+
+
+def reply(session: FakeSession, source: str = "generate_reply") -> SpeechHandle:
+    handle = SpeechHandle.create()
+    session.emit("speech_created", SpeechCreatedEvent(user_initiated=False, source=source, speech_handle=handle))
+    return handle
+
+
+async def test_prefetch_is_reused_for_a_matching_query(searches):
+    session = FakeSession()
+    tools.prefetch_event_search(session, "live music this weekend in SF")
+
+    task = tools._take_prefetch(session, "live music SF this weekend")
+
+    assert task is not None
+    assert (await task)["results"][0]["name"] == "live music this weekend in SF"
+    assert tools._take_prefetch(session, "live music SF this weekend") is None
+
+
+async def test_prefetch_is_not_reused_for_a_different_query(searches):
+    session = FakeSession()
+    tools.prefetch_event_search(session, "anything fun tonight")
+
+    assert tools._take_prefetch(session, "comedy shows San Francisco tonight") is None
+    assert session not in tools._prefetches
+
+
+@pytest.mark.parametrize("transcript, tool_query", [
+    ("Any good jazz shows happening this weekend?", "jazz concerts San Francisco this weekend"),
+    ("What's going on in the Mission tonight?", "events in the Mission District SF tonight"),
+    ("I want to go dancing Saturday night", "dance clubs San Francisco Saturday night"),
+    ("When is Outside Lands this year?", "Outside Lands 2025 dates San Francisco"),
+])
+async def test_prefetch_is_reused_for_the_llms_rephrasing(searches, transcript, tool_query):
+    session = FakeSession()
+    tools.prefetch_event_search(session, transcript)
+
+    assert tools._take_prefetch(session, tool_query) is not None
+
+
+@pytest.mark.parametrize("transcript, tool_query", [
+    ("Any concerts this weekend?", "concerts San Francisco tonight"),
+    ("Anything in the Mission tonight?", "events in North Beach SF tonight"),
+    ("When is Outside Lands this year?", "Fleet Week 2025 San Francisco"),
+    ("Got any ideas?", "fun stuff to do in SF"),
+])
+async def test_prefetch_is_not_reused_when_the_llm_asks_for_something_else(searches, transcript, tool_query):
+    session = FakeSession()
+    tools.prefetch_event_search(session, transcript)
+
+    assert tools._take_prefetch(session, tool_query) is None
+
+
+async def test_unclaimed_prefetch_is_dropped_when_the_reply_is_done(searches):
+    session = FakeSession()
+    tools.prefetch_event_search(session, "jazz tonight")
+    task = tools._prefetches[session].task
+
+    reply(session, source="say")  # the filler phrase
+    handle = reply(session)
+    assert session in tools._prefetches
+
+    handle._mark_done()
+    await asyncio.sleep(0)
+
+    assert session not in tools._prefetches
+    assert tools._take_prefetch(session, "jazz tonight") is None
+    await asyncio.sleep(0)
+    assert task.cancelled()
+
+
+async def test_new_turn_replaces_the_previous_prefetch(searches):
+    session = FakeSession()
+    tools.prefetch_event_search(session, "jazz tonight")
+    first = tools._prefetches[session].task
+    tools.prefetch_event_search(session, "food trucks tomorrow")
+
+    await asyncio.sleep(0)
+    assert first.cancelled()
+    assert tools._take_prefetch(session, "jazz tonight SF") is None
+
+
+def test_search_queries_normalize_to_one_key():
+    assert tools.normalize_search_query("Events in SF tonite") == tools.normalize_search_query(
+        "tonight san francisco events"
+    )
+    assert tools.normalize_search_query("jazz in SF") != tools.normalize_search_query("comedy in SF")
+
+
+async def test_concurrent_misses_share_one_search():
+    cache = tools.SearchCache()
+    calls = []
+
+    async def fetch(search_query):
+        calls.append(search_query)
+        await asyncio.sleep(0.01)
+        return {"results": [search_query]}
+
+    first, second = await asyncio.gather(
+        cache.get("jazz in SF", fetch), cache.get("jazz in san francisco", fetch)
+    )
+
+    assert first == second == {"results": ["jazz in SF"]}
+    assert calls == ["jazz in SF"]
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 1
+
+    assert await cache.get("SF jazz", fetch) == first
+    assert cache.stats.hits == 1
+
+
+async def test_stale_results_are_served_while_refreshing():
+    cache = tools.SearchCache(ttl=0.0, stale_ttl=60.0)
+    answers = iter([{"results": ["old"]}, {"results": ["new"]}])
+
+    async def fetch(search_query):
+        return next(answers)
+
+    assert await cache.get("jazz", fetch) == {"results": ["old"]}
+    assert await cache.get("jazz", fetch) == {"results": ["old"]}
+    assert cache.stats.stale_hits == 1
+    await asyncio.sleep(0)
+
+    assert await cache.get("jazz", fetch) == {"results": ["new"]}
+
+
+async def test_expired_results_beat_a_failed_search():
+    cache = tools.SearchCache(ttl=0.0, stale_ttl=0.0)
+
+    async def ok(search_query):
+        return {"results": ["old"]}
+
+    async def down(search_query):
+        raise RuntimeError("Linkup is down")
+
+    await cache.get("jazz", ok)
+
+    assert await cache.get("jazz", down) == {"results": ["old"]}
+    assert cache.stats.expired_hits == 1
+    with pytest.raises(RuntimeError):
+        await cache.get("comedy", down)
@@ -0,0 +1,40 @@
+import asyncio
+import json
+import time
+
+from buddy.load import LOAD_STATE_DIR_ENV, JobLoadReporter
+from buddy.watchdog import LoopWatchdog
+
+
+async def test_watchdog_heartbeat_feeds_the_load_report(tmp_path, monkeypatch):
+    monkeypatch.setenv(LOAD_STATE_DIR_ENV, str(tmp_path))
+    reporter = JobLoadReporter(interval=0.1)
+    watchdog = LoopWatchdog(interval_ms=10, block_ms=1000, on_lag=reporter.record_lag)
+    reporter.start()
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        time.sleep(0.08)  # block the loop
+        await asyncio.sleep(0.25)
+    finally:
+        watchdog.stop()
+        reporter._task.cancel()
+
+    report = json.loads(reporter.path.read_text())
+    assert report["loop_lag_ms"] >= 60
+    assert watchdog.stats.max_lag_ms >= 60
+
+
+async def test_reporter_samples_lag_itself_without_a_watchdog(tmp_path, monkeypatch):
+    monkeypatch.setenv(LOAD_STATE_DIR_ENV, str(tmp_path))
+    reporter = JobLoadReporter(interval=0.05)
+    reporter.start()
+    try:
+        await asyncio.sleep(0.01)
+        time.sleep(0.1)
+        await asyncio.sleep(0.1)
+    finally:
+        reporter._task.cancel()
+
+    assert json.loads(reporter.path.read_text())["loop_lag_ms"] >= 40
+